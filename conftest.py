@@ -0,0 +1,45 @@
+"""Configuración compartida de pytest."""
+
+from pathlib import Path
+import sys
+import types
+
+import pytest
+
+COMPONENT_DIR = Path(__file__).parent / "custom_components" / "custom_alarmdecoder"
+
+# El __init__ de la integración importa Home Assistant. Si no está instalado,
+# registramos el paquete vacío para poder importar los módulos puros
+# (decoder, router, ...) sin ejecutar ese __init__.
+try:
+    import homeassistant  # noqa: F401
+except ImportError:
+    _package = types.ModuleType("custom_components.custom_alarmdecoder")
+    _package.__path__ = [str(COMPONENT_DIR)]
+    sys.modules.setdefault("custom_components.custom_alarmdecoder", _package)
+
+
+# Los benchmarks miden tiempos de reloj y solo informan, no comprueban nada.
+# No se ejecutan salvo que se pidan con --benchmark (y -s para ver la salida).
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="ejecuta también las pruebas marcadas como benchmark",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: medición de tiempos, solo con --benchmark"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark, usar --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
@@ -1,19 +1,18 @@
 """Support for AlarmDecoder devices."""
 
 from collections.abc import Callable
-from dataclasses import dataclass
-from datetime import timedelta
+from dataclasses import dataclass, field
 import logging
-import re
-import threading
 import time
 from typing import TypeAlias
 
 from adext import AdExt
 from alarmdecoder.devices import SerialDevice, SocketDevice
 from alarmdecoder.util import NoDeviceError
+import voluptuous as vol
 
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.components import persistent_notification
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.const import (
     CONF_HOST,
     CONF_PORT,
@@ -21,39 +20,78 @@ from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
     Platform,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_connect, dispatcher_send
-from homeassistant.helpers.event import async_call_later
-from homeassistant.components import persistent_notification
+from homeassistant.core import (
+    Event,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
+from .aui import AuiEngine, scan_zones
+from .coalesce import WriteCoalescer
+from .commands import PRIORITY_AUI
+from .connection import ConnectionManager, SharedConnection
 from .const import (
-    CONF_AUTO_DETECT_ZONES,
     CONF_DEVICE_BAUD,
     CONF_DEVICE_PATH,
     CONF_ENTRY_DELAY,
     CONF_SCAN_PANEL,
+    CONF_TRANSPORT,
     CONF_ZONE_NAME,
-    CONF_ZONE_RFID,
     CONF_ZONE_TYPE,
     DEFAULT_ARM_OPTIONS,
-    DEFAULT_AUTO_DETECT_ZONES,
     DEFAULT_ENTRY_DELAY,
     DEFAULT_SCAN_PANEL,
+    DEFAULT_TRANSPORT,
     DEFAULT_ZONE_TYPE,
+    DOMAIN,
     OPTIONS_ARM,
     OPTIONS_ZONES,
     PROTOCOL_SERIAL,
     PROTOCOL_SOCKET,
+    SERVICE_DUMP_TRACE,
     SIGNAL_AUI_MESSAGE,
     SIGNAL_PANEL_MESSAGE,
-    SIGNAL_REL_MESSAGE,
+    SIGNAL_PANIC,
     SIGNAL_RFX_MESSAGE,
     SIGNAL_ZONE_FAULT,
     SIGNAL_ZONE_RESTORE,
+    TRACE_AUI,
+    TRACE_PANEL,
+    TRACE_PANIC,
+    TRACE_RELAY,
+    TRACE_RFX,
+    TRACE_ZONE,
+    TRANSPORT_ASYNCIO,
+)
+from .decoder import (
+    KIND_KEYPAD,
+    STATUS_ALARM,
+    DuplicateFilter,
+    PanelEnvelope,
+    RfStatus,
+    decode_lrr_panic,
+    decode_panel_message,
+    decode_rf_message,
 )
+from .handoff import HandoffQueue
+from .resync import ZoneResync
+from .router import BitRouter, ChangeRouter, KeyedRouter, MaskRouter
+from .runtime_config import RuntimeConfig
+from .trace import Tracer
+from .transport import AsyncioDevice, serial_device, socket_device
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+ATTR_CLEAR = "clear"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+
 PLATFORMS = [
     Platform.ALARM_CONTROL_PANEL,
     Platform.BINARY_SENSOR,
@@ -61,136 +99,6 @@ PLATFORMS = [
     Platform.SWITCH,
 ]
 
-# Regex to extract zone number and name from panel text
-# Matches: "ANULA 09  POSTI DORM PPAL" or "COMPROBAR 32  VENT BARBACOA 3"
-_ZONE_TEXT_RE = re.compile(r"^(?:ANULA|COMPROBAR)\s+(\d{2})\s+(.+?)\s*$")
-
-# AUI partition map
-_PARTITION_MAP = {
-    0: '31',  # partition 1
-    1: '32',  # partition 2
-    2: '33',
-    3: '34',
-    4: '35',
-    5: '36',
-    6: '37',
-    7: '38',
-    8: '39',
-}
-
-# Zone type map from AUI
-_ZONE_TYPE_MAP = {
-    '9': 'Supervised Fire',
-    '00': 'Zone Not Used',
-    '1': 'Entry/Exit #1 Burglary',
-    '2': 'Entry/Exit #2 Burglary',
-    '3': 'Perimeter Burglary',
-    '4': 'Interior, Follower',
-    '5': 'Trouble by Day/Alarm by Night',
-    '6': '24-Hour Silent Alarm',
-    '7': '24-Hour Audible Alarm',
-    '8': '24-Hour Auxiliary Alarm',
-    '10': 'Interior With Delay',
-    '12': 'Monitor Zone',
-    '14': 'Carbon Monoxide',
-    '16': 'Fire w/Verify',
-    '20': 'Arm-STAY',
-    '21': 'Arm-AWAY',
-    '22': 'Disarm',
-    '23': 'No Alarm Response',
-    '24': 'Silent Burglary',
-    '27': 'Access Point',
-    '28': 'Main Logic Board (MLB) Supervision',
-    '29': 'Momentary on Exit',
-    '77': 'KeySwitch',
-    '81': 'AAV Monitor Zone',
-    '90': 'Configurable',
-    '91': 'Configurable',
-}
-
-
-def _ascii_to_hex(text: str) -> str:
-    """Convert ASCII string to hex."""
-    return ''.join(f'{ord(c):02x}' for c in text)
-
-
-def _hex_to_ascii(hex_str: str) -> str:
-    """Convert hex string to ASCII."""
-    result = ''
-    for i in range(0, len(hex_str), 2):
-        result += chr(int(hex_str[i:i+2], 16))
-    return result
-
-
-def _dec_to_hex(num: int) -> str:
-    """Convert decimal number to hex string with padding."""
-    if num < 10:
-        return _ascii_to_hex(f"00{num}")
-    elif num < 100:
-        return _ascii_to_hex(f"0{num}")
-    else:
-        return _ascii_to_hex(str(num))
-
-
-def _get_aui_prefix(value: str) -> str:
-    """Get AUI prefix from value."""
-    return value[:2] if len(value) >= 2 else ''
-
-
-def _get_hex_val(value: str, delimiter: str) -> str:
-    """Get hex value after delimiter."""
-    idx = value.find(delimiter)
-    if idx == -1:
-        return ''
-    return value[idx + len(delimiter):]
-
-
-def _parse_aui_message(prefix: str, value: str, state: str, partition_count: int = 0) -> dict | None:
-    """Parse AUI message based on state."""
-    if state == 'get_partition_count':
-        # Response like: 0c020000000057fefefd3131
-        if 'fefefd' not in value:
-            return None
-        hex_val = _get_hex_val(value, "fefefd")
-        ascii_val = _hex_to_ascii(hex_val)
-        return {'partition_count': ascii_val}
-
-    if state == 'get_zone_data':
-        # Response like: 17020000000057fefefeec380037003100534952454e41
-        if 'fefefeec' not in value:
-            return None
-        hex_val = _get_hex_val(value, "fefefeec")
-        if not hex_val:
-            return None
-
-        arr = hex_val.split("00")
-        if len(arr) < 3:
-            return None
-
-        # Handle odd-length first element
-        if arr[0] and len(arr[0]) % 2:
-            arr[0] = hex_val[:len(arr[0])+1]
-            arr[1] = arr[1][1:] if len(arr[1]) > 1 else ''
-
-        address = _hex_to_ascii(arr[0]) if arr[0] else ''
-        zone_type = _hex_to_ascii(arr[1]) if len(arr) > 1 and arr[1] else ''
-        zone_device_type = _hex_to_ascii(arr[2]) if len(arr) > 2 and arr[2] else ''
-        zone_name = _hex_to_ascii(arr[3]) if len(arr) > 3 and arr[3] else ''
-
-        # Only accept valid zones (device type >= '1' in ASCII)
-        device_type_hex = _ascii_to_hex(zone_device_type) if zone_device_type else ''
-        if device_type_hex and int(device_type_hex, 16) >= 0x31:
-            return {
-                'address': address,
-                'zone_type': zone_type,
-                'zone_device_type': zone_device_type,
-                'zone_name': zone_name,
-            }
-        return None
-
-    return None
-
-
 AlarmDecoderConfigEntry: TypeAlias = ConfigEntry["AlarmDecoderData"]
 
 
@@ -199,97 +107,245 @@ class AlarmDecoderData:
     """Runtime data for the AlarmDecoder class."""
 
     client: AdExt
+    # Device connection shared with other entries and kept across reloads
+    connection: SharedConnection
     remove_update_listener: Callable[[], None]
-    remove_stop_listener: Callable[[], None]
-    restart: bool
+    # Drops repeated keypad messages before they reach the event loop
+    duplicate_filter: DuplicateFilter
+    # Buffers device events from the reader thread for the event loop
+    handoff: HandoffQueue
+    # Options snapshot read by the message handlers, see runtime_config()
+    config: RuntimeConfig
+    # Sampled trace of the hot paths, dumped by the dump_trace service
+    tracer: Tracer
+    # Zone number -> zone entities, payload is the faulted state
+    zone_router: KeyedRouter = field(default_factory=KeyedRouter)
+    # RF serial -> zone and RF diagnostic entities, payload is the RfStatus
+    rfx_router: KeyedRouter = field(default_factory=KeyedRouter)
+    # (address, channel) -> relay/expander zone entity, payload is the message
+    relay_router: ChangeRouter = field(default_factory=ChangeRouter)
+    # Keypad address -> alarm panel and display entities, payload is the envelope
+    keypad_router: MaskRouter = field(default_factory=MaskRouter)
+    # Changed status bits -> panel-level status entities, payload is the envelope
+    status_router: BitRouter = field(default_factory=BitRouter)
+    # SIGNAL_* name -> consumers of this entry's panel-level events
+    signal_router: KeyedRouter = field(default_factory=KeyedRouter)
+    # Seconds the setup took and until the device was first available,
+    # reported by the diagnostics
+    timings: dict[str, float] = field(default_factory=dict)
+    # Entity ID -> write coalescer of the entity, whose merged writes are
+    # reported by the diagnostics
+    write_coalescers: dict[str, WriteCoalescer] = field(default_factory=dict)
+    # Requests to the panel's AUI, such as the panel scan
+    aui: AuiEngine | None = None
+
+
+def runtime_config(entry: AlarmDecoderConfigEntry) -> RuntimeConfig:
+    """Return the options snapshot, rebuilt once when the options change."""
+    data = entry.runtime_data
+    if data.config.options is not entry.options:
+        data.config = RuntimeConfig.from_entry(entry.data, entry.options)
+    return data.config
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the shared connections and register the AlarmDecoder services."""
+    # The config flow may have created it to park a device it opened
+    if (manager := hass.data.get(DOMAIN)) is None:
+        manager = hass.data[DOMAIN] = ConnectionManager(hass.loop)
+
+    async def close_connections(event: Event) -> None:
+        """Close every AlarmDecoder connection on shutdown."""
+        _LOGGER.debug("Shutting down alarmdecoder")
+        await manager.async_close_all()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, close_connections)
+
+    async def dump_trace(call: ServiceCall) -> ServiceResponse:
+        """Return the buffered trace of each loaded entry."""
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        traces = {}
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if entry.state is not ConfigEntryState.LOADED:
+                continue
+            if entry_id is not None and entry.entry_id != entry_id:
+                continue
+            tracer = entry.runtime_data.tracer
+            device_config = entry.runtime_data.connection.device_config
+            traces[entry.entry_id] = {
+                "title": entry.title,
+                "enabled": tracer.enabled,
+                "recorded": tracer.recorded,
+                "sampled_out": tracer.sampled_out,
+                "events": tracer.dump(call.data[ATTR_CLEAR]),
+                "commands": entry.runtime_data.connection.commands.stats(),
+                "device_config": device_config.current
+                and device_config.current.config_string,
+            }
+        return traces
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_TRACE,
+        dump_trace,
+        schema=vol.Schema(
+            {
+                vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+                vol.Optional(ATTR_CLEAR, default=False): cv.boolean,
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+    return True
 
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: AlarmDecoderConfigEntry
 ) -> bool:
     """Set up AlarmDecoder config flow."""
+    setup_started = time.monotonic()
     undo_listener = entry.add_update_listener(_update_listener)
 
     ad_connection = entry.data
     protocol = ad_connection[CONF_PROTOCOL]
 
-    def stop_alarmdecoder(event):
-        """Handle the shutdown of AlarmDecoder."""
-        if not entry.runtime_data:
-            return
-        _LOGGER.debug("Shutting down alarmdecoder")
-        entry.runtime_data.restart = False
-        controller.close()
+    config = RuntimeConfig.from_entry(entry.data, entry.options)
+    duplicate_filter = DuplicateFilter(config.dedup_window)
+    tracer = Tracer(config.trace_sample_rate, config.trace_signals)
 
-    async def open_connection(now=None):
-        """Open a connection to AlarmDecoder."""
-        try:
-            await hass.async_add_executor_job(controller.open, baud)
-        except NoDeviceError:
-            _LOGGER.debug("Failed to connect. Retrying in 5 seconds")
-            async_call_later(hass, timedelta(seconds=5), open_connection)
-            return
-        _LOGGER.debug("Established a connection with the alarmdecoder")
-        entry.runtime_data.restart = True
+    handoff = HandoffQueue(hass.loop)
 
-    def handle_closed_connection(event):
-        """Restart after unexpected loss of connection."""
-        if not entry.runtime_data.restart:
+    def handle_message(sender, message):
+        """Decode a message from AlarmDecoder and hand it to the event loop."""
+        if not duplicate_filter.accept(message):
+            return
+        envelope = decode_panel_message(message, config.auto_detect_zones)
+        if tracer.enabled:
+            tracer.record(
+                TRACE_PANEL, envelope.address_mask, envelope.status, envelope.text
+            )
+        if envelope.status & STATUS_ALARM:
+            # Alarm and fire screens jump ahead of queued bulk traffic
+            handoff.put_priority(envelope.address_mask, deliver_panel, envelope)
+        else:
+            # Only the latest screen of each keypad is worth delivering
+            handoff.put_latest(envelope.address_mask, deliver_panel, envelope)
+
+    @callback
+    def deliver_panel(envelope: PanelEnvelope):
+        """Deliver a keypad message to its keypads and the panel-level consumers."""
+        data = entry.runtime_data
+        data.keypad_router.dispatch_mask(envelope.address_mask, envelope)
+        if envelope.kind == KIND_KEYPAD:
+            data.status_router.dispatch(envelope.address_mask, envelope.status, envelope)
+        data.signal_router.dispatch(SIGNAL_PANEL_MESSAGE, envelope)
+        if resync.active and envelope.address_mask & data.keypad_router.mask:
+            resync.feed(envelope)
+
+    panic_status = False
+
+    def handle_lrr_message(sender, message):
+        """Hand a panic change reported by LRR to the loop ahead of bulk traffic."""
+        nonlocal panic_status
+        status = decode_lrr_panic(message)
+        if status is None or status == panic_status:
             return
-        entry.runtime_data.restart = False
-        _LOGGER.warning("AlarmDecoder unexpectedly lost connection")
-        hass.add_job(open_connection)
+        panic_status = status
+        if tracer.enabled:
+            tracer.record(TRACE_PANIC, status)
+        handoff.put_priority(None, deliver_panic, status)
 
-    def handle_message(sender, message):
-        """Handle message from AlarmDecoder."""
-        dispatcher_send(hass, SIGNAL_PANEL_MESSAGE, message)
+    @callback
+    def deliver_panic(status: bool):
+        """Deliver a panic event to the alarm panels and the event history."""
+        entry.runtime_data.signal_router.dispatch(SIGNAL_PANIC, status)
 
     def handle_rfx_message(sender, message):
-        """Handle RFX message from AlarmDecoder."""
-        dispatcher_send(hass, SIGNAL_RFX_MESSAGE, message)
+        """Decode an RFX message and hand it to the event loop."""
+        if (decoded := decode_rf_message(message)) is None:
+            return
+        if tracer.enabled:
+            tracer.record(TRACE_RFX, decoded[0], decoded[1].value)
+        handoff.put(deliver_rfx, *decoded)
+
+    @callback
+    def deliver_rfx(serial: str, status: RfStatus):
+        """Deliver a decoded RFX status to the entities using that serial."""
+        data = entry.runtime_data
+        if not data.rfx_router.dispatch(serial, status):
+            notify_new_rf_sensor(serial)
+        data.signal_router.dispatch(SIGNAL_RFX_MESSAGE, serial, status)
 
     def zone_fault_callback(sender, zone):
         """Handle zone fault from AlarmDecoder."""
-        dispatcher_send(hass, SIGNAL_ZONE_FAULT, zone)
+        if tracer.enabled:
+            tracer.record(TRACE_ZONE, zone, True)
+        handoff.put(deliver_zone, zone, True)
 
     def zone_restore_callback(sender, zone):
         """Handle zone restore from AlarmDecoder."""
-        dispatcher_send(hass, SIGNAL_ZONE_RESTORE, zone)
+        if tracer.enabled:
+            tracer.record(TRACE_ZONE, zone, False)
+        handoff.put(deliver_zone, zone, False)
+
+    @callback
+    def deliver_zone(zone, faulted: bool):
+        """Deliver a zone fault or restore to the entity owning that zone."""
+        data = entry.runtime_data
+        if zone is None:
+            data.zone_router.dispatch_all(faulted)
+        else:
+            data.zone_router.dispatch(int(zone), faulted)
+        data.signal_router.dispatch(
+            SIGNAL_ZONE_FAULT if faulted else SIGNAL_ZONE_RESTORE, zone
+        )
+
+    @callback
+    def publish_zones(table: dict[int, bool]):
+        """Write the resynced zone states, all in this loop iteration."""
+        zone_router = entry.runtime_data.zone_router
+        for zone, faulted in table.items():
+            zone_router.dispatch(zone, faulted)
+
+    resync = ZoneResync(
+        hass.loop,
+        lambda: runtime_config(entry).zones,
+        lambda key: entry.runtime_data.connection.press_once(key),
+        publish_zones,
+    )
 
     def handle_rel_message(sender, message):
         """Handle relay or zone expander message from AlarmDecoder."""
-        dispatcher_send(hass, SIGNAL_REL_MESSAGE, message)
+        if tracer.enabled:
+            tracer.record(
+                TRACE_RELAY,
+                "Relay" if message.type == message.RELAY else "ZoneExpander",
+                message.address,
+                message.channel,
+                message.value,
+            )
+        handoff.put(deliver_relay, message)
 
-    def auto_detect_zone(message):
-        """Auto-detect zones from panel messages."""
-        # Only process KPM messages (raw starts with "[")
-        if not hasattr(message, "raw") or not message.raw or message.raw[0] != "[":
-            return
-        # Skip panel status messages (text starts with "**")
-        if message.text and message.text.startswith("**"):
-            return
-        # Check if auto-detect is enabled (stored inside OPTIONS_ARM)
-        arm_options = entry.options.get(OPTIONS_ARM, DEFAULT_ARM_OPTIONS)
-        auto_detect = arm_options.get(CONF_AUTO_DETECT_ZONES, DEFAULT_AUTO_DETECT_ZONES)
-        _LOGGER.debug(
-            "Auto-detect check: arm_options=%s, auto_detect=%s",
-            arm_options,
-            auto_detect,
+    @callback
+    def deliver_relay(message):
+        """Deliver a changed relay/expander value to the zone owning the channel."""
+        entry.runtime_data.relay_router.dispatch_changed(
+            (message.address, message.channel), message.value, message
         )
-        if not auto_detect:
-            return
-        # Extract zone info from text
-        if not message.text:
+
+    @callback
+    def auto_detect_zone(envelope: PanelEnvelope):
+        """Auto-detect zones from panel messages."""
+        # Only keypad messages showing a zone text carry a zone
+        if envelope.kind != KIND_KEYPAD or envelope.zone is None:
             return
-        match = _ZONE_TEXT_RE.match(message.text.strip())
-        if not match:
+        config = runtime_config(entry)
+        # Skip if auto-detect is disabled or the zone already exists
+        if not config.auto_detect_zones or envelope.zone[0] in config.zones:
             return
-        zone_num = str(int(match.group(1)))
-        zone_name = match.group(2).strip()
-        # Check if zone already exists
+        zone_num = str(envelope.zone[0])
+        zone_name = envelope.zone[1]
         zones = entry.options.get(OPTIONS_ZONES, {})
-        if zone_num in zones:
-            return
         # Add new zone
         new_zone = {
             CONF_ZONE_NAME: f"{zone_num} - {zone_name}",
@@ -300,33 +356,23 @@ async def async_setup_entry(
         _LOGGER.info(
             "Auto-detected zone %s: '%s'. Reloading config entry.", zone_num, zone_name
         )
-
-        def _update_entry():
-            hass.config_entries.async_update_entry(
-                entry, options={**entry.options, OPTIONS_ZONES: new_zones}
-            )
-
-        hass.loop.call_soon_threadsafe(_update_entry)
+        hass.config_entries.async_update_entry(
+            entry, options={**entry.options, OPTIONS_ZONES: new_zones}
+        )
 
     # Track RF serials that have been notified
     _notified_rf_serials: set[str] = set()
 
-    def notify_new_rf_sensor(rfx_message):
+    @callback
+    def notify_new_rf_sensor(serial: str):
         """Notify when a new RF sensor is detected."""
-        if not rfx_message or not rfx_message.serial_number:
-            return
-
-        serial = rfx_message.serial_number
-
         # Skip if already notified
         if serial in _notified_rf_serials:
             return
 
         # Check if serial exists in any zone config
-        zones = entry.options.get(OPTIONS_ZONES, {})
-        for zone_num, zone_config in zones.items():
-            if zone_config.get(CONF_ZONE_RFID) == serial:
-                return  # Already configured
+        if serial in runtime_config(entry).rfid_zones:
+            return  # Already configured
 
         # New sensor detected - notify and track
         _notified_rf_serials.add(serial)
@@ -335,239 +381,227 @@ async def async_setup_entry(
             "Assign manually in zone configuration.",
             serial,
         )
-
-        def _notify():
-            persistent_notification.async_create(
-                hass,
-                title="Sensor RF nuevo detectado",
-                message=(
-                    f"Se detectó un sensor RF nuevo con serial **{serial}**.\n\n"
-                    f"Debes asignarlo manualmente en la configuración de zonas "
-                    f"del integration AlarmDecoder."
-                ),
-                notification_id=f"alarmdecoder_new_rf_{serial}",
-            )
-
-        hass.loop.call_soon_threadsafe(_notify)
-
-    # AUI Scan Panel state
-    class ScanState:
-        """State for AUI panel scanning."""
-
-        scanning = False
-        partition_count = 0
-        current_zone = 0
-        current_partition = 0
-        zones: list[dict] = []
-        zone_addresses: list[str] = []
-
-    scan_state = ScanState()
+        persistent_notification.async_create(
+            hass,
+            title="Sensor RF nuevo detectado",
+            message=(
+                f"Se detectó un sensor RF nuevo con serial **{serial}**.\n\n"
+                f"Debes asignarlo manualmente en la configuración de zonas "
+                f"del integration AlarmDecoder."
+            ),
+            notification_id=f"alarmdecoder_new_rf_{serial}",
+        )
 
     def handle_aui_message_event(sender, message):
-        """Handle AUI message from AlarmDecoder device event."""
+        """Hand an AUI message to the request it answers."""
         raw = str(message) if message else ''
-        _LOGGER.debug("AUI Scan: on_aui_message event received: %s", raw[:100])
-        
-        if not scan_state.scanning:
-            return
+        if tracer.enabled:
+            tracer.record(TRACE_AUI, raw[:100])
+        aui.handle_message(raw)
+
+    # K01| routes through AUI keypad at address 1. Answered by !AUI messages,
+    # not acknowledged, and queued behind user commands
+    aui = AuiEngine(
+        hass.loop,
+        lambda command: entry.runtime_data.connection.commands.submit(
+            f'K01|{command}\r\n', priority=PRIORITY_AUI, ack=False
+        ),
+    )
 
-        if '!AUI:' not in raw:
-            return
+    scan_notification = f"alarmdecoder_scan_{entry.entry_id}"
 
-        # Extract the AUI value
-        idx = raw.find('!AUI:')
-        if idx == -1:
+    @callback
+    def scan_progress(done: int, total: int):
+        """Show how far the panel scan got."""
+        if done % 8 and done != total:
             return
-        value = raw[idx + 5:]  # Remove '!AUI:' prefix
-        prefix = _get_aui_prefix(value)
-
-        _LOGGER.debug("AUI Scan: Processing AUI, prefix=%s, value=%s", prefix, value[:60])
-
-        # Parse partition count response (prefix 0c with fefefd)
-        if prefix == '0c' and 'fefefd' in value:
-            result = _parse_aui_message(prefix, value, 'get_partition_count')
-            if result:
-                try:
-                    scan_state.partition_count = int(result['partition_count'])
-                    _LOGGER.info("AUI Scan: Found %d partitions", scan_state.partition_count)
-                except (ValueError, TypeError):
-                    _LOGGER.warning("AUI Scan: Invalid partition count: %s", result['partition_count'])
-
-        # Parse zone data response (prefix 17 or similar with fefefeec)
-        elif 'fefefeec' in value:
-            result = _parse_aui_message(prefix, value, 'get_zone_data')
-            if result:
-                address = result['address']
-                if address and address not in scan_state.zone_addresses:
-                    zone_name = result['zone_name'] if result['zone_name'] else f"Zone {address}"
-                    zone_data = {
-                        'address': address,
-                        'zone_name': zone_name,
-                        'zone_type': result.get('zone_type', ''),
-                    }
-                    scan_state.zones.append(zone_data)
-                    scan_state.zone_addresses.append(address)
-                    _LOGGER.info(
-                        "AUI Scan: Found zone %s - '%s'",
-                        address,
-                        zone_name,
-                    )
-
-    def _send_aui_command(command: str):
-        """Send AUI command to AlarmDecoder."""
-        if not entry.runtime_data or not entry.runtime_data.client:
-            _LOGGER.warning("AUI Scan: Client not ready yet")
-            return
-        try:
-            # K01| routes through AUI keypad at address 1
-            full_command = f'K01|{command}\r\n'
-            entry.runtime_data.client.send(full_command)
-            _LOGGER.debug("AUI Scan: Sent command: %s", command)
-        except Exception as e:
-            _LOGGER.error("AUI Scan: Error sending command: %s", e)
+        persistent_notification.async_create(
+            hass,
+            title="Escaneo del panel AlarmDecoder",
+            message=f"Zonas consultadas: {done} de {total}.",
+            notification_id=scan_notification,
+        )
 
     async def scan_panel_zones():
         """Scan panel for zones using AUI commands."""
-        if scan_state.scanning:
-            _LOGGER.warning("AUI Scan: Already scanning")
-            return
-
-        # Check if scan_panel is enabled
         arm_options = entry.options.get(OPTIONS_ARM, DEFAULT_ARM_OPTIONS)
-        scan_enabled = arm_options.get(CONF_SCAN_PANEL, DEFAULT_SCAN_PANEL)
-        if not scan_enabled:
-            return
-
-        scan_state.scanning = True
-        scan_state.partition_count = 0
-        scan_state.current_zone = 0
-        scan_state.current_partition = 0
-        scan_state.zones = []
-        scan_state.zone_addresses = []
-
         _LOGGER.info("AUI Scan: Starting panel zone scan")
-
+        started = time.monotonic()
         try:
-            # Step 1: Get partition count
-            # Command: 00606b0c4361
-            _send_aui_command('00606b0c4361\r\n')
-            await hass.async_add_executor_job(time.sleep, 3)
-
-            # If we didn't get partition count, default to 1
-            if scan_state.partition_count == 0:
-                scan_state.partition_count = 1
-                _LOGGER.info("AUI Scan: Defaulting to 1 partition")
-
-            # Step 2: Scan zones for each partition
-            for partition_idx in range(scan_state.partition_count):
-                partition_hex = _PARTITION_MAP.get(partition_idx, '31')
-                _LOGGER.info("AUI Scan: Scanning partition %d (hex: %s)", partition_idx + 1, partition_hex)
-
-                # Scan 48 zones per partition (standard Honeywell limit)
-                for zone_num in range(48):
-                    if not scan_state.scanning:
-                        break
-
-                    zone_hex = _dec_to_hex(zone_num)
-                    # Command format: 006f620c4549f5{partition}fb4543f5{zone}fb436c
-                    command = f'006f620c4549f5{partition_hex}fb4543f5{zone_hex}fb436c\r\n'
-                    _send_aui_command(command)
-                    await hass.async_add_executor_job(time.sleep, 1.5)
-
-                if not scan_state.scanning:
-                    break
-
-            # Step 3: Create zones in config entry
-            if scan_state.zones:
-                zones = entry.options.get(OPTIONS_ZONES, {})
-                new_zones = {**zones}
-
-                for zone_data in scan_state.zones:
-                    zone_num = str(int(zone_data['address']))
-                    if zone_num not in new_zones:
-                        new_zone = {
-                            CONF_ZONE_NAME: f"{zone_num} - {zone_data['zone_name']}",
-                            CONF_ZONE_TYPE: DEFAULT_ZONE_TYPE,
-                            CONF_ENTRY_DELAY: DEFAULT_ENTRY_DELAY,
-                        }
-                        new_zones[zone_num] = new_zone
-                        _LOGGER.info(
-                            "AUI Scan: Adding zone %s - '%s'",
-                            zone_num,
-                            zone_data['zone_name'],
-                        )
-
-                # Update config entry
-                def _update_zones():
-                    hass.config_entries.async_update_entry(
-                        entry, options={**entry.options, OPTIONS_ZONES: new_zones}
-                    )
-
-                hass.loop.call_soon_threadsafe(_update_zones)
-                _LOGGER.info("AUI Scan: Scan complete. Found %d zones", len(scan_state.zones))
-            else:
-                _LOGGER.warning("AUI Scan: No zones found")
-
-        except Exception as e:
-            _LOGGER.error("AUI Scan: Error during scan: %s", e)
-        finally:
-            # Auto-uncheck the scan_panel option
-            scan_state.scanning = False
-            arm_options[CONF_SCAN_PANEL] = False
-
-            def _disable_scan():
-                hass.config_entries.async_update_entry(
-                    entry, options={**entry.options, OPTIONS_ARM: arm_options}
-                )
+            found = await scan_zones(aui, progress=scan_progress)
+        except ConnectionError as err:
+            # The device closed, the scan runs again after the next setup
+            _LOGGER.warning("AUI Scan: Scan aborted: %s", err)
+            persistent_notification.async_dismiss(hass, scan_notification)
+            return
 
-            hass.loop.call_soon_threadsafe(_disable_scan)
-            _LOGGER.info("AUI Scan: Scan panel option disabled")
+        if found:
+            new_zones = {**entry.options.get(OPTIONS_ZONES, {})}
+            for zone_data in found:
+                zone_num = str(int(zone_data['address']))
+                if zone_num not in new_zones:
+                    new_zones[zone_num] = {
+                        CONF_ZONE_NAME: f"{zone_num} - {zone_data['zone_name']}",
+                        CONF_ZONE_TYPE: DEFAULT_ZONE_TYPE,
+                        CONF_ENTRY_DELAY: DEFAULT_ENTRY_DELAY,
+                    }
+                    _LOGGER.info(
+                        "AUI Scan: Adding zone %s - '%s'",
+                        zone_num,
+                        zone_data['zone_name'],
+                    )
+            _LOGGER.info(
+                "AUI Scan: Scan complete in %.1f seconds. Found %d zones, %s",
+                time.monotonic() - started,
+                len(found),
+                aui.stats(),
+            )
+        else:
+            new_zones = entry.options.get(OPTIONS_ZONES, {})
+            _LOGGER.warning("AUI Scan: No zones found")
+
+        persistent_notification.async_create(
+            hass,
+            title="Escaneo del panel AlarmDecoder",
+            message=f"Escaneo terminado, zonas encontradas: {len(found)}.",
+            notification_id=scan_notification,
+        )
+        # Auto-uncheck the scan_panel option, in the same update as the
+        # zones so the entry reloads once
+        hass.config_entries.async_update_entry(
+            entry,
+            options={
+                **entry.options,
+                OPTIONS_ZONES: new_zones,
+                OPTIONS_ARM: {**arm_options, CONF_SCAN_PANEL: False},
+            },
+        )
+        _LOGGER.info("AUI Scan: Scan panel option disabled")
 
+    manager: ConnectionManager = hass.data[DOMAIN]
     baud = ad_connection.get(CONF_DEVICE_BAUD)
+    # One connection per physical device, whichever entry opened it first
     if protocol == PROTOCOL_SOCKET:
-        host = ad_connection[CONF_HOST]
-        port = ad_connection[CONF_PORT]
-        controller = AdExt(SocketDevice(interface=(host, port)))
+        key = (protocol, ad_connection[CONF_HOST], ad_connection[CONF_PORT])
     elif protocol == PROTOCOL_SERIAL:
-        path = ad_connection[CONF_DEVICE_PATH]
-        controller = AdExt(SerialDevice(interface=path))
+        key = (protocol, ad_connection[CONF_DEVICE_PATH])
     else:
         _LOGGER.error("Unsupported protocol: %s", protocol)
         return False
 
-    controller.on_message += handle_message
-    controller.on_rfx_message += handle_rfx_message
-    controller.on_zone_fault += zone_fault_callback
-    controller.on_zone_restore += zone_restore_callback
-    controller.on_close += handle_closed_connection
-    controller.on_expander_message += handle_rel_message
-
+    def create_connection():
+        """Create the controller of a device no other entry is connected to."""
+        use_asyncio = (
+            ad_connection.get(CONF_TRANSPORT, DEFAULT_TRANSPORT) == TRANSPORT_ASYNCIO
+        )
+        # Opened by the config flow's connection test, when just added
+        parked = manager.claim(key)
+        if parked is not None:
+            controller, device = parked
+        else:
+            if protocol == PROTOCOL_SOCKET:
+                host = ad_connection[CONF_HOST]
+                port = ad_connection[CONF_PORT]
+                if use_asyncio:
+                    device = socket_device(host, port)
+                else:
+                    device = SocketDevice(interface=(host, port))
+            else:
+                path = ad_connection[CONF_DEVICE_PATH]
+                if use_asyncio:
+                    device = serial_device(path, baud)
+                else:
+                    device = SerialDevice(interface=path)
+            controller = AdExt(device)
+        handed_off = parked is not None
+
+        async def open_device() -> bool:
+            """Open the device, return False when it is not reachable."""
+            nonlocal handed_off
+            if handed_off:
+                handed_off = False
+                if device.is_reader_alive():
+                    # Its configuration was read before our handlers were on
+                    await hass.async_add_executor_job(controller.get_config)
+                    return True
+            try:
+                if isinstance(device, AsyncioDevice):
+                    # Connect on the loop, then open only wires the events
+                    await device.async_connect()
+                    controller.open(baud)
+                else:
+                    await hass.async_add_executor_job(controller.open, baud)
+            except NoDeviceError:
+                return False
+            return True
+
+        async def close_device() -> None:
+            """Close the device."""
+            await hass.async_add_executor_job(controller.close)
+
+        async def send_command(data: str) -> None:
+            """Write a keypad string to the device."""
+            if isinstance(device, AsyncioDevice):
+                controller.send(data)
+            else:
+                await hass.async_add_executor_job(controller.send, data)
+
+        return controller, open_device, close_device, send_command
+
+    handlers = {
+        "on_message": handle_message,
+        "on_rfx_message": handle_rfx_message,
+        # on_panic never fires, AdExt ignores the LRR states by default
+        "on_lrr_message": handle_lrr_message,
+        "on_zone_fault": zone_fault_callback,
+        "on_zone_restore": zone_restore_callback,
+        "on_expander_message": handle_rel_message,
+    }
     # Bind AUI message event if available
-    if hasattr(controller, 'on_aui_message'):
-        controller.on_aui_message += handle_aui_message_event
-        _LOGGER.debug("AUI Scan: Bound on_aui_message event handler")
-
-    # Register auto-detect callback
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SIGNAL_PANEL_MESSAGE, auto_detect_zone)
+    if hasattr(AdExt, "on_aui_message"):
+        handlers["on_aui_message"] = handle_aui_message_event
+
+    connection = manager.acquire(key, entry.entry_id, handlers, create_connection)
+    controller = connection.controller
+    # Written once the device reports its configuration, on open
+    connection.device_config.set_wanted(
+        entry.entry_id,
+        config.keypads,
+        config.relay_addresses,
+        config.manage_device_config,
     )
+    # Also released when the setup fails. The device stays open for a while
+    # in case the entry is set up again
+    entry.async_on_unload(lambda: manager.release(connection, entry.entry_id))
 
-    # Register RF sensor notification callback
-    entry.async_on_unload(
-        async_dispatcher_connect(hass, SIGNAL_RFX_MESSAGE, notify_new_rf_sensor)
+    entry.runtime_data = AlarmDecoderData(
+        controller,
+        connection,
+        undo_listener,
+        duplicate_filter,
+        handoff,
+        config,
+        tracer,
+        aui=aui,
     )
 
-    remove_stop_listener = hass.bus.async_listen_once(
-        EVENT_HOMEASSISTANT_STOP, stop_alarmdecoder
+    # Register auto-detect callback
+    entry.async_on_unload(
+        entry.runtime_data.signal_router.subscribe(
+            SIGNAL_PANEL_MESSAGE, auto_detect_zone
+        )
     )
 
-    entry.runtime_data = AlarmDecoderData(
-        controller, undo_listener, remove_stop_listener, False
+    # Merged with the settings of the other entries sharing the device
+    await connection.async_configure(
+        entry.entry_id,
+        config.command_interval,
+        config.fanout_host,
+        config.fanout_port,
     )
-
-    await open_connection()
-
-    await controller.is_init()
+    # Opened in the background, entities are unavailable until then. Does
+    # nothing when the device is already open, e.g. on a reload
+    connection.start()
 
     # Check if scan_panel is enabled and start scan
     arm_options = entry.options.get(OPTIONS_ARM, DEFAULT_ARM_OPTIONS)
@@ -575,23 +609,37 @@ async def async_setup_entry(
         _LOGGER.info("AUI Scan: Scan panel option is enabled, starting scan")
 
         async def _delayed_scan():
-            """Wait for connection to be ready before starting scan."""
-            # Wait for the connection to be established
-            for _ in range(10):
-                if entry.runtime_data and entry.runtime_data.client:
-                    try:
-                        # Test if client is ready
-                        entry.runtime_data.client.send("")
-                        break
-                    except Exception:
-                        pass
-                await hass.async_add_executor_job(time.sleep, 1)
+            """Wait for the device to answer its version before starting scan."""
+            await controller.is_init()
             await scan_panel_zones()
 
-        hass.async_create_task(_delayed_scan())
+        # Not awaited by Home Assistant's startup, cancelled on unload
+        entry.async_create_background_task(
+            hass, _delayed_scan(), f"{DOMAIN} AUI scan {entry.title}"
+        )
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    timings = entry.runtime_data.timings
+    timings["setup"] = round(time.monotonic() - setup_started, 3)
+
+    @callback
+    def on_link_change() -> None:
+        """Time the first connect and resync the zones after each one."""
+        if not connection.link.available:
+            resync.cancel()
+            aui.fail()
+            return
+        timings.setdefault("connected", round(time.monotonic() - setup_started, 3))
+        resync.start()
+
+    # The zone entities exist now, so the table is not lost
+    entry.async_on_unload(connection.link.subscribe(on_link_change))
+    entry.async_on_unload(resync.cancel)
+    if connection.link.available:
+        on_link_change()
+    _LOGGER.debug("Set up %s in %.3f seconds", entry.title, timings["setup"])
+
     return True
 
 
@@ -600,7 +648,6 @@ async def async_unload_entry(
 ) -> bool:
     """Unload a AlarmDecoder entry."""
     data = entry.runtime_data
-    data.restart = False
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
@@ -608,8 +655,23 @@ async def async_unload_entry(
         return False
 
     data.remove_update_listener()
-    data.remove_stop_listener()
-    await hass.async_add_executor_job(data.client.close)
+    _LOGGER.debug(
+        "Keypad messages passed: %s, duplicates suppressed: %s, "
+        "hand-off high-water mark: %s, collapsed: %s, dropped: %s, "
+        "priority events: %s, priority latency mean/max: %.1f/%.1f ms, "
+        "command queue high-water mark: %s, command latency mean/max: %.1f/%.1f ms",
+        data.duplicate_filter.passed,
+        data.duplicate_filter.suppressed,
+        data.handoff.high_water,
+        data.handoff.collapsed,
+        data.handoff.dropped,
+        data.handoff.priority_latency.count,
+        data.handoff.priority_latency.mean * 1000,
+        data.handoff.priority_latency.max * 1000,
+        data.connection.commands.high_water,
+        data.connection.commands.latency.mean * 1000,
+        data.connection.commands.latency.max * 1000,
+    )
 
     return True
 
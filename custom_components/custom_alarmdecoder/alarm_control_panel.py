@@ -1,8 +1,11 @@
 """Support for AlarmDecoder-based alarm control panels (Honeywell/DSC)."""
 
 from __future__ import annotations
+
 import logging
 
+from adext.adext import ARM_AWAY, ARM_HOME
+from alarmdecoder.panels import DSC
 import voluptuous as vol
 
 from homeassistant.components.alarm_control_panel import (
@@ -12,13 +15,16 @@ from homeassistant.components.alarm_control_panel import (
     CodeFormat,
 )
 from homeassistant.const import ATTR_CODE
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import config_validation as cv, entity_platform
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import (
+    config_validation as cv,
+    entity_platform,
+    entity_registry as er,
+)
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
-from homeassistant.helpers import entity_registry as er
 
-from . import AlarmDecoderConfigEntry
+from . import AlarmDecoderConfigEntry, runtime_config
+from .commands import PRIORITY_ARM, PRIORITY_DISARM, CommandQueue
 from .const import (
     CONF_AUTO_BYPASS,
     CONF_CODE_ARM_REQUIRED,
@@ -26,9 +32,20 @@ from .const import (
     DEFAULT_ARM_OPTIONS,
     OPTIONS_ARM,
     OPTIONS_KEYPADS,
-    SIGNAL_PANEL_MESSAGE,
+    SIGNAL_PANIC,
+    TRACE_BYPASS,
+)
+from .decoder import (
+    STATUS_ALARM,
+    STATUS_ARMED,
+    STATUS_ARMED_AWAY,
+    STATUS_ARMED_HOME,
+    STATUS_BITS,
+    PanelEnvelope,
 )
 from .entity import AlarmDecoderEntity
+from .router import KeyedRouter, MaskRouter
+from .trace import Tracer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,6 +54,20 @@ SERVICE_ALARM_TOGGLE_CHIME = "alarm_toggle_chime"
 SERVICE_ALARM_KEYPRESS = "alarm_keypress"
 ATTR_KEYPRESS = "keypress"
 
+# State attribute -> status bit
+_STATE_ATTRIBUTE_BITS = (
+    ("ac_power", STATUS_BITS["ac_power"]),
+    ("alarm_event_occurred", STATUS_BITS["alarm_event_occurred"]),
+    ("backlight_on", STATUS_BITS["backlight_on"]),
+    ("battery_low", STATUS_BITS["battery_low"]),
+    ("check_zone", STATUS_BITS["check_zone"]),
+    ("chime", STATUS_BITS["chime_on"]),
+    ("entry_delay_off", STATUS_BITS["entry_delay_off"]),
+    ("programming_mode", STATUS_BITS["programming_mode"]),
+    ("ready", STATUS_BITS["ready"]),
+    ("zone_bypassed", STATUS_BITS["zone_bypassed"]),
+)
+_STATE_ATTRIBUTE_MASK = sum(bit for _name, bit in _STATE_ATTRIBUTE_BITS)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -76,10 +107,15 @@ async def async_setup_entry(
         entities.append(
             AlarmDecoderAlarmPanel(
                 client=entry.runtime_data.client,
+                commands=entry.runtime_data.connection.commands,
+                keypad_router=entry.runtime_data.keypad_router,
+                signal_router=entry.runtime_data.signal_router,
                 auto_bypass=arm_options[CONF_AUTO_BYPASS],
                 code_arm_required=arm_options[CONF_CODE_ARM_REQUIRED],
                 address=address,
                 entry_id=entry.entry_id,  # Agregar entry_id
+                tracer=entry.runtime_data.tracer,
+                min_write_interval=runtime_config(entry).min_write_interval,
             )
         )
     async_add_entities(entities)
@@ -90,7 +126,7 @@ async def async_setup_entry(
         {
             vol.Required(ATTR_CODE): cv.string,
         },
-        "alarm_toggle_chime",
+        "async_alarm_toggle_chime",
     )
 
     platform.async_register_entity_service(
@@ -98,7 +134,7 @@ async def async_setup_entry(
         {
             vol.Required(ATTR_KEYPRESS): cv.string,
         },
-        "alarm_keypress",
+        "async_alarm_keypress",
     )
 
 
@@ -113,85 +149,107 @@ class AlarmDecoderAlarmPanel(AlarmDecoderEntity, AlarmControlPanelEntity):
         | AlarmControlPanelEntityFeature.ARM_AWAY
     )
 
-    def __init__(self, client, auto_bypass, code_arm_required, address, entry_id):
+    def __init__(
+        self,
+        client,
+        commands: CommandQueue,
+        keypad_router: MaskRouter,
+        signal_router: KeyedRouter,
+        auto_bypass,
+        code_arm_required,
+        address,
+        entry_id,
+        tracer: Tracer,
+        min_write_interval: float = 0,
+    ):
         """Initialize the alarm panel."""
         super().__init__(client)
+        self._commands = commands
+        self._keypad_router = keypad_router
+        self._signal_router = signal_router
         self._attr_unique_id = f"{client.serial_number}-panel-{address}"
         self._auto_bypass = auto_bypass
         self._attr_code_arm_required = code_arm_required
         self._address = address
         self._entry_id = entry_id
+        self._tracer = tracer
+        self._min_write_interval = min_write_interval
+        self._panic = False
+        self._status: int | None = None
+        self._beeps = 0
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
+        # Solo recibe los mensajes dirigidos a este keypad
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_PANEL_MESSAGE, self._message_callback
-            )
+            self._keypad_router.subscribe(self._address, self._message_callback)
+        )
+        self.async_on_remove(
+            self._signal_router.subscribe(SIGNAL_PANIC, self._panic_callback)
         )
 
-    @staticmethod
-    def extract_keypad_addresses_from_message(message):
-        if message.raw[0] == "[":
-            raw = message.raw[28:58]
-            raw = bin(int(raw, 16))[2:]
-            message_keypads_bin_unsorted = str(raw[8:40])
-            byte0 = (message_keypads_bin_unsorted[0:8])[::-1]
-            byte1 = (message_keypads_bin_unsorted[8:16])[::-1]
-            byte2 = (message_keypads_bin_unsorted[16:24])[::-1]
-            byte3 = (message_keypads_bin_unsorted[24:35])[::-1]
-            message_keypads_bin_sorted = byte0 + byte1 + byte2 + byte3
-            message_target_keypads = []
-            for i in range(len(message_keypads_bin_sorted)):
-                if message_keypads_bin_sorted[i] == "1":
-                    message_target_keypads.append(i)
-            return message_target_keypads
-        return []
-
-    def _message_callback(self, message):
+    @callback
+    def _message_callback(self, envelope: PanelEnvelope):
         """Handle received messages."""
-        keypads = self.extract_keypad_addresses_from_message(message)
-        if self._address not in keypads:
-            return  # Ignorar mensajes que no son para este keypad
-
-        if message.alarm_sounding or message.fire_alarm:
+        status = envelope.status
+        beeps = envelope.beeps
+        previous_state = self._attr_alarm_state
+        if status & STATUS_ALARM:
             self._attr_alarm_state = AlarmControlPanelState.TRIGGERED
-        elif message.armed_away or message.armed_home:
-            if message.beeps > 0 and self._attr_alarm_state in (
+        elif status & STATUS_ARMED:
+            if beeps > 0 and self._attr_alarm_state in (
                 AlarmControlPanelState.DISARMED,
                 AlarmControlPanelState.ARMING,
                 None,
             ):
                 # Exit delay - panel was disarmed, now arming (countdown beeps)
                 self._attr_alarm_state = AlarmControlPanelState.ARMING
-            elif message.beeps > 0 and self._attr_alarm_state in (
+            elif beeps > 0 and self._attr_alarm_state in (
                 AlarmControlPanelState.ARMED_AWAY,
                 AlarmControlPanelState.ARMED_HOME,
                 AlarmControlPanelState.PENDING,
             ):
                 # Entry delay - panel was armed, zone opened (countdown beeps)
                 self._attr_alarm_state = AlarmControlPanelState.PENDING
-            elif message.armed_away:
+            elif status & STATUS_ARMED_AWAY:
                 self._attr_alarm_state = AlarmControlPanelState.ARMED_AWAY
-            elif message.armed_home:
+            elif status & STATUS_ARMED_HOME:
                 self._attr_alarm_state = AlarmControlPanelState.ARMED_HOME
         else:
             self._attr_alarm_state = AlarmControlPanelState.DISARMED
 
+        # Rebuild the attributes only when their status bits changed
+        changed = -1 if self._status is None else self._status ^ status
+        self._status = status
+        if changed & _STATE_ATTRIBUTE_MASK:
+            attributes = {
+                name: bool(status & bit) for name, bit in _STATE_ATTRIBUTE_BITS
+            }
+            attributes["beeps"] = beeps
+            attributes["panic"] = self._panic
+            self._attr_extra_state_attributes = attributes
+        elif beeps != self._beeps:
+            self._attr_extra_state_attributes = {
+                **self._attr_extra_state_attributes,
+                "beeps": beeps,
+            }
+        elif self._attr_alarm_state == previous_state:
+            return
+        self._beeps = beeps
+        # Alarm state changes are written at once, attribute churn (beeps,
+        # backlight, ...) is coalesced
+        self.async_write_coalesced(self._attr_alarm_state != previous_state)
+
+    @callback
+    def _panic_callback(self, status: bool):
+        """Handle a panic event."""
+        self._panic = status
+        # Unset until the first keypad message
         self._attr_extra_state_attributes = {
-            "ac_power": message.ac_power,
-            "alarm_event_occurred": message.alarm_event_occurred,
-            "backlight_on": message.backlight_on,
-            "battery_low": message.battery_low,
-            "beeps": message.beeps,
-            "check_zone": message.check_zone,
-            "chime": message.chime_on,
-            "entry_delay_off": message.entry_delay_off,
-            "programming_mode": message.programming_mode,
-            "ready": message.ready,
-            "zone_bypassed": message.zone_bypassed,
+            **(getattr(self, "_attr_extra_state_attributes", None) or {}),
+            "panic": status,
         }
-        self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+        self.async_write_coalesced(critical=True)
 
     def _get_bypass_zones(self) -> list[int]:
         """Get list of zones marked for bypass."""
@@ -212,12 +270,13 @@ class AlarmDecoderAlarmPanel(AlarmDecoderEntity, AlarmControlPanelEntity):
                         zone_str = entity.unique_id.split("_")[-2]
                         zone_num = int(zone_str)  # Convertir a int para bypass_zones
                         bypass_zones.append(zone_num)
-                        _LOGGER.debug("Zone %s marked for bypass", zone_num)
                     except (ValueError, IndexError):
                         _LOGGER.warning("Could not extract zone number from entity %s", entity_id)
         
-        _LOGGER.debug("Total bypass zones found: %s", sorted(bypass_zones))
-        return sorted(bypass_zones)
+        bypass_zones.sort()
+        if self._tracer.enabled:
+            self._tracer.record(TRACE_BYPASS, self._address, bypass_zones)
+        return bypass_zones
     
     def _build_bypass_string(self, zones: list[int], code: str = "") -> str:
         """Build bypass string for the given zones."""
@@ -236,67 +295,56 @@ class AlarmDecoderAlarmPanel(AlarmDecoderEntity, AlarmControlPanelEntity):
         
         return bypass_string
 
-    def alarm_disarm(self, code: str | None = None) -> None:
+    async def async_alarm_disarm(self, code: str | None = None) -> None:
         """Send disarm command."""
         if code:
-            self._client.send(f"{code!s}1")
+            await self._commands.submit(f"{code!s}1", priority=PRIORITY_DISARM)
 
-    def alarm_arm_away(self, code: str | None = None) -> None:
+    async def async_alarm_arm_away(self, code: str | None = None) -> None:
         """Send arm away command."""
-        # Obtener zonas marcadas para bypass
-        bypass_zones = self._get_bypass_zones()
-        
-        if bypass_zones:
-            _LOGGER.info("Arming away with bypassed zones: %s", bypass_zones)
-            # Enviar comando de bypass: código + 6 + zonas + *
-            bypass_command = self._build_bypass_string(bypass_zones, code or "")
-            _LOGGER.debug("Sending bypass command: '%s'", bypass_command)
-            self._client.send(bypass_command)
-            # Luego enviar comando de armado away
-            self._client.arm_away(
-                code=code,
-                code_arm_required=self._attr_code_arm_required,
-                auto_bypass=self._auto_bypass,
-            )
-        else:
-            _LOGGER.debug("Arming away without bypasses using standard method")
-            self._client.arm_away(
-                code=code,
-                code_arm_required=self._attr_code_arm_required,
-                auto_bypass=self._auto_bypass,
-            )
-
+        await self._async_arm(ARM_AWAY, code)
 
-    def alarm_arm_home(self, code: str | None = None) -> None:
+    async def async_alarm_arm_home(self, code: str | None = None) -> None:
         """Send arm home command."""
+        await self._async_arm(ARM_HOME, code)
+
+    async def _async_arm(self, arm_mode: str, code: str | None) -> None:
+        """Send the bypass string and arm sequence as one queued command."""
         # Obtener zonas marcadas para bypass
         bypass_zones = self._get_bypass_zones()
-        
+        # Enviar comando de bypass: código + 6 + zonas + *
+        bypass_command = self._build_bypass_string(bypass_zones, code or "")
         if bypass_zones:
-            _LOGGER.info("Arming home with bypassed zones: %s", bypass_zones)
-            bypass_command = self._build_bypass_string(bypass_zones, code or "")
-            _LOGGER.debug("Sending bypass command: '%s'", bypass_command)
-            self._client.send(bypass_command)
-            self._client.arm_home(
-                code=code,
-                code_arm_required=self._attr_code_arm_required,
-                auto_bypass=self._auto_bypass,
-            )
-        else:
-            _LOGGER.debug("Arming home without bypasses using standard method")
-            # Armado normal sin bypasses
-            self._client.arm_home(
-                code=code,
-                code_arm_required=self._attr_code_arm_required,
-                auto_bypass=self._auto_bypass,
-            )
+            _LOGGER.info("Arming %s with bypassed zones: %s", arm_mode, bypass_zones)
+        arm_sequence = self._build_arm_sequence(arm_mode, code)
+        await self._commands.submit(
+            bypass_command, arm_sequence, priority=PRIORITY_ARM
+        )
+
+    def _build_arm_sequence(self, arm_mode: str, code: str | None) -> str:
+        """Build the keypresses arming the panel, as AdExt.arm_away/arm_home."""
+        if self._attr_code_arm_required and not code:
+            return ""
+        if self._client.mode == DSC:
+            if self._attr_code_arm_required:
+                return str(code)
+            # DSC function keys: Stay (EOT) or Away (ENQ), held three times
+            return (chr(4) if arm_mode == ARM_HOME else chr(5)) * 3
+
+        # Honeywell: código + 3 (stay) o 2 (away), sin código # + 3 o 2
+        key = "3" if arm_mode == ARM_HOME else "2"
+        # Auto-bypass: código + 6 + # salta las zonas en fallo
+        auto_bypass = f"{code!s}6#" if self._auto_bypass and code else ""
+        if self._attr_code_arm_required:
+            return f"{auto_bypass}{code!s}{key}"
+        return f"{auto_bypass}#{key}"
 
-    def alarm_toggle_chime(self, code=None):
+    async def async_alarm_toggle_chime(self, code=None):
         """Send toggle chime command."""
         if code:
-            self._client.send(f"{code!s}9")
+            await self._commands.submit(f"{code!s}9")
 
-    def alarm_keypress(self, keypress):
+    async def async_alarm_keypress(self, keypress):
         """Send custom keypresses."""
         if keypress:
-            self._client.send(keypress)
+            await self._commands.submit(keypress)
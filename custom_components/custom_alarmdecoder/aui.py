@@ -0,0 +1,383 @@
+"""Requests to the panel's AUI, matched to the !AUI messages answering them."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+import logging
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for an answer before the first round trip was measured,
+# what the panel scan used to sleep after asking for the partition count
+DEFAULT_AUI_TIMEOUT = 3.0
+# Bounds of the timeout learned from the round trips
+MIN_AUI_TIMEOUT = 0.5
+MAX_AUI_TIMEOUT = 10.0
+# Requests sent again after a timeout
+DEFAULT_AUI_RETRIES = 2
+# Zones asked for per partition (standard Honeywell limit)
+SCAN_ZONES = 48
+
+_AUI_PREFIX = "!AUI:"
+_PARTITION_COUNT_MARK = "fefefd"
+_ZONE_DATA_MARK = "fefefeec"
+
+# AUI partition map
+_PARTITION_MAP = {
+    0: '31',  # partition 1
+    1: '32',  # partition 2
+    2: '33',
+    3: '34',
+    4: '35',
+    5: '36',
+    6: '37',
+    7: '38',
+    8: '39',
+}
+
+# Zone type map from AUI
+_ZONE_TYPE_MAP = {
+    '9': 'Supervised Fire',
+    '00': 'Zone Not Used',
+    '1': 'Entry/Exit #1 Burglary',
+    '2': 'Entry/Exit #2 Burglary',
+    '3': 'Perimeter Burglary',
+    '4': 'Interior, Follower',
+    '5': 'Trouble by Day/Alarm by Night',
+    '6': '24-Hour Silent Alarm',
+    '7': '24-Hour Audible Alarm',
+    '8': '24-Hour Auxiliary Alarm',
+    '10': 'Interior With Delay',
+    '12': 'Monitor Zone',
+    '14': 'Carbon Monoxide',
+    '16': 'Fire w/Verify',
+    '20': 'Arm-STAY',
+    '21': 'Arm-AWAY',
+    '22': 'Disarm',
+    '23': 'No Alarm Response',
+    '24': 'Silent Burglary',
+    '27': 'Access Point',
+    '28': 'Main Logic Board (MLB) Supervision',
+    '29': 'Momentary on Exit',
+    '77': 'KeySwitch',
+    '81': 'AAV Monitor Zone',
+    '90': 'Configurable',
+    '91': 'Configurable',
+}
+
+
+def ascii_to_hex(text: str) -> str:
+    """Convert ASCII string to hex."""
+    return ''.join(f'{ord(c):02x}' for c in text)
+
+
+def hex_to_ascii(hex_str: str) -> str:
+    """Convert hex string to ASCII."""
+    result = ''
+    for i in range(0, len(hex_str), 2):
+        result += chr(int(hex_str[i:i+2], 16))
+    return result
+
+
+def dec_to_hex(num: int) -> str:
+    """Convert decimal number to hex string with padding."""
+    if num < 10:
+        return ascii_to_hex(f"00{num}")
+    elif num < 100:
+        return ascii_to_hex(f"0{num}")
+    else:
+        return ascii_to_hex(str(num))
+
+
+def _get_hex_val(value: str, delimiter: str) -> str:
+    """Get hex value after delimiter."""
+    idx = value.find(delimiter)
+    if idx == -1:
+        return ''
+    return value[idx + len(delimiter):]
+
+
+def aui_value(raw: str) -> str | None:
+    """Return the value of an !AUI message, None for other messages."""
+    idx = raw.find(_AUI_PREFIX)
+    if idx == -1:
+        return None
+    return raw[idx + len(_AUI_PREFIX):].strip()
+
+
+def partition_count_command() -> str:
+    """Return the request for the number of partitions."""
+    return '00606b0c4361\r\n'
+
+
+def zone_data_command(partition: int, zone: int) -> str:
+    """Return the request for a zone's programming, partition counts from 0."""
+    partition_hex = _PARTITION_MAP.get(partition, '31')
+    return f'006f620c4549f5{partition_hex}fb4543f5{dec_to_hex(zone)}fb436c\r\n'
+
+
+def parse_partition_count(value: str) -> int | None:
+    """Parse the answer to partition_count_command()."""
+    # Response like: 0c020000000057fefefd3131
+    if not value.startswith('0c') or _PARTITION_COUNT_MARK not in value:
+        return None
+    try:
+        return int(hex_to_ascii(_get_hex_val(value, _PARTITION_COUNT_MARK)))
+    except ValueError:
+        _LOGGER.warning("AUI: Invalid partition count: %s", value)
+        return None
+
+
+def parse_zone_data(value: str) -> dict[str, Any] | None:
+    """Parse the answer to zone_data_command().
+
+    Zones the panel does not use are answered too, with used set to False.
+    """
+    # Response like: 17020000000057fefefeec380037003100534952454e41
+    if _ZONE_DATA_MARK not in value:
+        return None
+    hex_val = _get_hex_val(value, _ZONE_DATA_MARK)
+    if not hex_val:
+        return None
+
+    arr = hex_val.split("00")
+    if len(arr) < 3:
+        return None
+
+    # Handle odd-length first element
+    if arr[0] and len(arr[0]) % 2:
+        arr[0] = hex_val[:len(arr[0])+1]
+        arr[1] = arr[1][1:] if len(arr[1]) > 1 else ''
+
+    try:
+        address = hex_to_ascii(arr[0]) if arr[0] else ''
+        zone_type = hex_to_ascii(arr[1]) if arr[1] else ''
+        zone_device_type = hex_to_ascii(arr[2]) if arr[2] else ''
+        zone_name = hex_to_ascii(arr[3]) if len(arr) > 3 and arr[3] else ''
+    except ValueError:
+        return None
+
+    return {
+        'address': address,
+        'zone_type': zone_type,
+        'zone_device_type': zone_device_type,
+        'zone_name': zone_name,
+        # Only valid zones have a device type >= '1' in ASCII
+        'used': bool(zone_device_type)
+        and int(ascii_to_hex(zone_device_type), 16) >= 0x31,
+    }
+
+
+def zone_matcher(zone: int) -> Callable[[str], dict[str, Any] | None]:
+    """Return a matcher accepting only the answer about zone."""
+
+    def match(value: str) -> dict[str, Any] | None:
+        if (result := parse_zone_data(value)) is None:
+            return None
+        try:
+            return result if int(result['address']) == zone else None
+        except ValueError:
+            return None
+
+    return match
+
+
+class RttEstimator:
+    """Smoothed round trip time and timeout of AUI requests, as TCP does.
+
+    The timeout is the smoothed round trip plus four times its variation,
+    kept between minimum and maximum, and initial until the first sample.
+    """
+
+    __slots__ = ("initial", "maximum", "minimum", "rttvar", "srtt")
+
+    def __init__(
+        self,
+        initial: float = DEFAULT_AUI_TIMEOUT,
+        minimum: float = MIN_AUI_TIMEOUT,
+        maximum: float = MAX_AUI_TIMEOUT,
+    ) -> None:
+        """Initialize an estimator without samples."""
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+
+    @property
+    def timeout(self) -> float:
+        """Return the seconds to wait for the answer to a request."""
+        if self.srtt is None:
+            return self.initial
+        return min(self.maximum, max(self.minimum, self.srtt + 4 * self.rttvar))
+
+    def add(self, sample: float) -> None:
+        """Record the round trip of a request answered at the first try."""
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - sample)
+            self.srtt = 0.875 * self.srtt + 0.125 * sample
+
+
+class AuiEngine:
+    """Send AUI requests one at a time and await the !AUI message answering.
+
+    The panel answers AUI requests with !AUI messages that carry no request
+    id, so each request comes with a matcher: a message it returns a result
+    for answers the request, other messages are ignored. The next request
+    goes out as soon as the previous one was answered.
+
+    A request not answered within the timeout learned from the round trips
+    is sent again up to retries times, each time waiting twice as long. Only
+    round trips of requests answered at the first try are sampled, since a
+    late answer cannot tell which send it answers.
+
+    Runs on the event loop. handle_message() takes the device's AUI
+    messages from any thread. Cancelling the awaiting task cancels the
+    request.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        send: Callable[[str], asyncio.Future],
+        rtt: RttEstimator | None = None,
+    ) -> None:
+        """Initialize an idle engine."""
+        self._loop = loop
+        self._send = send
+        self._lock = asyncio.Lock()
+        self._match: Callable[[str], Any] | None = None
+        self._answer: asyncio.Future | None = None
+        self.rtt = rtt if rtt is not None else RttEstimator()
+        self.requests = 0
+        self.answered = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.ignored = 0
+
+    def handle_message(self, raw: str) -> None:
+        """Match an !AUI message to the pending request, from any thread."""
+        if (value := aui_value(raw)) is not None:
+            self._loop.call_soon_threadsafe(self._resolve, value)
+
+    def fail(self) -> None:
+        """Fail the pending request with ConnectionError, when the device closes."""
+        if self._answer is not None and not self._answer.done():
+            self._answer.set_exception(ConnectionError("Device closed"))
+
+    def stats(self) -> dict[str, float]:
+        """Return the request counters."""
+        return {
+            "requests": self.requests,
+            "answered": self.answered,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "ignored": self.ignored,
+            "srtt_ms": round((self.rtt.srtt or 0.0) * 1000, 1),
+            "timeout_ms": round(self.rtt.timeout * 1000, 1),
+        }
+
+    async def request(
+        self,
+        command: str,
+        match: Callable[[str], Any],
+        retries: int = DEFAULT_AUI_RETRIES,
+    ) -> Any:
+        """Send command and return what match returned for its answer.
+
+        Raises TimeoutError when no try was answered in time and
+        ConnectionError when the device closed.
+        """
+        async with self._lock:
+            self.requests += 1
+            for attempt in range(retries + 1):
+                if attempt:
+                    self.retries += 1
+                timeout = self.rtt.timeout * 2**attempt
+                self._match = match
+                self._answer = answer = self._loop.create_future()
+                try:
+                    # The queue cancels the send when the device closes
+                    sent = self._send(command)
+                    await asyncio.wait([sent])
+                    if sent.cancelled():
+                        raise ConnectionError("AUI request not sent")
+                    started = time.monotonic()
+                    result = await asyncio.wait_for(answer, timeout)
+                except TimeoutError:
+                    continue
+                finally:
+                    self._match = self._answer = None
+                self.answered += 1
+                if not attempt:
+                    self.rtt.add(time.monotonic() - started)
+                return result
+            self.timeouts += 1
+            raise TimeoutError(f"AUI request not answered: {command.strip()}")
+
+    def _resolve(self, value: str) -> None:
+        """Answer the pending request with the value, if it matches."""
+        if self._answer is None or self._answer.done():
+            self.ignored += 1
+            return
+        if (result := self._match(value)) is None:
+            self.ignored += 1
+            return
+        self._answer.set_result(result)
+
+
+async def scan_zones(
+    engine: AuiEngine,
+    zones: Iterable[int] = range(SCAN_ZONES),
+    progress: Callable[[int, int], None] | None = None,
+) -> list[dict[str, Any]]:
+    """Ask the panel for the programming of its zones, return the used ones.
+
+    The partitions are asked for first, one when the panel does not say.
+    progress gets the number of zone requests done and their total after
+    each one. A zone whose request timed out is skipped.
+    """
+    zones = list(zones)
+    try:
+        partitions = await engine.request(
+            partition_count_command(), parse_partition_count
+        )
+    except TimeoutError:
+        partitions = 0
+    if not partitions:
+        partitions = 1
+        _LOGGER.info("AUI Scan: Defaulting to 1 partition")
+    else:
+        _LOGGER.info("AUI Scan: Found %d partitions", partitions)
+
+    found: dict[int, dict[str, Any]] = {}
+    total = partitions * len(zones)
+    done = 0
+    for partition in range(partitions):
+        _LOGGER.info("AUI Scan: Scanning partition %d", partition + 1)
+        for zone in zones:
+            try:
+                result = await engine.request(
+                    zone_data_command(partition, zone), zone_matcher(zone)
+                )
+            except TimeoutError:
+                _LOGGER.debug("AUI Scan: Zone %d not answered", zone)
+                result = None
+            done += 1
+            if progress is not None:
+                progress(done, total)
+            if result is None or not result['used'] or zone in found:
+                continue
+            if not result['zone_name']:
+                result['zone_name'] = f"Zone {result['address']}"
+            found[zone] = result
+            _LOGGER.info(
+                "AUI Scan: Found zone %s - '%s'", result['address'], result['zone_name']
+            )
+    return list(found.values())
@@ -1,14 +1,15 @@
 """Support for AlarmDecoder zone states and diagnostic sensors."""
 
 import logging
+from typing import Any
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
-from . import AlarmDecoderConfigEntry
+from . import AlarmDecoderConfigEntry, runtime_config
 from .const import (
     CONF_RELAY_ADDR,
     CONF_RELAY_CHAN,
@@ -18,26 +19,27 @@ from .const import (
     CONF_ZONE_RFID,
     CONF_ZONE_TYPE,
     DEFAULT_ZONE_OPTIONS,
+    DOMAIN,
     OPTIONS_ZONES,
-    SIGNAL_PANEL_MESSAGE,
-    SIGNAL_REL_MESSAGE,
-    SIGNAL_RFX_MESSAGE,
-    SIGNAL_ZONE_FAULT,
-    SIGNAL_ZONE_RESTORE,
+    PROFILE_FULL,
+    PROFILE_LEAN,
+)
+from .decoder import (
+    ATTR_RF_LOW_BAT,
+    ATTR_RF_SUPERVISED,
+    STATUS_ARMED,
+    STATUS_BATTERY_LOW,
+    STATUS_BITS,
+    STATUS_READY,
+    STATUS_SYSTEM_TEXT,
+    PanelEnvelope,
+    RfStatus,
 )
 from .entity import AlarmDecoderEntity
+from .router import BitRouter, ChangeRouter, KeyedRouter
 
 _LOGGER = logging.getLogger(__name__)
 
-ATTR_RF_BIT0 = "rf_bit0"
-ATTR_RF_LOW_BAT = "rf_low_battery"
-ATTR_RF_SUPERVISED = "rf_supervised"
-ATTR_RF_BIT3 = "rf_bit3"
-ATTR_RF_LOOP3 = "rf_loop3"
-ATTR_RF_LOOP2 = "rf_loop2"
-ATTR_RF_LOOP4 = "rf_loop4"
-ATTR_RF_LOOP1 = "rf_loop1"
-
 PANEL_DIAGNOSTICS = [
     ("ac_power", "AC Power", "power", "mdi:power-plug"),
     ("battery_low", "Battery Low", "battery", "mdi:battery-alert"),
@@ -58,10 +60,17 @@ async def async_setup_entry(
 ) -> None:
     """Set up for AlarmDecoder binary sensors."""
     client = entry.runtime_data.client
+    zone_router = entry.runtime_data.zone_router
+    rfx_router = entry.runtime_data.rfx_router
+    relay_router = entry.runtime_data.relay_router
+    status_router = entry.runtime_data.status_router
     serial = client.serial_number
     zones = entry.options.get(OPTIONS_ZONES, DEFAULT_ZONE_OPTIONS)
+    profile = runtime_config(entry).profile
 
     entities: list[BinarySensorEntity] = []
+    # Unique IDs of the entities the processing profile leaves out
+    skipped: list[str] = []
 
     # Zone sensors
     for zone_num in zones:
@@ -75,6 +84,9 @@ async def async_setup_entry(
         entities.append(
             AlarmDecoderBinarySensor(
                 client,
+                zone_router,
+                rfx_router,
+                relay_router,
                 zone_num,
                 zone_name,
                 zone_type,
@@ -82,14 +94,19 @@ async def async_setup_entry(
                 zone_loop,
                 relay_addr,
                 relay_chan,
+                rf_attributes=profile != PROFILE_LEAN,
             )
         )
 
     # Panel-level diagnostic sensors
     for attr, name, device_class, icon in PANEL_DIAGNOSTICS:
+        if profile == PROFILE_LEAN:
+            skipped.append(f"{serial}-diag-{attr}")
+            continue
         entities.append(
             PanelDiagnosticSensor(
                 client=client,
+                status_router=status_router,
                 unique_id=f"{serial}-diag-{attr}",
                 name=name,
                 attribute=attr,
@@ -103,28 +120,34 @@ async def async_setup_entry(
         zone_rfid = zone_info.get(CONF_ZONE_RFID)
         if not zone_rfid:
             continue
+        if profile != PROFILE_FULL:
+            skipped.append(f"{serial}-zone-{zone_num}-rf-low-battery")
+            skipped.append(f"{serial}-zone-{zone_num}-rf-supervised")
+            continue
         zone_name = zone_info.get(CONF_ZONE_NAME, f"Zone {zone_num}")
         entities.append(
             ZoneRfDiagnosticSensor(
                 client=client,
+                rfx_router=rfx_router,
                 unique_id=f"{serial}-zone-{zone_num}-rf-low-battery",
                 name=f"{zone_name} RF Low Battery",
                 zone_number=int(zone_num),
                 zone_rfid=zone_rfid,
                 device_class="battery",
-                attribute="rf_low_battery",
+                attribute=ATTR_RF_LOW_BAT,
                 icon="mdi:battery-alert",
             )
         )
         entities.append(
             ZoneRfDiagnosticSensor(
                 client=client,
+                rfx_router=rfx_router,
                 unique_id=f"{serial}-zone-{zone_num}-rf-supervised",
                 name=f"{zone_name} RF Supervised",
                 zone_number=int(zone_num),
                 zone_rfid=zone_rfid,
                 device_class=None,
-                attribute="rf_supervised",
+                attribute=ATTR_RF_SUPERVISED,
                 icon="mdi:eye-check",
             )
         )
@@ -133,11 +156,24 @@ async def async_setup_entry(
     entities.append(
         PanelDelaySensor(
             client=client,
+            status_router=status_router,
             unique_id=f"{serial}-diag-panel-delay",
             name="Panel Delay",
+            min_write_interval=runtime_config(entry).min_write_interval,
         )
     )
 
+    # Remove entities left behind by a fuller profile
+    entity_reg = er.async_get(hass)
+    for unique_id in skipped:
+        if entity_id := entity_reg.async_get_entity_id(
+            "binary_sensor", DOMAIN, unique_id
+        ):
+            entity_reg.async_remove(entity_id)
+            _LOGGER.debug(
+                "Removed %s, not used by the %s profile", entity_id, profile
+            )
+
     async_add_entities(entities)
 
 
@@ -149,6 +185,9 @@ class AlarmDecoderBinarySensor(AlarmDecoderEntity, BinarySensorEntity):
     def __init__(
         self,
         client,
+        zone_router: KeyedRouter,
+        rfx_router: KeyedRouter,
+        relay_router: ChangeRouter,
         zone_number,
         zone_name,
         zone_type,
@@ -156,6 +195,7 @@ class AlarmDecoderBinarySensor(AlarmDecoderEntity, BinarySensorEntity):
         zone_loop,
         relay_addr,
         relay_chan,
+        rf_attributes: bool = True,
     ):
         """Initialize the binary_sensor."""
         super().__init__(client)
@@ -164,10 +204,18 @@ class AlarmDecoderBinarySensor(AlarmDecoderEntity, BinarySensorEntity):
         self._zone_type = zone_type
         self._attr_name = zone_name
         self._attr_is_on = False
+        self._zone_router = zone_router
+        self._rfx_router = rfx_router
+        self._relay_router = relay_router
+        self._rf_status: RfStatus | None = None
         self._rfid = zone_rfid
         self._loop = zone_loop
-        self._relay_addr = relay_addr
-        self._relay_chan = relay_chan
+        self._rf_attributes = rf_attributes
+        self._relay_key = (
+            (relay_addr, relay_chan)
+            if relay_addr is not None and relay_chan is not None
+            else None
+        )
         self._attr_device_class = zone_type
         self._attr_extra_state_attributes = {
             CONF_ZONE_NUMBER: self._zone_number,
@@ -175,90 +223,75 @@ class AlarmDecoderBinarySensor(AlarmDecoderEntity, BinarySensorEntity):
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
-        self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_ZONE_FAULT, self._fault_callback)
-        )
-
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_ZONE_RESTORE, self._restore_callback
+        # Zones with RFID and loop use the RFX loop instead of KPM faults
+        if not (self._rfid and self._loop):
+            self.async_on_remove(
+                self._zone_router.subscribe(self._zone_number, self._zone_callback)
             )
-        )
 
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_RFX_MESSAGE, self._rfx_message_callback
+        # Without RF attributes an RFID zone only listens for its loop
+        if self._rfid and (self._loop or self._rf_attributes):
+            self.async_on_remove(
+                self._rfx_router.subscribe(self._rfid, self._rfx_message_callback)
             )
-        )
 
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_REL_MESSAGE, self._rel_message_callback
+        if self._relay_key is not None:
+            self.async_on_remove(
+                self._relay_router.subscribe(
+                    self._relay_key, self._rel_message_callback
+                )
             )
-        )
-
-    def _fault_callback(self, zone):
-        """Update the zone's state, if needed."""
-        if zone is None or int(zone) == self._zone_number:
-            # Skip KPM fault if zone has RFID - use RFX loop instead
-            if self._rfid and self._loop:
-                return
-            self._attr_is_on = True
-            self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
-
-    def _restore_callback(self, zone):
-        """Update the zone's state, if needed."""
-        if zone is None or int(zone) == self._zone_number:
-            # Skip KPM restore if zone has RFID - use RFX loop instead
-            if self._rfid and self._loop:
-                return
-            self._attr_is_on = False
-            self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
 
-    def _rfx_message_callback(self, message):
+    @callback
+    def _set_is_on(self, is_on: bool) -> None:
+        """Set the state from a fault or RF loop, outdating the relay's value."""
+        if is_on != self._attr_is_on and self._relay_key is not None:
+            # A relay message repeating its last value must apply again
+            self._relay_router.invalidate(self._relay_key)
+        self._attr_is_on = is_on
+
+    @callback
+    def _zone_callback(self, faulted: bool) -> None:
+        """Update the zone's state from a routed fault or restore."""
+        self._set_is_on(faulted)
+        self.async_write_ha_state()
+
+    @callback
+    def _rfx_message_callback(self, status: RfStatus):
         """Update RF state from RFX message using loop for open/close detection."""
-        if not self._rfid or not message or message.serial_number != self._rfid:
-            return
-
-        rfstate = message.value
-        if rfstate is None:
+        # Repeated packets share the same decoded status
+        if status is self._rf_status:
             return
+        self._rf_status = status
 
         # Use loop value for open/close detection
+        is_on = self._attr_is_on
         if self._loop:
             loop_idx = int(self._loop) - 1
-            if 0 <= loop_idx < len(message.loop):
-                new_state = bool(message.loop[loop_idx])
-                if self._attr_is_on != new_state:
-                    self._attr_is_on = new_state
+            if 0 <= loop_idx < len(status.loops):
+                is_on = status.loops[loop_idx]
+
+        if not self._rf_attributes:
+            # Lean profile: only the loop state is published
+            if is_on == self._attr_is_on:
+                return
+            self._set_is_on(is_on)
+            self.async_write_ha_state()
+            return
 
+        self._set_is_on(is_on)
         # Update RF attributes
-        attr = {CONF_ZONE_NUMBER: self._zone_number}
-        if rfstate is not None:
-            attr[ATTR_RF_BIT0] = bool(rfstate & 0x01)
-            attr[ATTR_RF_LOW_BAT] = bool(rfstate & 0x02)
-            attr[ATTR_RF_SUPERVISED] = bool(rfstate & 0x04)
-            attr[ATTR_RF_BIT3] = bool(rfstate & 0x08)
-            attr[ATTR_RF_LOOP3] = bool(rfstate & 0x10)
-            attr[ATTR_RF_LOOP2] = bool(rfstate & 0x20)
-            attr[ATTR_RF_LOOP4] = bool(rfstate & 0x40)
-            attr[ATTR_RF_LOOP1] = bool(rfstate & 0x80)
-        self._attr_extra_state_attributes = attr
-        self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+        self._attr_extra_state_attributes = {
+            CONF_ZONE_NUMBER: self._zone_number,
+            **status.attributes,
+        }
+        self.async_write_ha_state()
 
+    @callback
     def _rel_message_callback(self, message):
         """Update relay / expander state."""
-
-        if self._relay_addr == message.address and self._relay_chan == message.channel:
-            _LOGGER.debug(
-                "%s %d:%d value:%d",
-                "Relay" if message.type == message.RELAY else "ZoneExpander",
-                message.address,
-                message.channel,
-                message.value,
-            )
-            self._attr_is_on = bool(message.value)
-            self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+        self._attr_is_on = bool(message.value)
+        self.async_write_ha_state()
 
 
 class PanelDiagnosticSensor(AlarmDecoderEntity, BinarySensorEntity):
@@ -270,6 +303,7 @@ class PanelDiagnosticSensor(AlarmDecoderEntity, BinarySensorEntity):
     def __init__(
         self,
         client,
+        status_router: BitRouter,
         unique_id: str,
         name: str,
         attribute: str,
@@ -282,30 +316,30 @@ class PanelDiagnosticSensor(AlarmDecoderEntity, BinarySensorEntity):
         self._attr_name = name
         self._attr_device_class = device_class
         self._attr_icon = icon
+        self._status_router = status_router
         self._attribute = attribute
+        self._bit = STATUS_BITS[attribute]
 
     async def async_added_to_hass(self) -> None:
-        """Register callback for panel messages."""
+        """Register callback for changes of the status bit."""
+        bits = self._bit
+        if bits == STATUS_BATTERY_LOW:
+            # Re-evaluated when the display switches to a panel status text
+            bits |= STATUS_SYSTEM_TEXT
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_PANEL_MESSAGE, self._message_callback
-            )
+            self._status_router.subscribe(bits, self._message_callback)
         )
 
-    def _message_callback(self, message) -> None:
+    @callback
+    def _message_callback(self, envelope: PanelEnvelope, changed: int) -> None:
         """Update state from panel message."""
-        if not hasattr(message, "raw") or not message.raw or message.raw[0] != "[":
-            return
         # battery_low only updates from panel status messages
-        if self._attribute == "battery_low":
-            if not message.text or "**" not in message.text:
-                return
-        new_state = getattr(message, self._attribute, None)
-        if new_state is None:
+        if self._bit == STATUS_BATTERY_LOW and not envelope.status & STATUS_SYSTEM_TEXT:
             return
+        new_state = bool(envelope.status & self._bit)
         if self._attr_is_on != new_state:
             self._attr_is_on = new_state
-            self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+            self.async_write_ha_state()
 
 
 class ZoneRfDiagnosticSensor(AlarmDecoderEntity, BinarySensorEntity):
@@ -317,6 +351,7 @@ class ZoneRfDiagnosticSensor(AlarmDecoderEntity, BinarySensorEntity):
     def __init__(
         self,
         client,
+        rfx_router: KeyedRouter,
         unique_id: str,
         name: str,
         zone_number: int,
@@ -332,36 +367,23 @@ class ZoneRfDiagnosticSensor(AlarmDecoderEntity, BinarySensorEntity):
         self._attr_device_class = device_class
         self._attr_icon = icon
         self._zone_number = zone_number
+        self._rfx_router = rfx_router
         self._rfid = zone_rfid
         self._attribute = attribute
 
     async def async_added_to_hass(self) -> None:
         """Register callback for RFX messages."""
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_RFX_MESSAGE, self._rfx_message_callback
-            )
+            self._rfx_router.subscribe(self._rfid, self._rfx_message_callback)
         )
 
-    def _rfx_message_callback(self, message) -> None:
+    @callback
+    def _rfx_message_callback(self, status: RfStatus) -> None:
         """Update state from RF message."""
-        if not message or message.serial_number != self._rfid:
-            return
-
-        rfstate = message.value
-        if rfstate is None:
-            return
-
-        if self._attribute == "rf_low_battery":
-            new_state = bool(rfstate & 0x02)
-        elif self._attribute == "rf_supervised":
-            new_state = bool(rfstate & 0x04)
-        else:
-            return
-
+        new_state = status.attributes[self._attribute]
         if self._attr_is_on != new_state:
             self._attr_is_on = new_state
-            self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+            self.async_write_ha_state()
 
 
 class PanelDelaySensor(AlarmDecoderEntity, BinarySensorEntity):
@@ -377,28 +399,38 @@ class PanelDelaySensor(AlarmDecoderEntity, BinarySensorEntity):
     _attr_device_class = "safety"
     _attr_icon = "mdi:timer-sand"
 
-    def __init__(self, client, unique_id: str, name: str) -> None:
+    def __init__(
+        self,
+        client,
+        status_router: BitRouter,
+        unique_id: str,
+        name: str,
+        min_write_interval: float = 0,
+    ) -> None:
         """Initialize the delay sensor."""
         super().__init__(client)
+        self._status_router = status_router
         self._attr_unique_id = unique_id
         self._attr_name = name
+        self._min_write_interval = min_write_interval
         self._armed = False
         self._ready = True
+        self._delay_attributes: dict[str, Any] = {}
 
     async def async_added_to_hass(self) -> None:
-        """Register callback for panel messages."""
+        """Register callback for changes of the armed and ready bits."""
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_PANEL_MESSAGE, self._message_callback
+            self._status_router.subscribe(
+                STATUS_ARMED | STATUS_READY, self._message_callback
             )
         )
 
-    def _message_callback(self, message) -> None:
+    @callback
+    def _message_callback(self, envelope: PanelEnvelope, changed: int) -> None:
         """Update delay state from panel message."""
-        if not hasattr(message, "raw") or not message.raw or message.raw[0] != "[":
-            return
-        self._armed = message.armed_away or message.armed_home
-        self._ready = message.ready
+        was_armed = self._armed
+        self._armed = bool(envelope.status & STATUS_ARMED)
+        self._ready = bool(envelope.status & STATUS_READY)
 
         # Exit delay: ready=True but not yet armed (user is entering code)
         # Entry delay: armed but ready=False (zone opened while armed)
@@ -419,7 +451,9 @@ class PanelDelaySensor(AlarmDecoderEntity, BinarySensorEntity):
             "ready": self._ready,
         }
 
-        if self._attr_is_on != in_delay or self._attr_extra_state_attributes != attrs:
+        if self._attr_is_on != in_delay or self._delay_attributes != attrs:
             self._attr_is_on = in_delay
+            self._delay_attributes = attrs
             self._attr_extra_state_attributes = attrs
-            self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+            # Arming and disarming are written at once
+            self.async_write_coalesced(self._armed != was_armed)
@@ -0,0 +1,70 @@
+"""Coalescing of entity state writes."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+
+class WriteCoalescer:
+    """Limit how often an entity writes its state.
+
+    A write requested at least min_interval after the previous one happens
+    immediately. Writes requested sooner are merged into a single trailing
+    write at the end of the interval, so the last state is always written.
+    Critical writes skip the interval and replace any pending trailing write.
+    """
+
+    __slots__ = ("_handle", "_interval", "_last", "_loop", "_write", "coalesced")
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        write: Callable[[], None],
+        min_interval: float,
+    ) -> None:
+        """Initialize the coalescer, a min_interval of 0 writes every time."""
+        self._loop = loop
+        self._write = write
+        self._interval = min_interval
+        self._last: float | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self.coalesced = 0
+
+    def request(self, critical: bool = False) -> None:
+        """Request a state write."""
+        if self._handle is not None:
+            # Merged into the pending write, or into this critical one
+            self.coalesced += 1
+            if not critical:
+                return
+            self._handle.cancel()
+            self._handle = None
+
+        now = self._loop.time()
+        if (
+            critical
+            or self._last is None
+            or now - self._last >= self._interval
+        ):
+            self._flush(now)
+            return
+        self._handle = self._loop.call_later(
+            self._last + self._interval - now, self._trailing_write
+        )
+
+    def cancel(self) -> None:
+        """Drop the pending trailing write."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _trailing_write(self) -> None:
+        """Write the state merged during the interval."""
+        self._handle = None
+        self._flush(self._loop.time())
+
+    def _flush(self, now: float) -> None:
+        """Write the state now."""
+        self._last = now
+        self._write()
@@ -0,0 +1,190 @@
+"""Ordered, paced sending of keypad commands to an AlarmDecoder device."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import heapq
+import logging
+import time
+
+from .const import DEFAULT_COMMAND_INTERVAL
+from .handoff import LatencyStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for the device's !Sending...done before moving on
+DEFAULT_ACK_TIMEOUT = 3.0
+
+# Lower runs first, equal priorities keep their order
+PRIORITY_DISARM = 0
+PRIORITY_ARM = 1
+PRIORITY_KEYPRESS = 2
+PRIORITY_AUI = 3
+
+
+class Command:
+    """Keypad strings sent back to back, with the future of their outcome."""
+
+    __slots__ = ("ack", "future", "parts", "submitted")
+
+    def __init__(
+        self,
+        parts: tuple[str, ...],
+        ack: bool,
+        future: asyncio.Future[bool | None],
+        submitted: float,
+    ) -> None:
+        """Initialize the command."""
+        self.parts = parts
+        self.ack = ack
+        self.future = future
+        self.submitted = submitted
+
+
+class CommandQueue:
+    """Send commands one at a time, by priority, paced for the panel.
+
+    Each part of a command is written and then acknowledged by the device's
+    on_sending_received event before the next one goes out, interval
+    seconds later. The parts of one command are never interleaved with
+    another command, so a bypass string stays right before its arm
+    sequence. A disarm still waiting jumps ahead of queued arming, keypress
+    and AUI commands.
+
+    The future of a command resolves to True when every part was sent,
+    False when the device reported a failed send and None when an
+    acknowledgement timed out. Commands submitted with ack=False, such as
+    AUI requests answered by !AUI messages instead, resolve once written.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        send: Callable[[str], Awaitable[None]],
+        interval: float = DEFAULT_COMMAND_INTERVAL,
+        ack_timeout: float = DEFAULT_ACK_TIMEOUT,
+    ) -> None:
+        """Initialize an empty queue."""
+        self._loop = loop
+        self._send = send
+        self._queue: list[tuple[int, int, Command]] = []
+        self._seq = 0
+        self._ack: asyncio.Future[bool] | None = None
+        self._worker: asyncio.Task | None = None
+        self._next_send = 0.0
+        self.interval = interval
+        self.ack_timeout = ack_timeout
+        self.in_flight = 0
+        self.high_water = 0
+        self.sent = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.latency = LatencyStats()
+
+    @property
+    def depth(self) -> int:
+        """Return the number of commands waiting or being sent."""
+        return len(self._queue) + self.in_flight
+
+    def submit(
+        self, *parts: str, priority: int = PRIORITY_KEYPRESS, ack: bool = True
+    ) -> asyncio.Future[bool | None]:
+        """Queue keypad strings to send back to back, from the event loop."""
+        future: asyncio.Future[bool | None] = self._loop.create_future()
+        parts = tuple(part for part in parts if part)
+        if not parts:
+            future.set_result(True)
+            return future
+        self._seq += 1
+        heapq.heappush(
+            self._queue,
+            (priority, self._seq, Command(parts, ack, future, time.monotonic())),
+        )
+        self.high_water = max(self.high_water, self.depth)
+        if self._worker is None:
+            self._worker = self._loop.create_task(self._run())
+        return future
+
+    def handle_ack(self, sender, status=None, message=None) -> None:
+        """Resolve the part waiting for !Sending...done, from any thread."""
+        self._loop.call_soon_threadsafe(self._resolve_ack, bool(status))
+
+    def cancel(self) -> None:
+        """Drop the queued commands, when the device closes."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self.in_flight = 0
+        while self._queue:
+            heapq.heappop(self._queue)[2].future.cancel()
+
+    def stats(self) -> dict[str, float]:
+        """Return the queue counters."""
+        return {
+            "depth": self.depth,
+            "high_water": self.high_water,
+            "sent": self.sent,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "latency_mean_ms": round(self.latency.mean * 1000, 1),
+            "latency_max_ms": round(self.latency.max * 1000, 1),
+        }
+
+    def _resolve_ack(self, status: bool) -> None:
+        """Resolve the ack waiter, ignoring acks nobody waits for."""
+        if self._ack is not None and not self._ack.done():
+            self._ack.set_result(status)
+
+    async def _run(self) -> None:
+        """Send the queued commands until the queue is empty."""
+        try:
+            while self._queue:
+                command = heapq.heappop(self._queue)[2]
+                self.in_flight = 1
+                try:
+                    result = await self._send_command(command)
+                except asyncio.CancelledError:
+                    command.future.cancel()
+                    raise
+                except Exception as err:  # noqa: BLE001
+                    self.failed += 1
+                    if not command.future.done():
+                        command.future.set_exception(err)
+                else:
+                    if not command.future.done():
+                        command.future.set_result(result)
+                finally:
+                    self.in_flight = 0
+                self.latency.add(time.monotonic() - command.submitted)
+        finally:
+            if self._worker is asyncio.current_task():
+                self._worker = None
+
+    async def _send_command(self, command: Command) -> bool | None:
+        """Send the parts of a command, paced and acknowledged."""
+        result: bool | None = True
+        for part in command.parts:
+            if (wait := self._next_send - time.monotonic()) > 0:
+                await asyncio.sleep(wait)
+            self._ack = self._loop.create_future() if command.ack else None
+            try:
+                await self._send(part)
+                self.sent += 1
+                if self._ack is not None:
+                    try:
+                        if not await asyncio.wait_for(self._ack, self.ack_timeout):
+                            self.failed += 1
+                            _LOGGER.warning("AlarmDecoder reported a failed send")
+                            result = False
+                    except TimeoutError:
+                        self.timeouts += 1
+                        _LOGGER.debug(
+                            "No send acknowledgement within %ss", self.ack_timeout
+                        )
+                        if result:
+                            result = None
+            finally:
+                self._ack = None
+                self._next_send = time.monotonic() + self.interval
+        return result
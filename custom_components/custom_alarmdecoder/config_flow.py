@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import logging
+import os
 from typing import Any
 
 from adext import AdExt
@@ -21,18 +22,31 @@ from homeassistant.config_entries import (
 )
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_PROTOCOL
 from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv
 
+from .connection import ConnectionManager
 from .const import (
     CONF_AUTO_BYPASS,
     CONF_AUTO_DETECT_ZONES,
+    CONF_BYPASSABLE,
     CONF_CODE_ARM_REQUIRED,
+    CONF_COMMAND_INTERVAL,
+    CONF_DEDUP_WINDOW,
     CONF_DEVICE_BAUD,
     CONF_DEVICE_PATH,
     CONF_ENTRY_DELAY,
+    CONF_FANOUT_HOST,
+    CONF_FANOUT_PORT,
     CONF_KEYPADS,
+    CONF_MANAGE_DEVICE_CONFIG,
+    CONF_MIN_WRITE_INTERVAL,
+    CONF_PROCESSING_PROFILE,
     CONF_RELAY_ADDR,
     CONF_RELAY_CHAN,
     CONF_SCAN_PANEL,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_TRACE_SIGNALS,
+    CONF_TRANSPORT,
     CONF_ZONE_LOOP,
     CONF_ZONE_NAME,
     CONF_ZONE_NUMBER,
@@ -40,28 +54,45 @@ from .const import (
     CONF_ZONE_TYPE,
     DEFAULT_ARM_OPTIONS,
     DEFAULT_AUTO_DETECT_ZONES,
+    DEFAULT_COMMAND_INTERVAL,
+    DEFAULT_DEDUP_WINDOW,
     DEFAULT_DEVICE_BAUD,
     DEFAULT_DEVICE_HOST,
     DEFAULT_DEVICE_PATH,
     DEFAULT_DEVICE_PORT,
     DEFAULT_ENTRY_DELAY,
+    DEFAULT_FANOUT_HOST,
+    DEFAULT_FANOUT_PORT,
+    DEFAULT_MANAGE_DEVICE_CONFIG,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    DEFAULT_PROCESSING_PROFILE,
     DEFAULT_SCAN_PANEL,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    DEFAULT_TRANSPORT,
     DEFAULT_ZONE_OPTIONS,
     DEFAULT_ZONE_TYPE,
     DOMAIN,
     OPTIONS_ARM,
     OPTIONS_KEYPADS,
     OPTIONS_ZONES,
+    PROFILES,
     PROTOCOL_SERIAL,
     PROTOCOL_SOCKET,
-    CONF_BYPASSABLE,
+    TRACE_SIGNALS,
+    TRANSPORT_ASYNCIO,
+    TRANSPORTS,
 )
+from .probe import ProbeResult, candidate_ports, probe_ports
+from .transport import serial_device, socket_device
 
 EDIT_KEY = "edit_selection"
 EDIT_KEYPADS = "Keypads"
 EDIT_SETTINGS = "Arming Settings"
 EDIT_ZONES = "Zones"
 
+# Serial detection choice falling back to the manual form
+MANUAL_PATH = "manual"
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -73,6 +104,8 @@ class AlarmDecoderFlowHandler(ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         """Initialize AlarmDecoder ConfigFlow."""
         self.protocol = None
+        # Path -> serial port found by async_step_serial_detect
+        self._detected: dict[str, ProbeResult] = {}
         self._connection_data = {}
         self._title = None
 
@@ -90,6 +123,8 @@ class AlarmDecoderFlowHandler(ConfigFlow, domain=DOMAIN):
         """Handle a flow initialized by the user."""
         if user_input is not None:
             self.protocol = user_input[CONF_PROTOCOL]
+            if self.protocol == PROTOCOL_SERIAL:
+                return await self.async_step_serial_detect()
             return await self.async_step_protocol()
 
         return self.async_show_form(
@@ -103,6 +138,12 @@ class AlarmDecoderFlowHandler(ConfigFlow, domain=DOMAIN):
             ),
         )
 
+    def _connection_manager(self) -> ConnectionManager:
+        """Return the shared connections, even before the integration is set up."""
+        if (manager := self.hass.data.get(DOMAIN)) is None:
+            manager = self.hass.data[DOMAIN] = ConnectionManager(self.hass.loop)
+        return manager
+
     async def async_step_keypads(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -130,6 +171,52 @@ class AlarmDecoderFlowHandler(ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_serial_detect(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Offer the serial ports that answered like an AlarmDecoder."""
+        if user_input is not None:
+            if (found := self._detected.get(user_input[CONF_DEVICE_PATH])) is None:
+                return await self.async_step_protocol()
+            return await self.async_step_protocol(
+                {
+                    CONF_DEVICE_PATH: found.path,
+                    CONF_DEVICE_BAUD: found.baudrate,
+                    CONF_TRANSPORT: user_input[CONF_TRANSPORT],
+                }
+            )
+
+        in_use = [
+            entry.data[CONF_DEVICE_PATH]
+            for entry in self._async_current_entries()
+            if CONF_DEVICE_PATH in entry.data
+        ]
+        paths = await self.hass.async_add_executor_job(_free_serial_ports, in_use)
+        found_ports = await probe_ports(paths)
+        if not found_ports:
+            return await self.async_step_protocol()
+        self._detected = {found.path: found for found in found_ports}
+
+        return self.async_show_form(
+            step_id="serial_detect",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_DEVICE_PATH, default=found_ports[0].path
+                    ): vol.In(
+                        {
+                            **{found.path: found.label for found in found_ports},
+                            MANUAL_PATH: MANUAL_PATH,
+                        }
+                    ),
+                    vol.Required(CONF_TRANSPORT, default=DEFAULT_TRANSPORT): vol.In(
+                        TRANSPORTS
+                    ),
+                }
+            ),
+            description_placeholders={"count": str(len(found_ports))},
+        )
+
     async def async_step_protocol(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -140,27 +227,45 @@ class AlarmDecoderFlowHandler(ConfigFlow, domain=DOMAIN):
                 self._async_current_entries(), user_input, self.protocol
             ):
                 return self.async_abort(reason="already_configured")
-            connection = {}
+            connection = {CONF_TRANSPORT: user_input[CONF_TRANSPORT]}
+            use_asyncio = connection[CONF_TRANSPORT] == TRANSPORT_ASYNCIO
             baud = None
             if self.protocol == PROTOCOL_SOCKET:
                 host = connection[CONF_HOST] = user_input[CONF_HOST]
                 port = connection[CONF_PORT] = user_input[CONF_PORT]
                 title = f"{host}:{port}"
-                device = SocketDevice(interface=(host, port))
+                key = (self.protocol, host, port)
+                if use_asyncio:
+                    device = socket_device(host, port)
+                else:
+                    device = SocketDevice(interface=(host, port))
             if self.protocol == PROTOCOL_SERIAL:
                 path = connection[CONF_DEVICE_PATH] = user_input[CONF_DEVICE_PATH]
                 baud = connection[CONF_DEVICE_BAUD] = user_input[CONF_DEVICE_BAUD]
                 title = path
-                device = SerialDevice(interface=path)
+                key = (self.protocol, path)
+                if use_asyncio:
+                    device = serial_device(path, baud)
+                else:
+                    device = SerialDevice(interface=path)
 
             controller = AdExt(device)
 
-            def test_connection():
-                controller.open(baud)
-                controller.close()
-
             try:
-                await self.hass.async_add_executor_job(test_connection)
+                if use_asyncio:
+                    # Opened the way the entry's setup opens it
+                    await device.async_connect()
+                    controller.open(baud)
+                else:
+                    await self.hass.async_add_executor_job(controller.open, baud)
+
+                async def close_device() -> None:
+                    await self.hass.async_add_executor_job(controller.close)
+
+                # The entry's setup takes over the open device
+                self._connection_manager().park(
+                    key, (controller, device), close_device
+                )
 
                 self._connection_data = {CONF_PROTOCOL: self.protocol, **connection}
                 self._title = title
@@ -177,6 +282,9 @@ class AlarmDecoderFlowHandler(ConfigFlow, domain=DOMAIN):
                 {
                     vol.Required(CONF_HOST, default=DEFAULT_DEVICE_HOST): str,
                     vol.Required(CONF_PORT, default=DEFAULT_DEVICE_PORT): int,
+                    vol.Required(CONF_TRANSPORT, default=DEFAULT_TRANSPORT): vol.In(
+                        TRANSPORTS
+                    ),
                 }
             )
         if self.protocol == PROTOCOL_SERIAL:
@@ -184,6 +292,9 @@ class AlarmDecoderFlowHandler(ConfigFlow, domain=DOMAIN):
                 {
                     vol.Required(CONF_DEVICE_PATH, default=DEFAULT_DEVICE_PATH): str,
                     vol.Required(CONF_DEVICE_BAUD, default=DEFAULT_DEVICE_BAUD): int,
+                    vol.Required(CONF_TRANSPORT, default=DEFAULT_TRANSPORT): vol.In(
+                        TRANSPORTS
+                    ),
                 }
             )
 
@@ -209,6 +320,13 @@ class AlarmDecoderOptionsFlowHandler(OptionsFlow):
         self.keypad_options = config_entry.options.get(
             OPTIONS_KEYPADS, config_entry.data.get(CONF_KEYPADS, [])
         )
+        # Configuration the device reported, when the entry is loaded
+        runtime_data = getattr(config_entry, "runtime_data", None)
+        self.device_config = (
+            runtime_data.connection.device_config.current
+            if runtime_data is not None
+            else None
+        )
 
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
@@ -309,12 +427,69 @@ class AlarmDecoderOptionsFlowHandler(OptionsFlow):
                             CONF_SCAN_PANEL, DEFAULT_SCAN_PANEL
                         ),
                     ): bool,
+                    vol.Optional(
+                        CONF_DEDUP_WINDOW,
+                        default=self.arm_options.get(
+                            CONF_DEDUP_WINDOW, DEFAULT_DEDUP_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    vol.Optional(
+                        CONF_MIN_WRITE_INTERVAL,
+                        default=self.arm_options.get(
+                            CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+                    vol.Optional(
+                        CONF_COMMAND_INTERVAL,
+                        default=self.arm_options.get(
+                            CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+                    vol.Optional(
+                        CONF_FANOUT_HOST,
+                        default=self.arm_options.get(
+                            CONF_FANOUT_HOST, DEFAULT_FANOUT_HOST
+                        ),
+                    ): str,
+                    vol.Optional(
+                        CONF_FANOUT_PORT,
+                        default=self.arm_options.get(
+                            CONF_FANOUT_PORT, DEFAULT_FANOUT_PORT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+                    vol.Optional(
+                        CONF_MANAGE_DEVICE_CONFIG,
+                        default=self.arm_options.get(
+                            CONF_MANAGE_DEVICE_CONFIG, DEFAULT_MANAGE_DEVICE_CONFIG
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_PROCESSING_PROFILE,
+                        default=self.arm_options.get(
+                            CONF_PROCESSING_PROFILE, DEFAULT_PROCESSING_PROFILE
+                        ),
+                    ): vol.In(PROFILES),
+                    vol.Optional(
+                        CONF_TRACE_SAMPLE_RATE,
+                        default=self.arm_options.get(
+                            CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+                    vol.Optional(
+                        CONF_TRACE_SIGNALS,
+                        default=self.arm_options.get(CONF_TRACE_SIGNALS, []),
+                    ): cv.multi_select(TRACE_SIGNALS),
                     vol.Optional(
                         "alarm_code",
                         default=self.arm_options.get("alarm_code", ""),
                     ): str,
                 },
             ),
+            description_placeholders={
+                "device_config": self.device_config.summary()
+                if self.device_config is not None
+                else "not read yet"
+            },
         )
 
     async def async_step_zone_select(
@@ -466,6 +641,12 @@ def _fix_input_types(zone_input: dict[str, Any]) -> dict[str, Any]:
     return zone_input
 
 
+def _free_serial_ports(in_use: list[str]) -> list[str]:
+    """Return the serial ports to probe, leaving out the configured devices."""
+    used = {os.path.realpath(path) for path in in_use}
+    return [path for path in candidate_ports() if os.path.realpath(path) not in used]
+
+
 def _device_already_added(
     current_entries: list[ConfigEntry], user_input: dict[str, Any], protocol: str | None
 ) -> bool:
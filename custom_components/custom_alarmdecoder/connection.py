@@ -0,0 +1,561 @@
+"""AlarmDecoder connections shared by config entries and kept across reloads."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Coroutine, Hashable
+import logging
+import random
+import threading
+import time
+from typing import Any
+
+from .commands import PRIORITY_AUI, PRIORITY_KEYPRESS, CommandQueue
+from .device_config import DeviceConfigSync
+from .fanout import FanoutServer
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds an unused connection stays open, long enough for a reload
+DEFAULT_LINGER = 10.0
+# Seconds without a line before the link is considered dead. Keypad
+# updates normally arrive every few seconds
+DEFAULT_SILENCE_TIMEOUT = 60.0
+# Seconds a device opened by the config flow waits for its entry's setup
+DEFAULT_PARK_TIMEOUT = 120.0
+
+# Event name -> handler, attached to the controller for one config entry
+Handlers = dict[str, Callable[..., Any]]
+
+
+class Backoff:
+    """Reconnect delays growing exponentially, with jitter.
+
+    The first retry is fast, most losses are a ser2sock restart or a
+    dropped TCP connection. Later delays double up to cap and are spread
+    over their upper half, so devices lost together do not retry in step.
+    """
+
+    __slots__ = ("_base", "_cap", "_first", "_random", "attempts")
+
+    def __init__(
+        self,
+        first: float = 0.5,
+        base: float = 2.0,
+        cap: float = 300.0,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        """Initialize before the first retry."""
+        self._first = first
+        self._base = base
+        self._cap = cap
+        self._random = rand
+        self.attempts = 0
+
+    def next(self) -> float:
+        """Return the delay before the next retry."""
+        attempt = self.attempts
+        self.attempts += 1
+        if attempt == 0:
+            return self._first
+        delay = min(self._cap, self._base * 2 ** (attempt - 1))
+        return delay / 2 * (1 + self._random())
+
+    def reset(self) -> None:
+        """Start over after a successful connection."""
+        self.attempts = 0
+
+
+class LinkState:
+    """Availability of a device, shared by all the entities using it.
+
+    Entities read available instead of tracking the connection each, and
+    subscribe once to write their state when it flips.
+    """
+
+    __slots__ = ("_listeners", "available")
+
+    def __init__(self) -> None:
+        """Initialize a link that is down."""
+        self._listeners: tuple[Callable[[], None], ...] = ()
+        self.available = False
+
+    def subscribe(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call listener when the availability changes, return an unsubscribe."""
+        self._listeners = (*self._listeners, listener)
+
+        def _unsubscribe() -> None:
+            self._listeners = tuple(
+                other for other in self._listeners if other is not listener
+            )
+
+        return _unsubscribe
+
+    def set(self, available: bool) -> None:
+        """Update the availability, notifying listeners on change."""
+        if available == self.available:
+            return
+        self.available = available
+        for listener in self._listeners:
+            listener()
+
+
+class SharedConnection:
+    """One physical AlarmDecoder device and the config entries using it.
+
+    The controller is opened by the first subscriber and reopened after an
+    unexpected loss of connection. Each subscriber attaches its own event
+    handlers and detaches them on release, without touching the device.
+
+    A half-open TCP connection never reports a close, so a watchdog also
+    reconnects when no line was read for silence_timeout seconds. Retries
+    follow the backoff and link tells the entities whether the device is
+    reachable.
+
+    Keypad commands go through the commands queue, acknowledged by the
+    controller's on_sending_received event. Commands still queued when the
+    link goes down are cancelled rather than sent late.
+
+    The device's filtering settings are kept in line with the subscribers
+    by device_config. Since a deduplicating device can stay quiet for a
+    long time, the watchdog asks for the version halfway through the
+    timeout, and only reconnects when that is not answered either.
+
+    With async_serve(), the raw lines are also rebroadcast to ser2sock
+    clients whose writes go through the same queue.
+
+    The command interval and fan-out address come from async_configure()
+    for each subscriber, merged across the subscribers.
+
+    open_device returns False when the device is not reachable.
+    close_device must be safe to call on a controller that is not open.
+    send_command writes one keypad string.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        key: Hashable,
+        controller: Any,
+        open_device: Callable[[], Awaitable[bool]],
+        close_device: Callable[[], Awaitable[None]],
+        send_command: Callable[[str], Awaitable[None]],
+        backoff: Backoff | None = None,
+        silence_timeout: float = DEFAULT_SILENCE_TIMEOUT,
+    ) -> None:
+        """Initialize a connection that is not open yet."""
+        self._loop = loop
+        self._open_device = open_device
+        self._close_device = close_device
+        self._backoff = Backoff() if backoff is None else backoff
+        self._silence_timeout = silence_timeout
+        self._retry: asyncio.TimerHandle | None = None
+        self._linger: asyncio.TimerHandle | None = None
+        self._watchdog: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task | None = None
+        self._reconfigure: asyncio.Task | None = None
+        self._started = False
+        self._loop_thread = threading.get_ident()
+        self._fanout_address: tuple[str, int] | None = None
+        # Command interval and fan-out address of each subscriber
+        self._settings: dict[str, tuple[float, tuple[str, int] | None]] = {}
+        # Monotonic time of the last line, written by the reader
+        self._last_read = 0.0
+        self._last_probe = 0.0
+        # Value of opens when press_once() last queued a key
+        self._pressed_open = 0
+        self.key = key
+        self.controller = controller
+        self.link = LinkState()
+        self.commands = CommandQueue(loop, send_command)
+        self.device_config = DeviceConfigSync(loop, self.commands.submit)
+        self.fanout: FanoutServer | None = None
+        # Set while open, an unexpected close reopens the device
+        self.restart = False
+        self.opens = 0
+        self.silences = 0
+        self.subscribers: dict[str, Handlers] = {}
+        controller.on_close += self._handle_closed
+        controller.on_read += self._handle_read
+        controller.on_sending_received += self.commands.handle_ack
+        controller.on_config_received += self.device_config.handle_config
+
+    def subscribe(self, entry_id: str, handlers: Handlers) -> None:
+        """Attach the event handlers of a config entry."""
+        if self._linger is not None:
+            self._linger.cancel()
+            self._linger = None
+        for event, handler in handlers.items():
+            getattr(self.controller, event).add(handler)
+        self.subscribers[entry_id] = handlers
+
+    def unsubscribe(self, entry_id: str) -> bool:
+        """Detach the event handlers of a config entry, return if none are left."""
+        for event, handler in self.subscribers.pop(entry_id, {}).items():
+            getattr(self.controller, event).remove(handler)
+        self.device_config.discard(entry_id)
+        # With no subscriber left the settings stay, for a reload
+        if self._settings.pop(entry_id, None) is not None and self._settings:
+            self._reconfigure = self._loop.create_task(self._async_apply_settings())
+        return not self.subscribers
+
+    async def async_start(self) -> None:
+        """Open the device unless a subscriber already did."""
+        if self._started:
+            return
+        self._started = True
+        await self._async_open()
+
+    def start(self) -> None:
+        """Open the device in the background unless a subscriber already did.
+
+        The open belongs to the connection rather than to a config entry, so
+        unloading the entry that started it does not cancel it halfway.
+        """
+        if self._started:
+            return
+        self._started = True
+        self._schedule_open()
+
+    async def async_close(self) -> None:
+        """Close the device and stop reopening it."""
+        self._started = False
+        self.restart = False
+        for handle in (self._retry, self._linger, self._watchdog, self._reconfigure):
+            if handle is not None:
+                handle.cancel()
+        self._reconfigure = None
+        self._retry = self._linger = self._watchdog = None
+        self.link.set(False)
+        self.commands.cancel()
+        self.device_config.reset()
+        await self.async_serve("", 0)
+        await self._close_device()
+
+    async def async_configure(
+        self,
+        entry_id: str,
+        command_interval: float,
+        fanout_host: str,
+        fanout_port: int,
+    ) -> None:
+        """Set the command interval and fan-out address of a subscriber.
+
+        Commands are paced by the largest interval of the subscribers. One
+        fan-out server runs for all of them: the running one while any
+        subscriber still asks for it, otherwise the first one asked for.
+        """
+        address = (fanout_host, fanout_port) if fanout_port else None
+        self._settings[entry_id] = (command_interval, address)
+        await self._async_apply_settings()
+
+    async def _async_apply_settings(self) -> None:
+        """Apply the settings merged across the subscribers."""
+        self._reconfigure = None
+        if not self._settings:
+            return
+        self.commands.interval = max(
+            interval for interval, _ in self._settings.values()
+        )
+        addresses = [
+            address for _, address in self._settings.values() if address is not None
+        ]
+        if self._fanout_address in addresses:
+            address = self._fanout_address
+        else:
+            address = addresses[0] if addresses else None
+        if ignored := {other for other in addresses if other != address}:
+            _LOGGER.warning(
+                "Entries sharing %s ask for different fan-out addresses, "
+                "serving %s:%s and ignoring %s",
+                self.key,
+                *address,
+                ", ".join(f"{host}:{port}" for host, port in sorted(ignored)),
+            )
+        await self.async_serve(*(address or ("", 0)))
+
+    async def async_serve(self, host: str, port: int) -> None:
+        """Run the ser2sock fan-out server on host:port, port 0 stops it."""
+        address = (host, port) if port else None
+        if address == self._fanout_address:
+            return
+        if self.fanout is not None:
+            await self.fanout.async_stop()
+            self.fanout = None
+        self._fanout_address = None
+        if address is None:
+            return
+        server = FanoutServer(self._loop, self._forward_write)
+        try:
+            await server.async_start(host, port)
+        except OSError as err:
+            _LOGGER.error(
+                "Unable to start the fan-out server on %s:%s: %s", host, port, err
+            )
+            return
+        self.fanout = server
+        self._fanout_address = address
+
+    def press_once(self, key: str) -> asyncio.Future[bool | None] | None:
+        """Queue key once per link-up, None when it was already queued.
+
+        Used by the zone resyncs of the entries sharing the keypad.
+        """
+        if self._pressed_open == self.opens:
+            return None
+        self._pressed_open = self.opens
+        return self.commands.submit(key)
+
+    def linger(self, delay: float, expire: Callable[[], None]) -> None:
+        """Call expire after delay unless a subscriber comes back first."""
+        self._linger = self._loop.call_later(delay, expire)
+
+    async def _async_open(self) -> None:
+        """Open the device, retrying later when it is not reachable."""
+        self._retry = None
+        if not self._started:
+            return
+        if not await self._open_device():
+            # alarmdecoder wires its events before a failed open
+            await self._close_device()
+            self._schedule_retry()
+            return
+        if not self._started:
+            # Closed while opening
+            await self._close_device()
+            return
+        self.opens += 1
+        self.restart = True
+        self._backoff.reset()
+        self._last_read = time.monotonic()
+        self._schedule_watchdog()
+        self.link.set(True)
+        _LOGGER.debug("Established a connection with the alarmdecoder at %s", self.key)
+
+    def _schedule_retry(self) -> None:
+        """Retry the open after the next backoff delay."""
+        if not self._started:
+            return
+        delay = self._backoff.next()
+        _LOGGER.debug(
+            "Failed to connect to %s. Retrying in %.1f seconds", self.key, delay
+        )
+        self._retry = self._loop.call_later(delay, self._schedule_open)
+
+    def _schedule_open(self) -> None:
+        """Run an open attempt on the loop."""
+        self._task = self._loop.create_task(self._async_open())
+
+    def _schedule_watchdog(self) -> None:
+        """Check for silence a few times per timeout."""
+        self._watchdog = self._loop.call_later(
+            self._silence_timeout / 4, self._check_silence
+        )
+
+    def _check_silence(self) -> None:
+        """Reconnect when the device has been silent for too long."""
+        self._watchdog = None
+        if not self.restart:
+            return
+        now = time.monotonic()
+        silence = now - self._last_read
+        if silence < self._silence_timeout:
+            if (
+                silence >= self._silence_timeout / 2
+                and self._last_probe < self._last_read
+            ):
+                # Any line, the !VER answer included, feeds the watchdog
+                self._last_probe = now
+                future = self.commands.submit("V\r", priority=PRIORITY_AUI, ack=False)
+                future.add_done_callback(_log_send_error)
+            self._schedule_watchdog()
+            return
+        self.silences += 1
+        _LOGGER.warning(
+            "AlarmDecoder at %s silent for %.0f seconds, reconnecting",
+            self.key,
+            silence,
+        )
+        self._task = self._loop.create_task(self._async_reconnect())
+
+    async def _async_reconnect(self) -> None:
+        """Close a dead link and open it again.
+
+        Closing unwires the events alarmdecoder wired on open, which the
+        next open wires again.
+        """
+        self.restart = False
+        self.link.set(False)
+        self.commands.cancel()
+        self.device_config.reset()
+        await self._close_device()
+        self._schedule_retry()
+
+    def _handle_read(self, sender, *args, **kwargs) -> None:
+        """Feed the watchdog and the fan-out server, from the reader."""
+        self._last_read = time.monotonic()
+        if self.fanout is not None:
+            if threading.get_ident() == self._loop_thread:
+                self.fanout.broadcast(kwargs["data"])
+            else:
+                self._loop.call_soon_threadsafe(self._broadcast, kwargs["data"])
+
+    def _broadcast(self, line: bytes) -> None:
+        """Rebroadcast a line read by the reader thread."""
+        if self.fanout is not None:
+            self.fanout.broadcast(line)
+
+    def _forward_write(self, data: bytes) -> None:
+        """Queue what a fan-out client wrote, like a keypress."""
+        future = self.commands.submit(
+            data.decode("utf-8", "replace"), priority=PRIORITY_KEYPRESS, ack=False
+        )
+        future.add_done_callback(_log_send_error)
+
+    def _handle_closed(self, sender, *args, **kwargs) -> None:
+        """Reopen after an unexpected loss of connection, from any thread."""
+        if not self.restart:
+            return
+        self.restart = False
+        _LOGGER.warning("AlarmDecoder at %s unexpectedly lost connection", self.key)
+        self._loop.call_soon_threadsafe(self._handle_lost)
+
+    def _handle_lost(self) -> None:
+        """Close the lost device and schedule the reconnect."""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        self._task = self._loop.create_task(self._async_reconnect())
+
+
+def _log_send_error(future: asyncio.Future) -> None:
+    """Log a fan-out client write or a probe that could not be sent."""
+    if not future.cancelled() and (err := future.exception()) is not None:
+        _LOGGER.debug("Command not sent: %s", err)
+
+
+class ConnectionManager:
+    """Share one connection per physical device across config entries.
+
+    Connections are keyed by (host, port) or device path. When the last
+    config entry releases a connection it stays open for linger seconds, so
+    an options reload, which unloads and sets up the entry again, finds the
+    device open and initialized instead of reopening it.
+
+    A device opened before its config entry exists, by the config flow's
+    connection test, is parked under its key for the entry's setup to claim.
+    It is closed if nobody claims it within timeout seconds.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        linger: float = DEFAULT_LINGER,
+        silence_timeout: float = DEFAULT_SILENCE_TIMEOUT,
+        backoff: Callable[[], Backoff] = Backoff,
+    ) -> None:
+        """Initialize without connections."""
+        self._loop = loop
+        self._linger = linger
+        self._silence_timeout = silence_timeout
+        self._backoff = backoff
+        self._closing: set[asyncio.Task] = set()
+        # Key -> (opened device, its close coroutine, expiry timer)
+        self._parked: dict[
+            Hashable,
+            tuple[Any, Callable[[], Coroutine[Any, Any, None]], asyncio.TimerHandle],
+        ] = {}
+        self.connections: dict[Hashable, SharedConnection] = {}
+
+    def acquire(
+        self,
+        key: Hashable,
+        entry_id: str,
+        handlers: Handlers,
+        create: Callable[
+            [],
+            tuple[
+                Any,
+                Callable[[], Awaitable[bool]],
+                Callable[[], Awaitable[None]],
+                Callable[[str], Awaitable[None]],
+            ],
+        ],
+    ) -> SharedConnection:
+        """Subscribe a config entry to the device, creating the connection if new.
+
+        create returns the controller with its open, close and send coroutines.
+        Call async_start() on the returned connection to open it.
+        """
+        if (connection := self.connections.get(key)) is None:
+            connection = SharedConnection(
+                self._loop,
+                key,
+                *create(),
+                backoff=self._backoff(),
+                silence_timeout=self._silence_timeout,
+            )
+            self.connections[key] = connection
+        connection.subscribe(entry_id, handlers)
+        return connection
+
+    def release(self, connection: SharedConnection, entry_id: str) -> None:
+        """Unsubscribe a config entry, closing the unused connection later."""
+        if connection.unsubscribe(entry_id):
+            connection.linger(self._linger, lambda: self._expire(connection))
+
+    def park(
+        self,
+        key: Hashable,
+        device: Any,
+        close: Callable[[], Coroutine[Any, Any, None]],
+        timeout: float = DEFAULT_PARK_TIMEOUT,
+    ) -> None:
+        """Keep an opened device for the setup of its config entry."""
+        self._close_parked(key)
+        timer = self._loop.call_later(timeout, self._close_parked, key)
+        self._parked[key] = (device, close, timer)
+
+    def claim(self, key: Hashable) -> Any | None:
+        """Take the device parked under key, None when there is none."""
+        if (parked := self._parked.pop(key, None)) is None:
+            return None
+        device, _, timer = parked
+        timer.cancel()
+        return device
+
+    async def async_close_all(self) -> None:
+        """Close every connection, on shutdown."""
+        for key in list(self._parked):
+            self._close_parked(key)
+        connections = list(self.connections.values())
+        self.connections.clear()
+        await asyncio.gather(
+            *(connection.async_close() for connection in connections),
+            *self._closing,
+        )
+
+    def _close_parked(self, key: Hashable) -> None:
+        """Close a parked device nobody claimed."""
+        if (parked := self._parked.pop(key, None)) is None:
+            return
+        _, close, timer = parked
+        timer.cancel()
+        _LOGGER.debug("Closing unclaimed device %s", key)
+        self._track(close())
+
+    def _expire(self, connection: SharedConnection) -> None:
+        """Close a connection nobody subscribed to while it lingered."""
+        if connection.subscribers:
+            return
+        if self.connections.get(connection.key) is not connection:
+            return
+        del self.connections[connection.key]
+        _LOGGER.debug("Closing unused connection to %s", connection.key)
+        self._track(connection.async_close())
+
+    def _track(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run a close in the background, awaited by async_close_all()."""
+        task = self._loop.create_task(coro)
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
@@ -5,11 +5,21 @@ CONF_AUTO_BYPASS = "auto_bypass"
 CONF_AUTO_DETECT_ZONES = "auto_detect_zones"
 CONF_SCAN_PANEL = "scan_panel"
 CONF_CODE_ARM_REQUIRED = "code_arm_required"
+CONF_COMMAND_INTERVAL = "command_interval"
+CONF_DEDUP_WINDOW = "dedup_window"
 CONF_DEVICE_BAUD = "device_baudrate"
 CONF_DEVICE_PATH = "device_path"
 CONF_ENTRY_DELAY = "entry_delay"
+CONF_FANOUT_HOST = "fanout_host"
+CONF_FANOUT_PORT = "fanout_port"
+CONF_MANAGE_DEVICE_CONFIG = "manage_device_config"
+CONF_MIN_WRITE_INTERVAL = "min_write_interval"
+CONF_PROCESSING_PROFILE = "processing_profile"
 CONF_RELAY_ADDR = "zone_relayaddr"
 CONF_RELAY_CHAN = "zone_relaychan"
+CONF_TRACE_SAMPLE_RATE = "trace_sample_rate"
+CONF_TRACE_SIGNALS = "trace_signals"
+CONF_TRANSPORT = "transport"
 CONF_ZONE_LOOP = "zone_loop"
 CONF_ZONE_NAME = "zone_name"
 CONF_ZONE_NUMBER = "zone_number"
@@ -20,11 +30,21 @@ DEFAULT_AUTO_BYPASS = False
 DEFAULT_AUTO_DETECT_ZONES = False
 DEFAULT_SCAN_PANEL = False
 DEFAULT_CODE_ARM_REQUIRED = True
+DEFAULT_COMMAND_INTERVAL = 0.5
+DEFAULT_DEDUP_WINDOW = 30
 DEFAULT_DEVICE_BAUD = 115200
 DEFAULT_DEVICE_HOST = "alarmdecoder"
 DEFAULT_DEVICE_PATH = "/dev/ttyUSB0"
 DEFAULT_DEVICE_PORT = 10000
 DEFAULT_ENTRY_DELAY = True
+DEFAULT_FANOUT_HOST = "127.0.0.1"
+# 0 disables the fan-out server
+DEFAULT_FANOUT_PORT = 0
+DEFAULT_MANAGE_DEVICE_CONFIG = False
+DEFAULT_MIN_WRITE_INTERVAL = 1.0
+DEFAULT_PROCESSING_PROFILE = "full"
+DEFAULT_TRACE_SAMPLE_RATE = 0
+DEFAULT_TRANSPORT = "threaded"
 DEFAULT_ZONE_TYPE = "window"
 CONF_KEYPADS = "keypads"
 
@@ -34,7 +54,16 @@ DEFAULT_ARM_OPTIONS = {
     CONF_AUTO_BYPASS: DEFAULT_AUTO_BYPASS,
     CONF_AUTO_DETECT_ZONES: DEFAULT_AUTO_DETECT_ZONES,
     CONF_CODE_ARM_REQUIRED: DEFAULT_CODE_ARM_REQUIRED,
+    CONF_COMMAND_INTERVAL: DEFAULT_COMMAND_INTERVAL,
+    CONF_DEDUP_WINDOW: DEFAULT_DEDUP_WINDOW,
+    CONF_FANOUT_HOST: DEFAULT_FANOUT_HOST,
+    CONF_FANOUT_PORT: DEFAULT_FANOUT_PORT,
+    CONF_MANAGE_DEVICE_CONFIG: DEFAULT_MANAGE_DEVICE_CONFIG,
+    CONF_MIN_WRITE_INTERVAL: DEFAULT_MIN_WRITE_INTERVAL,
+    CONF_PROCESSING_PROFILE: DEFAULT_PROCESSING_PROFILE,
     CONF_SCAN_PANEL: DEFAULT_SCAN_PANEL,
+    CONF_TRACE_SAMPLE_RATE: DEFAULT_TRACE_SAMPLE_RATE,
+    CONF_TRACE_SIGNALS: [],
 }
 DEFAULT_ZONE_OPTIONS: dict = {}
 
@@ -44,13 +73,46 @@ OPTIONS_ARM = "arm_options"
 OPTIONS_KEYPADS = "keypad_options"
 OPTIONS_ZONES = "zone_options"
 
+# Processing profiles, from every entity to the bare minimum for low-power hosts
+PROFILE_FULL = "full"
+PROFILE_STANDARD = "standard"
+PROFILE_LEAN = "lean"
+PROFILES = [PROFILE_FULL, PROFILE_STANDARD, PROFILE_LEAN]
+
+# Trace signals, see trace.Tracer
+TRACE_PANEL = "panel"
+TRACE_RFX = "rfx"
+TRACE_ZONE = "zone"
+TRACE_RELAY = "relay"
+TRACE_PANIC = "panic"
+TRACE_AUI = "aui"
+TRACE_BYPASS = "bypass"
+TRACE_SIGNALS = [
+    TRACE_PANEL,
+    TRACE_RFX,
+    TRACE_ZONE,
+    TRACE_RELAY,
+    TRACE_PANIC,
+    TRACE_AUI,
+    TRACE_BYPASS,
+]
+
+SERVICE_DUMP_TRACE = "dump_trace"
+
+# Connection transports: the alarmdecoder reader thread, or asyncio on the loop
+TRANSPORT_THREADED = "threaded"
+TRANSPORT_ASYNCIO = "asyncio"
+TRANSPORTS = [TRANSPORT_THREADED, TRANSPORT_ASYNCIO]
+
 PROTOCOL_SERIAL = "serial"
 PROTOCOL_SOCKET = "socket"
 
+# Signal names, routed per config entry through its runtime data signal_router
 SIGNAL_PANEL_MESSAGE = "alarmdecoder.panel_message"
 SIGNAL_REL_MESSAGE = "alarmdecoder.rel_message"
 SIGNAL_RFX_MESSAGE = "alarmdecoder.rfx_message"
 SIGNAL_AUI_MESSAGE = "alarmdecoder.aui_message"
+SIGNAL_PANIC = "alarmdecoder.panic"
 SIGNAL_ZONE_FAULT = "alarmdecoder.zone_fault"
 SIGNAL_ZONE_RESTORE = "alarmdecoder.zone_restore"
 
@@ -0,0 +1,275 @@
+"""Decode AlarmDecoder panel messages into immutable envelopes."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+import re
+import time
+from types import MappingProxyType
+from typing import Any
+
+KIND_KEYPAD = "keypad"
+KIND_UNKNOWN = "unknown"
+
+# Status bits, one per keypad bitfield flag
+STATUS_READY = 1 << 0
+STATUS_ARMED_AWAY = 1 << 1
+STATUS_ARMED_HOME = 1 << 2
+STATUS_BACKLIGHT_ON = 1 << 3
+STATUS_PROGRAMMING_MODE = 1 << 4
+STATUS_ZONE_BYPASSED = 1 << 5
+STATUS_AC_POWER = 1 << 6
+STATUS_CHIME_ON = 1 << 7
+STATUS_ALARM_EVENT_OCCURRED = 1 << 8
+STATUS_ALARM_SOUNDING = 1 << 9
+STATUS_BATTERY_LOW = 1 << 10
+STATUS_ENTRY_DELAY_OFF = 1 << 11
+STATUS_FIRE_ALARM = 1 << 12
+STATUS_CHECK_ZONE = 1 << 13
+STATUS_PERIMETER_ONLY = 1 << 14
+# Display shows a panel status text ("****DISARMED****", ...)
+STATUS_SYSTEM_TEXT = 1 << 15
+
+STATUS_ARMED = STATUS_ARMED_AWAY | STATUS_ARMED_HOME
+STATUS_ALARM = STATUS_ALARM_SOUNDING | STATUS_FIRE_ALARM
+
+# Message attribute name -> status bit
+STATUS_BITS: dict[str, int] = {
+    "ready": STATUS_READY,
+    "armed_away": STATUS_ARMED_AWAY,
+    "armed_home": STATUS_ARMED_HOME,
+    "backlight_on": STATUS_BACKLIGHT_ON,
+    "programming_mode": STATUS_PROGRAMMING_MODE,
+    "zone_bypassed": STATUS_ZONE_BYPASSED,
+    "ac_power": STATUS_AC_POWER,
+    "chime_on": STATUS_CHIME_ON,
+    "alarm_event_occurred": STATUS_ALARM_EVENT_OCCURRED,
+    "alarm_sounding": STATUS_ALARM_SOUNDING,
+    "battery_low": STATUS_BATTERY_LOW,
+    "entry_delay_off": STATUS_ENTRY_DELAY_OFF,
+    "fire_alarm": STATUS_FIRE_ALARM,
+    "check_zone": STATUS_CHECK_ZONE,
+    "perimeter_only": STATUS_PERIMETER_ONLY,
+}
+_STATUS_ITEMS = tuple(STATUS_BITS.items())
+
+# Regex to extract zone number and name from panel text
+# Matches: "ANULA 09  POSTI DORM PPAL" or "COMPROBAR 32  VENT BARBACOA 3"
+ZONE_TEXT_RE = re.compile(r"^(?:ANULA|COMPROBAR)\s+(\d{2})\s+(.+?)\s*$")
+
+ATTR_RF_BIT0 = "rf_bit0"
+ATTR_RF_LOW_BAT = "rf_low_battery"
+ATTR_RF_SUPERVISED = "rf_supervised"
+ATTR_RF_BIT3 = "rf_bit3"
+ATTR_RF_LOOP3 = "rf_loop3"
+ATTR_RF_LOOP2 = "rf_loop2"
+ATTR_RF_LOOP4 = "rf_loop4"
+ATTR_RF_LOOP1 = "rf_loop1"
+
+# RF status byte bit -> attribute
+_RF_BITS = (
+    (0x01, ATTR_RF_BIT0),
+    (0x02, ATTR_RF_LOW_BAT),
+    (0x04, ATTR_RF_SUPERVISED),
+    (0x08, ATTR_RF_BIT3),
+    (0x10, ATTR_RF_LOOP3),
+    (0x20, ATTR_RF_LOOP2),
+    (0x40, ATTR_RF_LOOP4),
+    (0x80, ATTR_RF_LOOP1),
+)
+# Loop 1-4 bits, in loop order
+_RF_LOOP_BITS = (0x80, 0x20, 0x10, 0x40)
+
+_KPM_HEADER = "!KPM:"
+# Keypad bitfield, relative to the opening "["
+_BITFIELD_END = 21
+# Keypad address bytes 1-4 of the raw panel data, relative to the opening "["
+_ADDRESS_START = 30
+_ADDRESS_END = 38
+
+_LRR_HEADER = "!LRR:"
+# Contact ID events alarmdecoder's LRR system reports as panic, and the
+# user disarm that cancels one
+_LRR_PANIC_CODES = frozenset(
+    (0x100, 0x101, 0x102, 0x120, 0x121, 0x122, 0x123, 0x124, 0x125)
+)
+_LRR_CANCEL_BY_USER = 0x406
+_LRR_TRIGGER = "1"
+_LRR_RESTORE = "3"
+
+
+@dataclass(frozen=True, slots=True)
+class PanelEnvelope:
+    """A keypad message decoded once for all consumers."""
+
+    kind: str
+    address_mask: int
+    status: int
+    beeps: int
+    text: str
+    zone: tuple[int, str] | None
+    message: Any
+
+
+@dataclass(frozen=True, slots=True)
+class RfStatus:
+    """Decoded flags of an RFX status byte, shared by every message with that byte."""
+
+    value: int
+    low_battery: bool
+    supervised: bool
+    loops: tuple[bool, bool, bool, bool]
+    attributes: Mapping[str, bool]
+
+
+def _decode_rf_status(value: int) -> RfStatus:
+    """Decode an RFX status byte."""
+    return RfStatus(
+        value,
+        bool(value & 0x02),
+        bool(value & 0x04),
+        tuple(bool(value & bit) for bit in _RF_LOOP_BITS),
+        MappingProxyType({name: bool(value & bit) for bit, name in _RF_BITS}),
+    )
+
+
+# Every possible status byte, decoded once at import
+RF_STATUS_TABLE: tuple[RfStatus, ...] = tuple(_decode_rf_status(v) for v in range(256))
+
+
+def decode_panel_message(message: Any, parse_zone: bool = True) -> PanelEnvelope:
+    """Decode a panel message into a PanelEnvelope.
+
+    The zone text is only matched when parse_zone is set, since zone
+    auto-detection is its only consumer.
+    """
+    raw = getattr(message, "raw", None) or ""
+    offset = len(_KPM_HEADER) if raw.startswith(_KPM_HEADER) else 0
+    text = getattr(message, "text", None) or ""
+
+    if raw[offset:offset + 1] != "[":
+        return PanelEnvelope(KIND_UNKNOWN, 0, 0, 0, text, None, message)
+
+    try:
+        address_mask = int.from_bytes(
+            bytes.fromhex(raw[offset + _ADDRESS_START:offset + _ADDRESS_END]),
+            "little",
+        )
+    except ValueError:
+        address_mask = 0
+
+    status = 0
+    for attribute, bit in _STATUS_ITEMS:
+        if getattr(message, attribute, False):
+            status |= bit
+    if "**" in text:
+        status |= STATUS_SYSTEM_TEXT
+
+    zone = None
+    if parse_zone and (match := ZONE_TEXT_RE.match(text.strip())):
+        zone = (int(match.group(1)), match.group(2).strip())
+
+    return PanelEnvelope(
+        KIND_KEYPAD,
+        address_mask,
+        status,
+        max(getattr(message, "beeps", 0), 0),
+        text,
+        zone,
+        message,
+    )
+
+
+def decode_rf_message(message: Any) -> tuple[str, RfStatus] | None:
+    """Decode an RFX message into its serial number and shared status."""
+    serial = getattr(message, "serial_number", None)
+    value = getattr(message, "value", None)
+    if not serial or not isinstance(value, int) or not 0 <= value <= 0xFF:
+        return None
+    return serial, RF_STATUS_TABLE[value]
+
+
+def decode_lrr_panic(message: Any) -> bool | None:
+    """Return the panic state an LRR message reports, None if it reports none.
+
+    Follows alarmdecoder's LRR system, which AdExt skips with its default
+    ignore_lrr_states and so never fires on_panic. Firmware before 2.2a.8.6
+    sends ALARM_PANIC and CANCEL, later firmware Contact ID events such as
+    CID_1123 (1 triggered, 3 restored, event 123), whose last two digits a
+    report code other than 00 or ff replaces.
+    """
+    raw = str(message)
+    if not raw.startswith(_LRR_HEADER):
+        return None
+    values = raw[len(_LRR_HEADER):].strip().split(",")
+    if len(values) == 3:
+        return {"ALARM_PANIC": True, "CANCEL": False}.get(values[2])
+    if len(values) != 4:
+        return None
+    prefix, _, event = values[2].partition("_")
+    status, report_code = event[:1], values[3]
+    if prefix != "CID" or status not in (_LRR_TRIGGER, _LRR_RESTORE):
+        return None
+    try:
+        code = int(event[1:], 16)
+        if report_code not in ("00", "ff"):
+            code = int(event[1] + report_code, 16)
+    except (IndexError, ValueError):
+        return None
+    if code == _LRR_CANCEL_BY_USER:
+        return False
+    if code in _LRR_PANIC_CODES:
+        return status == _LRR_TRIGGER
+    return None
+
+
+class DuplicateFilter:
+    """Drop exact repeats of keypad messages within a time window.
+
+    Honeywell panels repeat the current keypad message every few seconds.
+    Each keypad address mask remembers the fingerprint (raw bitfield and
+    display text) of the last message let through; the same fingerprint is
+    dropped until the window has passed since then. A changed message always
+    gets through, and an unchanged one is still refreshed once per window.
+    """
+
+    __slots__ = ("_clock", "_last", "passed", "suppressed", "window")
+
+    def __init__(
+        self, window: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Initialize the filter, a window of 0 disables it."""
+        self.window = window
+        self.passed = 0
+        self.suppressed = 0
+        self._clock = clock
+        # Address mask -> (fingerprint, time it was let through)
+        self._last: dict[str, tuple[tuple[str, str], float]] = {}
+
+    def accept(self, message: Any) -> bool:
+        """Return False if message repeats the last one for its keypads."""
+        raw = getattr(message, "raw", None) or ""
+        offset = len(_KPM_HEADER) if raw.startswith(_KPM_HEADER) else 0
+        if self.window <= 0 or raw[offset:offset + 1] != "[":
+            self.passed += 1
+            return True
+
+        mask = raw[offset + _ADDRESS_START:offset + _ADDRESS_END]
+        fingerprint = (
+            raw[offset + 1:offset + _BITFIELD_END],
+            getattr(message, "text", None) or "",
+        )
+        now = self._clock()
+        last = self._last.get(mask)
+        if (
+            last is not None
+            and last[0] == fingerprint
+            and now - last[1] < self.window
+        ):
+            self.suppressed += 1
+            return False
+
+        self._last[mask] = (fingerprint, now)
+        self.passed += 1
+        return True
@@ -0,0 +1,230 @@
+"""AlarmDecoder firmware configuration, read at connect time and optimized."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, replace
+import logging
+from typing import Any
+
+from .commands import PRIORITY_AUI
+
+_LOGGER = logging.getLogger(__name__)
+
+# First address of the emulated zone expanders (EXP) and relay modules (REL)
+EXPANDER_BASE_ADDRESS = 7
+RELAY_BASE_ADDRESS = 12
+
+# alarmdecoder's panel types, ADEMCO and DSC, to their MODE letter
+_MODES = {0: "A", 1: "D"}
+
+
+def keypad_mask(addresses: Iterable[int]) -> int:
+    """Return the address mask of keypads, one bit per address."""
+    mask = 0
+    for address in addresses:
+        mask |= 1 << address
+    return mask
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceConfig:
+    """The settings of an AlarmDecoder's !CONFIG line.
+
+    mask has one bit per keypad address, like PanelEnvelope.address_mask.
+    The firmware writes it in the byte order of the keypad messages, which
+    alarmdecoder reads as a big-endian number.
+    """
+
+    address: int
+    configbits: int
+    mask: int
+    # Emulated zone expanders at addresses 7 to 11
+    expanders: tuple[bool, ...]
+    # Emulated relay modules at addresses 12 to 15
+    relays: tuple[bool, ...]
+    lrr: bool
+    deduplicate: bool
+    mode: str
+    com: bool
+
+    @classmethod
+    def from_controller(cls, controller: Any) -> DeviceConfig:
+        """Snapshot the configuration parsed by an AlarmDecoder controller."""
+        return cls(
+            address=controller.address,
+            configbits=controller.configbits,
+            mask=int.from_bytes(controller.address_mask.to_bytes(4, "big"), "little"),
+            expanders=tuple(controller.emulate_zone),
+            relays=tuple(controller.emulate_relay),
+            lrr=controller.emulate_lrr,
+            deduplicate=controller.deduplicate,
+            mode=_MODES.get(controller.mode, "A"),
+            com=controller.emulate_com,
+        )
+
+    @property
+    def config_string(self) -> str:
+        """Return the settings in the format of the C command."""
+        mask = int.from_bytes(self.mask.to_bytes(4, "little"), "big")
+        return "&".join(
+            (
+                f"ADDRESS={self.address}",
+                f"CONFIGBITS={self.configbits:x}",
+                f"MASK={mask:08x}",
+                "EXP=" + "".join("Y" if on else "N" for on in self.expanders),
+                "REL=" + "".join("Y" if on else "N" for on in self.relays),
+                f"LRR={'Y' if self.lrr else 'N'}",
+                f"DEDUPLICATE={'Y' if self.deduplicate else 'N'}",
+                f"MODE={self.mode}",
+                f"COM={'Y' if self.com else 'N'}",
+            )
+        )
+
+    def optimized(
+        self, keypads: Iterable[int], relay_addresses: Iterable[int]
+    ) -> DeviceConfig:
+        """Return the settings letting through only what the entries use.
+
+        The mask keeps the configured keypads and the device's own address,
+        whose prompts answer the commands we send. Repeated keypad messages
+        are deduplicated by the firmware. Emulated expanders and relays no
+        zone reads are turned off, but none is turned on: a zone may be
+        wired to a real module.
+        """
+        mask = keypad_mask(keypads)
+        used = set(relay_addresses)
+        return replace(
+            self,
+            mask=mask | 1 << self.address if mask else self.mask,
+            deduplicate=True,
+            expanders=tuple(
+                on and EXPANDER_BASE_ADDRESS + index in used
+                for index, on in enumerate(self.expanders)
+            ),
+            relays=tuple(
+                on and RELAY_BASE_ADDRESS + index in used
+                for index, on in enumerate(self.relays)
+            ),
+        )
+
+    def summary(self) -> str:
+        """Describe the settings for the options flow."""
+        keypads = [str(bit) for bit in range(32) if self.mask >> bit & 1]
+        expanders = [
+            str(EXPANDER_BASE_ADDRESS + index)
+            for index, on in enumerate(self.expanders)
+            if on
+        ]
+        relays = [
+            str(RELAY_BASE_ADDRESS + index) for index, on in enumerate(self.relays) if on
+        ]
+        return (
+            f"address {self.address}, "
+            f"keypads {'all' if len(keypads) == 32 else ', '.join(keypads)}, "
+            f"deduplicate {'on' if self.deduplicate else 'off'}, "
+            f"expanders {', '.join(expanders) or 'none'}, "
+            f"relays {', '.join(relays) or 'none'}, "
+            f"LRR {'on' if self.lrr else 'off'}"
+        )
+
+
+class DeviceConfigSync:
+    """Keep a device's filtering settings in line with the entries using it.
+
+    Each config entry registers the keypads and relay addresses it reads.
+    When one of them manages the device, every !CONFIG the device reports
+    is compared with the optimized settings for all the entries, and the
+    difference is written with one C command.
+
+    A configuration is written once per connection. When the link goes
+    down reset() forgets it, since the device may have been reset in the
+    meantime: the !CONFIG alarmdecoder asks for on reconnect is compared
+    again, and only a device that lost the settings is written to.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        submit: Callable[..., asyncio.Future[bool | None]],
+    ) -> None:
+        """Initialize before the device reported its configuration."""
+        self._loop = loop
+        self._submit = submit
+        # Entry id -> (keypads, relay addresses, manage)
+        self._wanted: dict[str, tuple[frozenset[int], frozenset[int], bool]] = {}
+        self.current: DeviceConfig | None = None
+        self.applied: str | None = None
+        self.writes = 0
+
+    def set_wanted(
+        self,
+        entry_id: str,
+        keypads: Iterable[int],
+        relay_addresses: Iterable[int],
+        manage: bool,
+    ) -> None:
+        """Register what a config entry reads, from the event loop."""
+        self._wanted[entry_id] = (
+            frozenset(keypads),
+            frozenset(relay_addresses),
+            manage,
+        )
+        self._sync()
+
+    def discard(self, entry_id: str) -> None:
+        """Forget a config entry, from the event loop.
+
+        The settings are not narrowed right away, a reload registers the
+        entry again a moment later.
+        """
+        self._wanted.pop(entry_id, None)
+
+    def reset(self) -> None:
+        """Forget the reported and written settings, when the link goes down."""
+        self.current = None
+        self.applied = None
+
+    def handle_config(self, sender, *args, **kwargs) -> None:
+        """Snapshot the reported configuration, from any thread."""
+        config = DeviceConfig.from_controller(sender)
+        self._loop.call_soon_threadsafe(self._handle_config, config)
+
+    def _handle_config(self, config: DeviceConfig) -> None:
+        """Store the configuration and correct it if needed."""
+        _LOGGER.debug("AlarmDecoder configuration: %s", config.config_string)
+        self.current = config
+        self._sync()
+
+    def wanted(self) -> DeviceConfig | None:
+        """Return the settings to write, None when nothing is managed."""
+        if self.current is None or not any(
+            manage for _, _, manage in self._wanted.values()
+        ):
+            return None
+        keypads: set[int] = set()
+        relay_addresses: set[int] = set()
+        for entry_keypads, entry_relays, _ in self._wanted.values():
+            keypads |= entry_keypads
+            relay_addresses |= entry_relays
+        return self.current.optimized(keypads, relay_addresses)
+
+    def _sync(self) -> None:
+        """Write the wanted settings when the device differs."""
+        if (wanted := self.wanted()) is None or wanted == self.current:
+            return
+        config_string = wanted.config_string
+        if config_string == self.applied:
+            return
+        self.applied = config_string
+        self.writes += 1
+        _LOGGER.info("Writing AlarmDecoder configuration: %s", config_string)
+        future = self._submit(f"C{config_string}\r", priority=PRIORITY_AUI, ack=False)
+        future.add_done_callback(_log_write_error)
+
+
+def _log_write_error(future: asyncio.Future) -> None:
+    """Log a configuration that could not be written."""
+    if not future.cancelled() and (err := future.exception()) is not None:
+        _LOGGER.warning("Unable to write the AlarmDecoder configuration: %s", err)
@@ -0,0 +1,35 @@
+"""Diagnostics support for AlarmDecoder."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from . import AlarmDecoderConfigEntry
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: AlarmDecoderConfigEntry
+) -> dict[str, Any]:
+    """Return the setup timings, the device connection and the merged writes."""
+    data = entry.runtime_data
+    connection = data.connection
+    device_config = connection.device_config.current
+    return {
+        # Seconds from the start of the setup
+        "timings": dict(data.timings),
+        "connection": {
+            "available": connection.link.available,
+            "opens": connection.opens,
+            "silences": connection.silences,
+            "entries": len(connection.subscribers),
+        },
+        "commands": connection.commands.stats(),
+        "aui": data.aui and data.aui.stats(),
+        "device_config": device_config and device_config.config_string,
+        # Entity ID -> state writes merged by the minimum write interval
+        "coalesced_writes": {
+            entity_id: coalescer.coalesced
+            for entity_id, coalescer in data.write_coalescers.items()
+        },
+    }
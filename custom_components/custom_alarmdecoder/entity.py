@@ -1,8 +1,11 @@
 """Support for AlarmDecoder-based alarm control panels entity."""
 
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
 
+from .coalesce import WriteCoalescer
+from .connection import LinkState
 from .const import DOMAIN
 
 
@@ -10,6 +13,10 @@ class AlarmDecoderEntity(Entity):
     """Define a base AlarmDecoder entity."""
 
     _attr_has_entity_name = True
+    _min_write_interval: float = 0
+    _write_coalescer: WriteCoalescer | None = None
+    # Availability of the device connection, shared by all its entities
+    _link: LinkState | None = None
 
     def __init__(self, client):
         """Initialize the alarm decoder entity."""
@@ -20,3 +27,38 @@ class AlarmDecoderEntity(Entity):
             serial_number=client.serial_number,
             sw_version=client.version_number,
         )
+
+    @property
+    def available(self) -> bool:
+        """Return False while the device connection is down."""
+        return self._link is None or self._link.available
+
+    async def async_internal_added_to_hass(self) -> None:
+        """Follow the availability of the device connection."""
+        await super().async_internal_added_to_hass()
+        self._link = self.platform.config_entry.runtime_data.connection.link
+        self.async_on_remove(self._link.subscribe(self.async_write_ha_state))
+
+    @callback
+    def async_write_coalesced(self, critical: bool = False) -> None:
+        """Write state, merging writes closer than the minimum write interval.
+
+        The number of merged writes is reported by the entry's diagnostics.
+        """
+        if self._write_coalescer is None:
+            self._write_coalescer = WriteCoalescer(
+                self.hass.loop, self.async_write_ha_state, self._min_write_interval
+            )
+            self.platform.config_entry.runtime_data.write_coalescers[
+                self.entity_id
+            ] = self._write_coalescer
+            self.async_on_remove(self._cancel_coalesced_writes)
+        self._write_coalescer.request(critical)
+
+    @callback
+    def _cancel_coalesced_writes(self) -> None:
+        """Drop the pending write and stop reporting the merged writes."""
+        self._write_coalescer.cancel()
+        self.platform.config_entry.runtime_data.write_coalescers.pop(
+            self.entity_id, None
+        )
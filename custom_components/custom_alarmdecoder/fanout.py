@@ -0,0 +1,116 @@
+"""ser2sock-compatible TCP server sharing the device stream with other clients."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bytes a client may fall behind before it is disconnected
+DEFAULT_MAX_BUFFER = 256 * 1024
+
+_EOL = b"\r\n"
+
+
+class FanoutClient(asyncio.Protocol):
+    """One connected client of the fan-out server."""
+
+    def __init__(self, server: FanoutServer) -> None:
+        """Initialize the client."""
+        self._server = server
+        self.transport: asyncio.Transport | None = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        """Start receiving the device lines."""
+        self.transport = transport
+        self._server.clients.add(transport)
+        _LOGGER.debug(
+            "Fan-out client connected from %s", transport.get_extra_info("peername")
+        )
+
+    def data_received(self, data: bytes) -> None:
+        """Forward what the client writes to the device."""
+        self._server.on_write(data)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Stop sending to the client."""
+        if self.transport is not None:
+            self._server.clients.discard(self.transport)
+            self.transport = None
+
+
+class FanoutServer:
+    """Rebroadcast the raw device lines to any number of TCP clients.
+
+    Speaks the ser2sock protocol: every line read from the device is sent
+    to every client, terminated by CRLF, and bytes written by a client go
+    to the device. alarmdecoder's SocketDevice, a second Home Assistant
+    and monitoring tools can all connect at once.
+
+    Each client's backlog is bounded by max_buffer bytes of its transport's
+    write buffer. A client falling further behind is disconnected, so one
+    stalled reader never holds lines in memory for the others.
+
+    broadcast() runs on the event loop, on_write is called there too.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        on_write: Callable[[bytes], None],
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+    ) -> None:
+        """Initialize a server that is not listening yet."""
+        self._loop = loop
+        self._max_buffer = max_buffer
+        self._server: asyncio.Server | None = None
+        self.on_write = on_write
+        self.clients: set[asyncio.Transport] = set()
+        self.lines = 0
+        self.slow_disconnects = 0
+
+    @property
+    def port(self) -> int | None:
+        """Return the port listened on, resolving port 0."""
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def async_start(self, host: str, port: int) -> None:
+        """Listen for clients on host:port."""
+        self._server = await self._loop.create_server(
+            lambda: FanoutClient(self), host, port
+        )
+        _LOGGER.debug("Fan-out server listening on %s:%s", host, self.port)
+
+    async def async_stop(self) -> None:
+        """Disconnect the clients and stop listening."""
+        if self._server is not None:
+            self._server.close()
+        for transport in list(self.clients):
+            transport.close()
+        self.clients.clear()
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    def broadcast(self, line: bytes) -> None:
+        """Send a device line to every client."""
+        if not self.clients:
+            return
+        self.lines += 1
+        data = line + _EOL
+        for transport in tuple(self.clients):
+            if transport.get_write_buffer_size() > self._max_buffer:
+                self.slow_disconnects += 1
+                _LOGGER.warning(
+                    "Disconnecting fan-out client %s, more than %s bytes behind",
+                    transport.get_extra_info("peername"),
+                    self._max_buffer,
+                )
+                self.clients.discard(transport)
+                transport.abort()
+                continue
+            transport.write(data)
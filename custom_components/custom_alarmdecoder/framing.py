@@ -0,0 +1,146 @@
+"""Line framing of the AlarmDecoder byte stream on the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+DEFAULT_BUFFER_SIZE = 4096
+
+_CR = 0x0D
+_NOISE = b"\xff"
+
+
+class LineFramer:
+    """Split a byte stream into lines, reusing one buffer.
+
+    Bytes are received into a fixed bytearray, either copied in by feed()
+    or written in place through the memoryview returned by get_buffer().
+    Complete lines are sliced out of the memoryview, so each line is copied
+    once, and the unterminated tail is moved to the front of the buffer.
+
+    Like the alarmdecoder reader thread, line terminators and 0xff noise
+    bytes are stripped and empty lines are skipped. A line longer than the
+    buffer is dropped and counted in overflows.
+
+    on_line is called synchronously for every line and must not raise.
+    """
+
+    __slots__ = (
+        "_buffer",
+        "_discard",
+        "_end",
+        "_on_line",
+        "_view",
+        "lines",
+        "overflows",
+    )
+
+    def __init__(
+        self, on_line: Callable[[bytes], None], size: int = DEFAULT_BUFFER_SIZE
+    ) -> None:
+        """Initialize the framer."""
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._end = 0
+        # Set while skipping the rest of an overflowed line
+        self._discard = False
+        self._on_line = on_line
+        self.lines = 0
+        self.overflows = 0
+
+    def get_buffer(self) -> memoryview:
+        """Return the free space of the buffer for a read in place."""
+        if self._end == len(self._buffer):
+            # Full without a line terminator
+            self._end = 0
+            self._discard = True
+            self.overflows += 1
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Frame the lines completed by nbytes read into get_buffer()."""
+        start = self._end
+        self._end += nbytes
+        self._split(start)
+
+    def feed(self, data: bytes) -> None:
+        """Copy data into the buffer and frame the lines it completes."""
+        data = memoryview(data)
+        while data:
+            free = self.get_buffer()
+            count = min(len(free), len(data))
+            free[:count] = data[:count]
+            data = data[count:]
+            self.buffer_updated(count)
+
+    def _split(self, scan_from: int) -> None:
+        """Deliver every complete line and keep the unterminated tail."""
+        buffer = self._buffer
+        view = self._view
+        end = self._end
+        start = 0
+        stop = buffer.find(b"\n", scan_from, end)
+        while stop != -1:
+            if self._discard:
+                self._discard = False
+                start = stop + 1
+                stop = buffer.find(b"\n", start, end)
+                continue
+            line_end = stop
+            while line_end > start and buffer[line_end - 1] == _CR:
+                line_end -= 1
+            if line_end > start:
+                line = bytes(view[start:line_end])
+                if _NOISE in line:
+                    line = line.replace(_NOISE, b"")
+                if line:
+                    self.lines += 1
+                    self._on_line(line)
+            start = stop + 1
+            stop = buffer.find(b"\n", start, end)
+
+        if start:
+            # Move the unterminated tail to the front
+            view[: end - start] = view[start:end]
+            self._end = end - start
+
+
+class LineProtocol(asyncio.BufferedProtocol):
+    """asyncio protocol handing framed lines to a callback on the loop.
+
+    Socket transports read straight into the framer's buffer. Transports
+    that only call data_received, such as serial ones, copy into it.
+    """
+
+    def __init__(
+        self,
+        on_line: Callable[[bytes], None],
+        on_lost: Callable[[Exception | None], None],
+        size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        """Initialize the protocol."""
+        self.framer = LineFramer(on_line, size)
+        self.transport: asyncio.BaseTransport | None = None
+        self._on_lost = on_lost
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Store the transport."""
+        self.transport = transport
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Return the framer's free space."""
+        return self.framer.get_buffer()
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Frame the bytes read in place."""
+        self.framer.buffer_updated(nbytes)
+
+    def data_received(self, data: bytes) -> None:
+        """Frame bytes from a transport without buffered reads."""
+        self.framer.feed(data)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Report the lost connection."""
+        self.transport = None
+        self._on_lost(exc)
@@ -0,0 +1,184 @@
+"""Bounded hand-off of device events from the reader thread to the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable, Hashable
+import logging
+import threading
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAXLEN = 1024
+
+
+class LatencyStats:
+    """Running statistics of hand-off latencies, in seconds."""
+
+    __slots__ = ("count", "last", "max", "total")
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.count = 0
+        self.last = 0.0
+        self.max = 0.0
+        self.total = 0.0
+
+    @property
+    def mean(self) -> float:
+        """Return the mean latency."""
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, latency: float) -> None:
+        """Record a latency."""
+        self.count += 1
+        self.last = latency
+        self.total += latency
+        self.max = max(self.max, latency)
+
+
+class HandoffQueue:
+    """Buffer device events and deliver them on the event loop in batches.
+
+    The reader thread puts events, the loop drains them with a single
+    scheduled callback per batch. Events put with a key are latest-wins: a
+    newer event for a key still waiting replaces it in place, keeping its
+    position. Other events are kept in order. When the buffer is full the
+    oldest event is dropped, so a stalled loop catches up on at most maxlen
+    events instead of a backlog of stale screens.
+
+    Priority events go to a separate lane that is delivered before any bulk
+    event still waiting, including in the middle of a drain. Keyed bulk
+    events older than a delivered priority event with the same key are
+    skipped, so a stale screen never overwrites an alarm.
+    """
+
+    __slots__ = (
+        "_events",
+        "_keyed",
+        "_lock",
+        "_loop",
+        "_maxlen",
+        "_priority",
+        "_priority_seq",
+        "_scheduled",
+        "_seq",
+        "collapsed",
+        "dropped",
+        "high_water",
+        "priority_latency",
+    )
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, maxlen: int = DEFAULT_MAXLEN
+    ) -> None:
+        """Initialize an empty queue."""
+        self._loop = loop
+        self._maxlen = maxlen
+        self._lock = threading.Lock()
+        # [seq, key, target, args] slots, mutable so keyed events replace in place
+        self._events: deque[list[Any]] = deque()
+        self._keyed: dict[Hashable, list[Any]] = {}
+        # (seq, key, target, args, put time)
+        self._priority: deque[tuple[Any, ...]] = deque()
+        # Key -> seq of the last priority event delivered for it
+        self._priority_seq: dict[Hashable, int] = {}
+        self._scheduled = False
+        self._seq = 0
+        self.high_water = 0
+        self.collapsed = 0
+        self.dropped = 0
+        self.priority_latency = LatencyStats()
+
+    def __len__(self) -> int:
+        """Return the number of events waiting."""
+        return len(self._events) + len(self._priority)
+
+    def put(self, target: Callable[..., Any], *args: Any) -> None:
+        """Queue target(*args) after the events already waiting."""
+        with self._lock:
+            self._seq += 1
+            self._append([self._seq, None, target, args])
+
+    def put_latest(
+        self, key: Hashable, target: Callable[..., Any], *args: Any
+    ) -> None:
+        """Queue target(*args), replacing the waiting event with the same key."""
+        with self._lock:
+            self._seq += 1
+            if (slot := self._keyed.get(key)) is not None:
+                slot[0] = self._seq
+                slot[2] = target
+                slot[3] = args
+                self.collapsed += 1
+                return
+            slot = [self._seq, key, target, args]
+            self._keyed[key] = slot
+            self._append(slot)
+
+    def put_priority(
+        self, key: Hashable, target: Callable[..., Any], *args: Any
+    ) -> None:
+        """Queue target(*args) ahead of every waiting bulk event."""
+        put_time = time.monotonic()
+        with self._lock:
+            self._seq += 1
+            self._priority.append((self._seq, key, target, args, put_time))
+            self._schedule()
+
+    def _append(self, slot: list[Any]) -> None:
+        """Append a slot, dropping the oldest one when full. Lock held."""
+        events = self._events
+        if len(events) >= self._maxlen:
+            oldest = events.popleft()
+            if oldest[1] is not None:
+                del self._keyed[oldest[1]]
+            self.dropped += 1
+        events.append(slot)
+        self.high_water = max(self.high_water, len(events))
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Schedule a drain on the event loop if none is pending. Lock held."""
+        if not self._scheduled:
+            self._scheduled = True
+            self._loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self) -> None:
+        """Deliver every waiting event on the event loop."""
+        with self._lock:
+            events = self._events
+            self._events = deque()
+            self._keyed.clear()
+            self._scheduled = False
+        self._drain_priority()
+        priority = self._priority
+        priority_seq = self._priority_seq
+        for seq, key, target, args in events:
+            if priority:
+                self._drain_priority()
+            if key is not None and seq < priority_seq.get(key, 0):
+                continue
+            _deliver(target, args)
+        self._drain_priority()
+
+    def _drain_priority(self) -> None:
+        """Deliver the waiting priority events."""
+        while self._priority:
+            with self._lock:
+                seq, key, target, args, put_time = self._priority.popleft()
+            if key is not None:
+                self._priority_seq[key] = seq
+            _deliver(target, args)
+            self.priority_latency.add(time.monotonic() - put_time)
+
+
+def _deliver(target: Callable[..., Any], args: tuple[Any, ...]) -> None:
+    """Call an event target, logging its errors."""
+    try:
+        target(*args)
+    except Exception:
+        _LOGGER.exception("Error delivering AlarmDecoder event")
@@ -0,0 +1,171 @@
+"""Find AlarmDecoder devices on the serial ports of the host."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+import glob
+import logging
+import os
+import termios
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Stable by-id links first, so they are kept over the device they point to
+CANDIDATE_PATTERNS = ("/dev/serial/by-id/*", "/dev/ttyUSB*", "/dev/ttyACM*")
+# AD2USB and AD2PI ship at 115200, older AD2SERIAL units at 19200
+COMMON_BAUDRATES = (115200, 19200, 57600, 38400, 9600)
+# Seconds to wait for the version at one baud rate
+DEFAULT_PROBE_TIMEOUT = 1.0
+
+_VERSION_QUERY = b"V\r"
+_VERSION_PREFIX = b"!VER:"
+
+
+@dataclass(frozen=True, slots=True)
+class ProbeResult:
+    """A serial port that answered the version query like an AlarmDecoder."""
+
+    path: str
+    baudrate: int
+    # Serial number, firmware version and capability flags from !VER
+    serial_number: str
+    version: str
+    # Seconds from the query to the answer
+    latency: float
+
+    @property
+    def label(self) -> str:
+        """Describe the port for the config flow."""
+        return f"{self.path} @ {self.baudrate} (AlarmDecoder {self.version})"
+
+
+def candidate_ports(patterns: Iterable[str] = CANDIDATE_PATTERNS) -> list[str]:
+    """Return the serial ports worth probing, one path per device."""
+    paths: list[str] = []
+    seen: set[str] = set()
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            if (real := os.path.realpath(path)) not in seen:
+                seen.add(real)
+                paths.append(path)
+    return paths
+
+
+def parse_version(line: bytes) -> tuple[str, str] | None:
+    """Return the serial number and version of a !VER line."""
+    if not line.startswith(_VERSION_PREFIX):
+        return None
+    fields = line[len(_VERSION_PREFIX):].decode("ascii", "replace").split(",")
+    if len(fields) < 2:
+        return None
+    return fields[0].strip(), fields[1].strip()
+
+
+def _open_port(path: str) -> int:
+    """Open a serial port in raw, non-blocking mode."""
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    try:
+        attributes = termios.tcgetattr(fd)
+        attributes[0] = 0  # iflag
+        attributes[1] = 0  # oflag
+        attributes[2] = termios.CS8 | termios.CREAD | termios.CLOCAL  # cflag
+        attributes[3] = 0  # lflag
+        termios.tcsetattr(fd, termios.TCSANOW, attributes)
+    except termios.error:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _set_speed(fd: int, baudrate: int) -> None:
+    """Switch the port to baudrate and drop what was read at the last one."""
+    attributes = termios.tcgetattr(fd)
+    attributes[4] = attributes[5] = getattr(termios, f"B{baudrate}")
+    termios.tcsetattr(fd, termios.TCSANOW, attributes)
+    termios.tcflush(fd, termios.TCIOFLUSH)
+
+
+async def _query_version(
+    loop: asyncio.AbstractEventLoop, fd: int, timeout: float
+) -> tuple[tuple[str, str], float] | None:
+    """Ask for the version, return it with the latency if it came in time."""
+    answered: asyncio.Future[tuple[str, str]] = loop.create_future()
+    buffer = bytearray()
+
+    def readable() -> None:
+        try:
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError as err:
+            if not answered.done():
+                answered.set_exception(err)
+            return
+        buffer.extend(data)
+        *lines, rest = buffer.split(b"\n")
+        buffer[:] = rest
+        for line in lines:
+            if (version := parse_version(line.strip())) and not answered.done():
+                answered.set_result(version)
+
+    loop.add_reader(fd, readable)
+    try:
+        started = time.monotonic()
+        os.write(fd, _VERSION_QUERY)
+        version = await asyncio.wait_for(answered, timeout)
+        return version, time.monotonic() - started
+    except (TimeoutError, OSError):
+        return None
+    finally:
+        loop.remove_reader(fd)
+
+
+async def probe_port(
+    path: str,
+    baudrates: Sequence[int] = COMMON_BAUDRATES,
+    timeout: float = DEFAULT_PROBE_TIMEOUT,
+) -> ProbeResult | None:
+    """Find the baud rate at which a port answers like an AlarmDecoder.
+
+    One file descriptor can only run at one speed, so the rates are tried
+    in turn, most common first, each for timeout seconds.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        fd = await loop.run_in_executor(None, _open_port, path)
+    except (OSError, termios.error) as err:
+        _LOGGER.debug("Unable to open %s: %s", path, err)
+        return None
+    try:
+        for baudrate in baudrates:
+            _set_speed(fd, baudrate)
+            if (answer := await _query_version(loop, fd, timeout)) is not None:
+                (serial_number, version), latency = answer
+                return ProbeResult(path, baudrate, serial_number, version, latency)
+        return None
+    except termios.error as err:
+        _LOGGER.debug("Unable to configure %s: %s", path, err)
+        return None
+    finally:
+        os.close(fd)
+
+
+async def probe_ports(
+    paths: Iterable[str],
+    baudrates: Sequence[int] = COMMON_BAUDRATES,
+    timeout: float = DEFAULT_PROBE_TIMEOUT,
+) -> list[ProbeResult]:
+    """Probe every port at once, return the AlarmDecoders found, best first.
+
+    Ports that answered at the first baud rates, the usual ones, and faster
+    come first.
+    """
+    results = await asyncio.gather(
+        *(probe_port(path, baudrates, timeout) for path in paths)
+    )
+    found = [result for result in results if result is not None]
+    found.sort(key=lambda result: (baudrates.index(result.baudrate), result.latency))
+    return found
@@ -0,0 +1,149 @@
+"""Zone state table rebuilt in one pass after a connect."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+import logging
+
+from .decoder import (
+    KIND_KEYPAD,
+    STATUS_ALARM,
+    STATUS_ARMED,
+    STATUS_CHECK_ZONE,
+    STATUS_READY,
+    PanelEnvelope,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a resync may take, about a fault display cycle of 8 zones
+DEFAULT_RESYNC_TIMEOUT = 30.0
+
+# Keypad texts announcing a fault display (alarmdecoder's zone tracker)
+_FAULT_TEXTS = ("FAULT", "ALARM")
+# Prompt of a disarmed panel with faults it does not display yet
+_FAULT_PROMPT = "HIT * FOR FAULTS"
+
+
+def fault_zone(envelope: PanelEnvelope) -> int | None:
+    """Return the zone a keypad message displays as faulted, if any."""
+    if not (
+        envelope.status & STATUS_CHECK_ZONE or envelope.text.startswith(_FAULT_TEXTS)
+    ):
+        return None
+    try:
+        return int(envelope.message.parse_numeric_code())
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class ZoneResync:
+    """Learn every zone's state from the keypad right after a connect.
+
+    Without it, zone sensors only learn they are faulted when the panel's
+    fault display gets around to them. The first keypad message settles
+    most cases at once: a ready panel has no faulted zone. When the keypad
+    prompts "Hit * for faults", * is pressed and the faults displayed are
+    collected until the display wraps around. press may return None when
+    the key was already pressed since the link came up, by the resync of
+    another entry sharing the device.
+
+    The table is then published in one call, which writes every zone's
+    state in the same event loop iteration. Zones never displayed are
+    restored. A single fault never shows the display wrapping around, the
+    duplicate filters drop its repeats, so a resync still collecting after
+    timeout seconds publishes the table of the faults it saw. Without any
+    keypad message by then nothing is published.
+
+    Runs on the event loop. feed() gets the keypad messages of the entry's
+    keypads.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        zones: Callable[[], Iterable[int]],
+        press: Callable[[str], asyncio.Future | None],
+        publish: Callable[[dict[int, bool]], None],
+        timeout: float = DEFAULT_RESYNC_TIMEOUT,
+    ) -> None:
+        """Initialize an idle resync."""
+        self._loop = loop
+        self._zones = zones
+        self._press = press
+        self._publish = publish
+        self._timeout = timeout
+        self._timer: asyncio.TimerHandle | None = None
+        self._faulted: list[int] = []
+        self._pressed = False
+        self._seen = False
+        self.active = False
+        self.runs = 0
+
+    def start(self) -> None:
+        """Start collecting, unless a resync is already running."""
+        if self.active:
+            return
+        self.active = True
+        self._faulted = []
+        self._pressed = False
+        self._seen = False
+        self._timer = self._loop.call_later(self._timeout, self._expire)
+
+    def cancel(self) -> None:
+        """Stop collecting without publishing."""
+        self.active = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def feed(self, envelope: PanelEnvelope) -> None:
+        """Collect the zone states shown by a keypad message."""
+        if envelope.kind != KIND_KEYPAD:
+            return
+        self._seen = True
+        if envelope.status & STATUS_READY and not envelope.text.startswith("SYSTEM"):
+            self._finish({})
+            return
+        if (zone := fault_zone(envelope)) is not None:
+            if zone in self._faulted:
+                # The display wrapped around, every fault was shown
+                self._finish({zone: True for zone in self._faulted})
+            else:
+                self._faulted.append(zone)
+            return
+        if (
+            not self._pressed
+            and not envelope.status & (STATUS_ARMED | STATUS_ALARM)
+            and _FAULT_PROMPT in envelope.text.upper()
+        ):
+            self._pressed = True
+            if (future := self._press("*")) is not None:
+                future.add_done_callback(_log_press_error)
+
+    def _expire(self) -> None:
+        """Publish the faults seen when the display never wrapped around."""
+        self._timer = None
+        if not self.active:
+            return
+        _LOGGER.debug("Zone resync timed out with faults %s", self._faulted)
+        if not self._seen:
+            self.active = False
+            return
+        self._finish({zone: True for zone in self._faulted})
+
+    def _finish(self, faulted: dict[int, bool]) -> None:
+        """Publish the table, restoring the zones that were not displayed."""
+        self.cancel()
+        self.runs += 1
+        table = {zone: False for zone in self._zones()}
+        table.update(faulted)
+        _LOGGER.debug("Zone resync: %s", table)
+        self._publish(table)
+
+
+def _log_press_error(future: asyncio.Future) -> None:
+    """Log a keypress the resync could not send."""
+    if not future.cancelled() and (err := future.exception()) is not None:
+        _LOGGER.debug("Zone resync keypress not sent: %s", err)
@@ -0,0 +1,208 @@
+"""Keyed routing of AlarmDecoder messages to the entities that own them."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable
+from typing import Any
+
+# Changed bits passed to a BitRouter target that has no previous status word
+RESYNC = -1
+
+
+class KeyedRouter:
+    """Deliver a payload only to the targets subscribed to its key.
+
+    Targets are kept as tuples so dispatching never copies, and lookups
+    cost the same no matter how many keys are registered.
+    """
+
+    __slots__ = ("_targets",)
+
+    def __init__(self) -> None:
+        """Initialize an empty routing table."""
+        self._targets: dict[Hashable, tuple[Callable[..., Any], ...]] = {}
+
+    def subscribe(
+        self, key: Hashable, target: Callable[..., Any]
+    ) -> Callable[[], None]:
+        """Subscribe a target to a key and return a function to unsubscribe it."""
+        self._targets[key] = (*self._targets.get(key, ()), target)
+
+        def _unsubscribe() -> None:
+            targets = tuple(t for t in self._targets.get(key, ()) if t is not target)
+            if targets:
+                self._targets[key] = targets
+            else:
+                self._targets.pop(key, None)
+
+        return _unsubscribe
+
+    def dispatch(self, key: Hashable, *args: Any) -> bool:
+        """Deliver args to the targets of a key, return True if any received them."""
+        targets = self._targets.get(key)
+        if not targets:
+            return False
+        for target in targets:
+            target(*args)
+        return True
+
+    def dispatch_all(self, *args: Any) -> None:
+        """Deliver args to every subscribed target."""
+        for targets in tuple(self._targets.values()):
+            for target in targets:
+                target(*args)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return True if a key has subscribers."""
+        return key in self._targets
+
+    def __len__(self) -> int:
+        """Return the number of routed keys."""
+        return len(self._targets)
+
+
+class ChangeRouter(KeyedRouter):
+    """Keyed router that only delivers a key's value when it changes."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self) -> None:
+        """Initialize an empty routing table."""
+        super().__init__()
+        self._values: dict[Hashable, Any] = {}
+
+    def dispatch_changed(self, key: Hashable, value: Any, *args: Any) -> bool:
+        """Deliver args if value differs from the last one delivered for key."""
+        if key in self._values and self._values[key] == value:
+            return False
+        if not self.dispatch(key, *args):
+            return False
+        self._values[key] = value
+        return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """Deliver the next value of key even if it repeats the last one.
+
+        For targets whose state was changed by another source since.
+        """
+        self._values.pop(key, None)
+
+
+class MaskRouter(KeyedRouter):
+    """Route keypad messages to the entities of the keypads in an address mask.
+
+    Targets subscribe with a keypad address. A message's address mask is
+    ANDed with the mask of registered keypads, and only the targets of the
+    remaining bits are called.
+    """
+
+    __slots__ = ("_mask",)
+
+    def __init__(self) -> None:
+        """Initialize an empty routing table."""
+        super().__init__()
+        self._mask = 0
+
+    @property
+    def mask(self) -> int:
+        """Return the mask of keypad addresses with subscribers."""
+        return self._mask
+
+    def subscribe(self, key: int, target: Callable[..., Any]) -> Callable[[], None]:
+        """Subscribe a target to a keypad address."""
+        bit = 1 << key
+        unsubscribe = super().subscribe(bit, target)
+        self._mask |= bit
+
+        def _unsubscribe() -> None:
+            unsubscribe()
+            if bit not in self._targets:
+                self._mask &= ~bit
+
+        return _unsubscribe
+
+    def dispatch_mask(self, address_mask: int, *args: Any) -> int:
+        """Deliver args to the targets of every keypad in address_mask."""
+        pending = address_mask & self._mask
+        delivered = 0
+        while pending:
+            bit = pending & -pending
+            pending ^= bit
+            for target in self._targets.get(bit, ()):
+                target(*args)
+                delivered += 1
+        return delivered
+
+
+class BitRouter:
+    """Deliver keypad status words only to targets whose bits changed.
+
+    The last status word of each key (keypad address mask) is kept, and a
+    new word is XORed against it. Targets subscribe with the bits they
+    watch and are called with the payload and the changed bits, so an
+    unchanged status costs a single XOR no matter how many targets exist.
+
+    A target that just subscribed, or asked for it with refresh(), gets the
+    next word whatever changed, with changed set to RESYNC. So does every
+    target for the first word of a key. RESYNC has every bit set, and
+    consumers of transitions, like the event history, skip it.
+    """
+
+    __slots__ = ("_mask", "_pending", "_targets", "_words")
+
+    def __init__(self) -> None:
+        """Initialize an empty routing table."""
+        self._targets: tuple[tuple[int, Callable[..., Any]], ...] = ()
+        self._pending: tuple[tuple[int, Callable[..., Any]], ...] = ()
+        self._words: dict[Hashable, int] = {}
+        self._mask = 0
+
+    def subscribe(self, bits: int, target: Callable[..., Any]) -> Callable[[], None]:
+        """Subscribe a target to bits and return a function to unsubscribe it."""
+        entry = (bits, target)
+        self._targets = (*self._targets, entry)
+        self._mask |= bits
+        # The new target receives the current status with the next message
+        self._pending = (*self._pending, entry)
+
+        def _unsubscribe() -> None:
+            self._targets = tuple(e for e in self._targets if e is not entry)
+            self._pending = tuple(e for e in self._pending if e is not entry)
+            mask = 0
+            for watched, _target in self._targets:
+                mask |= watched
+            self._mask = mask
+
+        return _unsubscribe
+
+    def refresh(self, target: Callable[..., Any]) -> None:
+        """Deliver the next status word to target whatever changed."""
+        self._pending = (
+            *self._pending,
+            *(
+                entry
+                for entry in self._targets
+                if entry[1] == target and entry not in self._pending
+            ),
+        )
+
+    def dispatch(self, key: Hashable, status: int, payload: Any) -> int:
+        """Deliver payload to the targets of the bits that changed for key."""
+        previous = self._words.get(key)
+        self._words[key] = status
+        changed = RESYNC if previous is None else previous ^ status
+        pending = self._pending
+        if not changed & self._mask and not pending:
+            return 0
+        self._pending = ()
+        delivered = 0
+        for entry in self._targets:
+            bits, target = entry
+            if entry in pending:
+                target(payload, RESYNC)
+            elif changed & bits:
+                target(payload, changed)
+            else:
+                continue
+            delivered += 1
+        return delivered
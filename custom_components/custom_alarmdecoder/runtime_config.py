@@ -0,0 +1,125 @@
+"""Immutable snapshot of the options read by the message handlers."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+from .const import (
+    CONF_AUTO_DETECT_ZONES,
+    CONF_COMMAND_INTERVAL,
+    CONF_DEDUP_WINDOW,
+    CONF_FANOUT_HOST,
+    CONF_FANOUT_PORT,
+    CONF_KEYPADS,
+    CONF_MANAGE_DEVICE_CONFIG,
+    CONF_MIN_WRITE_INTERVAL,
+    CONF_PROCESSING_PROFILE,
+    CONF_RELAY_ADDR,
+    CONF_SCAN_PANEL,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_TRACE_SIGNALS,
+    CONF_ZONE_RFID,
+    DEFAULT_ARM_OPTIONS,
+    DEFAULT_AUTO_DETECT_ZONES,
+    DEFAULT_COMMAND_INTERVAL,
+    DEFAULT_DEDUP_WINDOW,
+    DEFAULT_FANOUT_HOST,
+    DEFAULT_FANOUT_PORT,
+    DEFAULT_MANAGE_DEVICE_CONFIG,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    DEFAULT_PROCESSING_PROFILE,
+    DEFAULT_SCAN_PANEL,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    OPTIONS_ARM,
+    OPTIONS_KEYPADS,
+    OPTIONS_ZONES,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RuntimeConfig:
+    """Config entry options, flattened once per options version.
+
+    Handlers read the snapshot instead of walking entry.options for every
+    message. A new snapshot is built when entry.options is replaced, and
+    swapped in with a single assignment.
+    """
+
+    # The options mapping this snapshot was built from
+    options: Mapping[str, Any]
+    keypads: frozenset[int]
+    zones: frozenset[int]
+    # RF serial -> zone number
+    rfid_zones: Mapping[str, int]
+    # Relay and expander addresses read by zones
+    relay_addresses: frozenset[int]
+    auto_detect_zones: bool
+    scan_panel: bool
+    dedup_window: float
+    min_write_interval: float
+    # Seconds between keypad commands sent to the device
+    command_interval: float
+    # ser2sock fan-out server address, port 0 disables it
+    fanout_host: str
+    fanout_port: int
+    # Write the device's filtering settings, see device_config
+    manage_device_config: bool
+    # One of PROFILES, decides which optional entities are created
+    profile: str
+    # Percentage of hot path events traced, 0 disables tracing
+    trace_sample_rate: int
+    # Traced signals, empty traces all of them
+    trace_signals: frozenset[str]
+
+    @classmethod
+    def from_entry(
+        cls, data: Mapping[str, Any], options: Mapping[str, Any]
+    ) -> RuntimeConfig:
+        """Build a snapshot from config entry data and options."""
+        arm_options = options.get(OPTIONS_ARM, DEFAULT_ARM_OPTIONS)
+        zones = options.get(OPTIONS_ZONES, {})
+        return cls(
+            options=options,
+            keypads=frozenset(
+                options.get(OPTIONS_KEYPADS, data.get(CONF_KEYPADS)) or ()
+            ),
+            zones=frozenset(int(zone) for zone in zones),
+            rfid_zones=MappingProxyType(
+                {
+                    zone_config[CONF_ZONE_RFID]: int(zone)
+                    for zone, zone_config in zones.items()
+                    if zone_config.get(CONF_ZONE_RFID)
+                }
+            ),
+            relay_addresses=frozenset(
+                int(zone_config[CONF_RELAY_ADDR])
+                for zone_config in zones.values()
+                if zone_config.get(CONF_RELAY_ADDR) is not None
+            ),
+            auto_detect_zones=arm_options.get(
+                CONF_AUTO_DETECT_ZONES, DEFAULT_AUTO_DETECT_ZONES
+            ),
+            scan_panel=arm_options.get(CONF_SCAN_PANEL, DEFAULT_SCAN_PANEL),
+            dedup_window=arm_options.get(CONF_DEDUP_WINDOW, DEFAULT_DEDUP_WINDOW),
+            min_write_interval=arm_options.get(
+                CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL
+            ),
+            command_interval=arm_options.get(
+                CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL
+            ),
+            fanout_host=arm_options.get(CONF_FANOUT_HOST, DEFAULT_FANOUT_HOST),
+            fanout_port=arm_options.get(CONF_FANOUT_PORT, DEFAULT_FANOUT_PORT),
+            manage_device_config=arm_options.get(
+                CONF_MANAGE_DEVICE_CONFIG, DEFAULT_MANAGE_DEVICE_CONFIG
+            ),
+            profile=arm_options.get(
+                CONF_PROCESSING_PROFILE, DEFAULT_PROCESSING_PROFILE
+            ),
+            trace_sample_rate=arm_options.get(
+                CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE
+            ),
+            trace_signals=frozenset(arm_options.get(CONF_TRACE_SIGNALS) or ()),
+        )
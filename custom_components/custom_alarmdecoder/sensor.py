@@ -7,26 +7,50 @@ import logging
 from typing import Any
 
 from homeassistant.components.sensor import SensorEntity
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
-from . import AlarmDecoderConfigEntry
+from . import AlarmDecoderConfigEntry, runtime_config
 from .const import (
     CONF_KEYPADS,
+    DOMAIN,
     OPTIONS_KEYPADS,
-    SIGNAL_PANEL_MESSAGE,
+    PROFILE_FULL,
+    SIGNAL_PANIC,
+    SIGNAL_RFX_MESSAGE,
     SIGNAL_ZONE_FAULT,
     SIGNAL_ZONE_RESTORE,
-    SIGNAL_RFX_MESSAGE,
+)
+from .decoder import (
+    STATUS_ALARM_EVENT_OCCURRED,
+    STATUS_ARMED,
+    STATUS_ARMED_AWAY,
+    STATUS_ARMED_HOME,
+    STATUS_CHIME_ON,
+    STATUS_PROGRAMMING_MODE,
+    STATUS_READY,
+    STATUS_ZONE_BYPASSED,
+    PanelEnvelope,
+    RfStatus,
 )
 from .entity import AlarmDecoderEntity
+from .router import RESYNC, BitRouter, KeyedRouter, MaskRouter
 
 _LOGGER = logging.getLogger(__name__)
 
 MAX_EVENTS = 50
 
+# Status bits whose changes are logged in the event history
+_HISTORY_BITS = (
+    STATUS_ARMED
+    | STATUS_CHIME_ON
+    | STATUS_ZONE_BYPASSED
+    | STATUS_ALARM_EVENT_OCCURRED
+    | STATUS_READY
+    | STATUS_PROGRAMMING_MODE
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -60,22 +84,35 @@ async def async_setup_entry(
     if not keypads:
         return
 
+    config = runtime_config(entry)
+    min_write_interval = config.min_write_interval
     entities: list[SensorEntity] = [
         AlarmDecoderSensor(
             client=client,
+            keypad_router=entry.runtime_data.keypad_router,
             address=address,
+            min_write_interval=min_write_interval,
         )
         for address in keypads
     ]
 
-    # Add event history sensor
-    entities.append(
-        EventHistorySensor(
-            client=client,
-            unique_id=f"{serial}-event-history",
-            name="Alarm Event History",
+    # Add event history sensor, only kept by the full profile
+    history_id = f"{serial}-event-history"
+    if config.profile == PROFILE_FULL:
+        entities.append(
+            EventHistorySensor(
+                client=client,
+                status_router=entry.runtime_data.status_router,
+                signal_router=entry.runtime_data.signal_router,
+                unique_id=history_id,
+                name="Alarm Event History",
+            )
+        )
+    elif entity_id := entity_reg.async_get_entity_id("sensor", DOMAIN, history_id):
+        entity_reg.async_remove(entity_id)
+        _LOGGER.debug(
+            "Removed %s, not used by the %s profile", entity_id, config.profile
         )
-    )
 
     async_add_entities(entities)
 
@@ -85,45 +122,33 @@ class AlarmDecoderSensor(AlarmDecoderEntity, SensorEntity):
 
     _attr_should_poll = False
 
-    def __init__(self, client, address: int) -> None:
+    def __init__(
+        self,
+        client,
+        keypad_router: MaskRouter,
+        address: int,
+        min_write_interval: float = 0,
+    ) -> None:
         """Initialize the sensor."""
         super().__init__(client)
+        self._keypad_router = keypad_router
         self._address = address
+        self._min_write_interval = min_write_interval
         self._attr_unique_id = f"{client.serial_number}-display-{address}"
         self._attr_name = f"Keypad {address} Display"
 
     async def async_added_to_hass(self) -> None:
         """Register callback."""
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_PANEL_MESSAGE, self._message_callback
-            )
+            self._keypad_router.subscribe(self._address, self._message_callback)
         )
 
-    @staticmethod
-    def _extract_keypad_addresses(message) -> list[int]:
-        """Extract target keypad addresses from a panel message."""
-        if message.raw[0] != "[":
-            return []
-        raw = message.raw[28:58]
-        raw = bin(int(raw, 16))[2:]
-        raw = str(raw[8:40])
-        byte0 = raw[0:8][::-1]
-        byte1 = raw[8:16][::-1]
-        byte2 = raw[16:24][::-1]
-        byte3 = raw[24:35][::-1]
-        sorted_bin = byte0 + byte1 + byte2 + byte3
-        return [i for i in range(len(sorted_bin)) if sorted_bin[i] == "1"]
-
-    def _message_callback(self, message) -> None:
+    @callback
+    def _message_callback(self, envelope: PanelEnvelope) -> None:
         """Update display text for this keypad."""
-        keypads = self._extract_keypad_addresses(message)
-        if self._address not in keypads:
-            return
-
-        if self._attr_native_value != message.text:
-            self._attr_native_value = message.text
-            self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+        if self._attr_native_value != envelope.text:
+            self._attr_native_value = envelope.text
+            self.async_write_coalesced()
 
 
 class EventHistorySensor(AlarmDecoderEntity, SensorEntity):
@@ -132,9 +157,18 @@ class EventHistorySensor(AlarmDecoderEntity, SensorEntity):
     _attr_should_poll = False
     _attr_icon = "mdi:history"
 
-    def __init__(self, client, unique_id: str, name: str) -> None:
+    def __init__(
+        self,
+        client,
+        status_router: BitRouter,
+        signal_router: KeyedRouter,
+        unique_id: str,
+        name: str,
+    ) -> None:
         """Initialize the event history sensor."""
         super().__init__(client)
+        self._status_router = status_router
+        self._signal_router = signal_router
         self._attr_unique_id = unique_id
         self._attr_name = name
         self._events: list[dict[str, Any]] = []
@@ -144,26 +178,22 @@ class EventHistorySensor(AlarmDecoderEntity, SensorEntity):
     async def async_added_to_hass(self) -> None:
         """Register callbacks for all event signals."""
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_PANEL_MESSAGE, self._panel_callback
-            )
+            self._status_router.subscribe(_HISTORY_BITS, self._panel_callback)
         )
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_ZONE_FAULT, self._fault_callback
-            )
+            self._signal_router.subscribe(SIGNAL_ZONE_FAULT, self._fault_callback)
         )
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_ZONE_RESTORE, self._restore_callback
-            )
+            self._signal_router.subscribe(SIGNAL_ZONE_RESTORE, self._restore_callback)
         )
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_RFX_MESSAGE, self._rfx_callback
-            )
+            self._signal_router.subscribe(SIGNAL_RFX_MESSAGE, self._rfx_callback)
+        )
+        self.async_on_remove(
+            self._signal_router.subscribe(SIGNAL_PANIC, self._panic_event_callback)
         )
 
+    @callback
     def _add_event(self, event_type: str, details: str) -> None:
         """Add an event to history."""
         now = datetime.now()
@@ -181,48 +211,50 @@ class EventHistorySensor(AlarmDecoderEntity, SensorEntity):
             "events": self._events,
             "total_events": len(self._events),
         }
-        self.hass.loop.call_soon_threadsafe(lambda: self.async_write_ha_state())
+        self.async_write_ha_state()
 
-    def _panel_callback(self, message) -> None:
-        """Handle panel messages for arm/disarm/chime events."""
-        if not hasattr(message, "raw") or not message.raw or message.raw[0] != "[":
+    @callback
+    def _panel_callback(self, envelope: PanelEnvelope, changed: int) -> None:
+        """Handle changed status bits for arm/disarm/chime events."""
+        if changed == RESYNC:
+            # The current status, not a transition
             return
-
-        text = message.text if message.text else ""
+        status = envelope.status
 
         # Detect arm/disarm events from bitfield
-        if hasattr(message, "armed_away"):
-            if message.armed_away:
+        if changed & STATUS_ARMED:
+            if status & STATUS_ARMED_AWAY:
                 self._add_event("ARM_AWAY", "Alarma armada (salida)")
-            elif message.armed_home:
+            elif status & STATUS_ARMED_HOME:
                 self._add_event("ARM_HOME", "Alarma armada (estancia)")
-            elif not message.armed_away and not message.armed_home:
-                # Check if was previously armed (disarm event)
-                pass
 
         # Detect chime
-        if hasattr(message, "chime_on") and message.chime_on:
+        if changed & STATUS_CHIME_ON and status & STATUS_CHIME_ON:
             self._add_event("CHIME", "Chime activado")
 
         # Detect zone bypass
-        if hasattr(message, "zone_bypassed") and message.zone_bypassed:
+        if changed & STATUS_ZONE_BYPASSED and status & STATUS_ZONE_BYPASSED:
             self._add_event("BYPASS", "Zona en bypass")
 
         # Detect alarm triggered
-        if hasattr(message, "alarm_event_occurred") and message.alarm_event_occurred:
+        if (
+            changed & STATUS_ALARM_EVENT_OCCURRED
+            and status & STATUS_ALARM_EVENT_OCCURRED
+        ):
             self._add_event("ALARM", "Alarma disparada")
 
         # Detect ready state changes
-        if hasattr(message, "ready"):
-            if message.ready:
+        if changed & STATUS_READY:
+            if status & STATUS_READY:
                 self._add_event("READY", "Panel listo")
             else:
                 self._add_event("NOT_READY", "Panel no listo")
 
         # Detect programming mode
-        if hasattr(message, "programming_mode") and message.programming_mode:
+        if changed & STATUS_PROGRAMMING_MODE and status & STATUS_PROGRAMMING_MODE:
             self._add_event("PROGRAMMING", "Modo programación")
 
+    @callback
     def _fault_callback(self, zone) -> None:
         """Handle zone fault events."""
         if zone is not None:
@@ -230,6 +262,7 @@ class EventHistorySensor(AlarmDecoderEntity, SensorEntity):
         else:
             self._add_event("FAULT", "Zona desconocida abierta")
 
+    @callback
     def _restore_callback(self, zone) -> None:
         """Handle zone restore events."""
         if zone is not None:
@@ -237,11 +270,18 @@ class EventHistorySensor(AlarmDecoderEntity, SensorEntity):
         else:
             self._add_event("RESTORE", "Zona desconocida cerrada")
 
-    def _rfx_callback(self, message) -> None:
+    @callback
+    def _rfx_callback(self, serial: str, status: RfStatus) -> None:
         """Handle RF events."""
-        if message and hasattr(message, "serial_number"):
-            serial = message.serial_number
-            if hasattr(message, "battery") and message.battery:
-                self._add_event("RF_BATTERY", f"Sensor {serial} batería baja")
-            if hasattr(message, "supervision") and not message.supervision:
-                self._add_event("RF_SUPERVISION", f"Sensor {serial} sin supervisión")
+        if status.low_battery:
+            self._add_event("RF_BATTERY", f"Sensor {serial} batería baja")
+        if not status.supervised:
+            self._add_event("RF_SUPERVISION", f"Sensor {serial} sin supervisión")
+
+    @callback
+    def _panic_event_callback(self, status: bool) -> None:
+        """Handle panic events."""
+        if status:
+            self._add_event("PANIC", "Pánico activado")
+        else:
+            self._add_event("PANIC_RESTORE", "Pánico cancelado")
@@ -5,22 +5,23 @@ import logging
 from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
 
 from . import AlarmDecoderConfigEntry
+from .commands import CommandQueue
 from .const import (
-    OPTIONS_ARM,
-    OPTIONS_ZONES,
     CONF_BYPASSABLE,
     CONF_ZONE_NAME,
     CONF_ZONE_TYPE,
     DEFAULT_ZONE_OPTIONS,
-    SIGNAL_PANEL_MESSAGE,
+    OPTIONS_ARM,
+    OPTIONS_ZONES,
 )
+from .decoder import STATUS_CHIME_ON, PanelEnvelope
 from .entity import AlarmDecoderEntity
+from .router import BitRouter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,6 +41,8 @@ async def async_setup_entry(
 
     chime_switch = AlarmDecoderChimeSwitch(
         controller,
+        entry.runtime_data.connection.commands,
+        entry.runtime_data.status_router,
         entry.entry_id,
         alarm_code
     )
@@ -148,11 +151,15 @@ class AlarmDecoderChimeSwitch(AlarmDecoderEntity, SwitchEntity):
     def __init__(
         self,
         controller,
+        commands: CommandQueue,
+        status_router: BitRouter,
         entry_id: str,
         code: str,
     ) -> None:
         """Initialize the chime switch."""
         super().__init__(controller)
+        self._commands = commands
+        self._status_router = status_router
         
         self._entry_id = entry_id
         self._code = code
@@ -163,11 +170,9 @@ class AlarmDecoderChimeSwitch(AlarmDecoderEntity, SwitchEntity):
         self._is_on = False
 
     async def async_added_to_hass(self) -> None:
-        """Register callback for panel messages."""
+        """Register callback for changes of the chime bit."""
         self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_PANEL_MESSAGE, self._message_callback
-            )
+            self._status_router.subscribe(STATUS_CHIME_ON, self._message_callback)
         )
 
     @property
@@ -194,7 +199,9 @@ class AlarmDecoderChimeSwitch(AlarmDecoderEntity, SwitchEntity):
         if self._client:
             _LOGGER.debug("Turning on chime via alarm_toggle_chime service")
             # Use alarm_toggle_chime service with user code + "9"
-            self._client.send(f"{self._code}9")
+            await self._commands.submit(f"{self._code}9")
+            # Let the panel's next status confirm or revert the change
+            self._status_router.refresh(self._message_callback)
             self._is_on = True
             self._attr_icon = "mdi:bell-ring"
             self.async_write_ha_state()
@@ -204,23 +211,18 @@ class AlarmDecoderChimeSwitch(AlarmDecoderEntity, SwitchEntity):
         if self._client:
             _LOGGER.debug("Turning off chime via alarm_toggle_chime service")
             # Use alarm_toggle_chime service with user code + "9"
-            self._client.send(f"{self._code}9")
+            await self._commands.submit(f"{self._code}9")
+            self._status_router.refresh(self._message_callback)
             self._is_on = False
             self._attr_icon = "mdi:bell-off"
             self.async_write_ha_state()
 
-    def _message_callback(self, message) -> None:
+    @callback
+    def _message_callback(self, envelope: PanelEnvelope, changed: int) -> None:
         """Handle incoming AlarmDecoder messages to update chime status."""
-        if not hasattr(message, "raw") or not message.raw or message.raw[0] != "[":
-            return
-
-        new_state = getattr(message, "chime_on", None)
-        if new_state is None:
-            return
-
+        new_state = bool(envelope.status & STATUS_CHIME_ON)
         if new_state != self._is_on:
             _LOGGER.debug("Chime state changed from message: %s", new_state)
             self._is_on = new_state
             self._attr_icon = "mdi:bell-ring" if new_state else "mdi:bell-off"
-            if self.hass and self.hass.loop.is_running():
-                self.hass.loop.call_soon_threadsafe(self.async_write_ha_state)
\ No newline at end of file
+            self.async_write_ha_state()
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""Sampled, bounded in-memory trace of the integration's hot paths."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable
+from datetime import datetime
+import time
+from typing import Any
+
+from .const import TRACE_SIGNALS
+
+DEFAULT_MAXLEN = 500
+
+# Sampling credit needed to record an event, in percent
+_FULL_CREDIT = 100
+
+
+class Tracer:
+    """Record a sample of hot path events instead of logging each one.
+
+    Each signal keeps its own sampling credit, so with a rate of 10 one in
+    every ten events of a signal is recorded, starting with the first.
+    Signals outside the filter are never recorded. Events are kept in a
+    bounded buffer and the oldest ones are dropped when it is full.
+
+    Call sites check enabled before building the event, so a disabled
+    tracer costs a single branch per message:
+
+        if tracer.enabled:
+            tracer.record(TRACE_AUI, raw[:100])
+
+    The reader thread and the event loop both record. Sampling credit is
+    not locked, so a race may shift a sample by an event, never lose the
+    buffer.
+    """
+
+    __slots__ = (
+        "_buffer",
+        "_clock",
+        "_credit",
+        "_rate",
+        "enabled",
+        "recorded",
+        "sampled_out",
+    )
+
+    def __init__(
+        self,
+        sample_rate: int = 0,
+        signals: Iterable[str] = (),
+        maxlen: int = DEFAULT_MAXLEN,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize the tracer.
+
+        sample_rate is the percentage of events recorded, 0 disables
+        tracing. An empty signals filter traces every signal.
+        """
+        self._rate = max(0, min(sample_rate, _FULL_CREDIT))
+        self._clock = clock
+        self._buffer: deque[tuple[float, str, tuple[Any, ...]]] = deque(
+            maxlen=maxlen
+        )
+        self._credit = dict.fromkeys(signals or TRACE_SIGNALS, _FULL_CREDIT)
+        self.enabled = self._rate > 0
+        self.recorded = 0
+        self.sampled_out = 0
+
+    @property
+    def signals(self) -> frozenset[str]:
+        """Return the traced signals."""
+        return frozenset(self._credit)
+
+    def record(self, signal: str, *fields: Any) -> None:
+        """Record an event of signal if it is sampled."""
+        credit = self._credit.get(signal)
+        if credit is None:
+            return
+        if credit < _FULL_CREDIT:
+            self._credit[signal] = credit + self._rate
+            self.sampled_out += 1
+            return
+        self._credit[signal] = credit - _FULL_CREDIT + self._rate
+        self._buffer.append((self._clock(), signal, fields))
+        self.recorded += 1
+
+    def dump(self, clear: bool = False) -> list[dict[str, Any]]:
+        """Return the buffered events, oldest first."""
+        events = [
+            {
+                "time": datetime.fromtimestamp(timestamp).isoformat(),
+                "signal": signal,
+                "fields": list(fields),
+            }
+            for timestamp, signal, fields in list(self._buffer)
+        ]
+        if clear:
+            self._buffer.clear()
+        return events
@@ -0,0 +1,149 @@
+"""AlarmDecoder devices read on the event loop instead of a reader thread."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+
+from alarmdecoder.devices.base_device import Device
+from alarmdecoder.util import CommError, InvalidMessageError, NoDeviceError
+import serial_asyncio_fast
+
+from .framing import LineProtocol
+
+_LOGGER = logging.getLogger(__name__)
+
+Connect = Callable[
+    [Callable[[], asyncio.BaseProtocol]],
+    Awaitable[tuple[asyncio.BaseTransport, asyncio.BaseProtocol]],
+]
+
+
+class AsyncioDevice(Device):
+    """AlarmDecoder device whose lines are framed and decoded on the loop.
+
+    Drop-in for SocketDevice and SerialDevice without their blocking reader
+    thread. The connection is made with async_connect(), then AdExt.open()
+    only wires the events and sends the config and version requests. Every
+    framed line goes straight to the AlarmDecoder's on_read handler on the
+    loop. write() and close() may be called from executor threads, they are
+    moved to the loop.
+    """
+
+    def __init__(self, device_id: str, connect: Connect) -> None:
+        """Initialize the device."""
+        super().__init__()
+        self._id = device_id
+        self._connect = connect
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._protocol: LineProtocol | None = None
+        self._transport: asyncio.WriteTransport | None = None
+
+    @property
+    def framer_stats(self) -> tuple[int, int]:
+        """Return the lines framed and dropped for overflowing the buffer."""
+        if self._protocol is None:
+            return 0, 0
+        return self._protocol.framer.lines, self._protocol.framer.overflows
+
+    async def async_connect(self) -> None:
+        """Connect to the device."""
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._transport, self._protocol = await self._connect(
+                lambda: LineProtocol(self._line_received, self._connection_lost)
+            )
+        except OSError as err:
+            raise NoDeviceError(f"Error opening device at {self._id}", err) from err
+
+    def open(self, baudrate=None, no_reader_thread=False):
+        """Open the connected device, called by AlarmDecoder.open()."""
+        if self._transport is None:
+            raise NoDeviceError(f"Device at {self._id} is not connected")
+        self._running = True
+        self.on_open()
+        return self
+
+    def close(self):
+        """Close the device."""
+        if not self._in_loop():
+            self._loop.call_soon_threadsafe(self.close)
+            return
+        self._running = False
+        if self._transport is not None:
+            transport, self._transport = self._transport, None
+            transport.close()
+        self.on_close()
+
+    def is_reader_alive(self):
+        """Return whether the device is still connected, there is no thread."""
+        return self._running and self._transport is not None
+
+    def write(self, data):
+        """Write data to the device."""
+        if self._transport is None:
+            raise CommError("Error writing to device.")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if self._in_loop():
+            self._write(data)
+        else:
+            self._loop.call_soon_threadsafe(self._write, data)
+        return len(data)
+
+    def _write(self, data: bytes) -> None:
+        """Write data on the loop."""
+        if self._transport is None or self._transport.is_closing():
+            _LOGGER.warning("Dropped write to closed device at %s", self._id)
+            return
+        self._transport.write(data)
+        self.on_write(data=data)
+
+    def _in_loop(self) -> bool:
+        """Return whether the caller runs in the device's event loop."""
+        if self._loop is None:
+            return True
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _line_received(self, line: bytes) -> None:
+        """Decode a framed line."""
+        try:
+            self.on_read(data=line)
+        except InvalidMessageError:
+            # Ignored by the reader thread as well
+            pass
+        except Exception:
+            _LOGGER.exception("Error handling line from %s: %r", self._id, line)
+
+    def _connection_lost(self, exc: Exception | None) -> None:
+        """Close the device after an unexpected loss of connection."""
+        self._transport = None
+        if self._running:
+            _LOGGER.debug("Connection to %s lost: %s", self._id, exc)
+            self.close()
+
+
+def socket_device(host: str, port: int) -> AsyncioDevice:
+    """Return a device connecting to a ser2sock/AlarmDecoder TCP server."""
+
+    def connect(protocol_factory):
+        loop = asyncio.get_running_loop()
+        return loop.create_connection(protocol_factory, host, port)
+
+    return AsyncioDevice(f"{host}:{port}", connect)
+
+
+def serial_device(path: str, baudrate: int) -> AsyncioDevice:
+    """Return a device connecting to a serial AlarmDecoder."""
+
+    def connect(protocol_factory):
+        loop = asyncio.get_running_loop()
+        return serial_asyncio_fast.create_serial_connection(
+            loop, protocol_factory, path, baudrate=baudrate
+        )
+
+    return AsyncioDevice(path, connect)
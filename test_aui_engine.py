@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest del motor de peticiones AUI y del escaneo del panel
+"""
+
+import asyncio
+
+import pytest
+
+from custom_components.custom_alarmdecoder.aui import (
+    AuiEngine,
+    RttEstimator,
+    ascii_to_hex,
+    parse_partition_count,
+    parse_zone_data,
+    scan_zones,
+    zone_data_command,
+    zone_matcher,
+)
+
+ZONES = {1: "FRONT DOOR", 5: "GARAGE", 12: "KITCHEN"}
+
+
+def zone_answer(zone, name=None):
+    """Respuesta !AUI con la programación de una zona, tipo 0 si no se usa."""
+    device_type = "1" if name else "0"
+    fields = [f"{zone:03d}", "3", device_type, name or ""]
+    return "!AUI:17020000000057fefefeec" + "00".join(ascii_to_hex(f) for f in fields)
+
+
+def partition_answer(count):
+    return "!AUI:0c020000000057fefefd" + ascii_to_hex(str(count))
+
+
+class FakePanel:
+    """Panel que contesta cada petición AUI tras rtt segundos."""
+
+    def __init__(self, loop, partitions=2, rtt=0.002):
+        self.loop = loop
+        self.partitions = partitions
+        self.rtt = rtt
+        self.sent = []
+        # Peticiones que el panel no contesta (se pierden una vez)
+        self.drop = set()
+        self.engine = AuiEngine(loop, self.send, RttEstimator(0.5, 0.02, 1.0))
+
+    def send(self, command):
+        self.sent.append(command)
+        future = self.loop.create_future()
+        future.set_result(True)
+        if command in self.drop:
+            self.drop.discard(command)
+        else:
+            self.loop.call_later(self.rtt, self.engine.handle_message, self.answer(command))
+        return future
+
+    def answer(self, command):
+        if command.startswith("00606b"):
+            return partition_answer(self.partitions)
+        zone = int(bytes.fromhex(command[-14:-8]).decode())
+        return zone_answer(zone, ZONES.get(zone))
+
+
+def test_parsers():
+    """Las respuestas se reconocen por su contenido, también las zonas sin usar"""
+    assert parse_partition_count(partition_answer(2)[5:]) == 2
+    used = parse_zone_data(zone_answer(12, "KITCHEN")[5:])
+    assert used["address"] == "012" and used["zone_name"] == "KITCHEN"
+    assert used["used"]
+    assert not parse_zone_data(zone_answer(7)[5:])["used"]
+    # Una respuesta de otra zona no contesta la petición
+    assert zone_matcher(5)(zone_answer(12, "KITCHEN")[5:]) is None
+    assert zone_matcher(10)(zone_answer(10)[5:]) is not None
+
+
+def test_stale_answer_ignored_and_lost_request_retried():
+    """Una respuesta tardía de otra zona se ignora y la petición perdida se repite"""
+
+    async def scenario():
+        panel = FakePanel(asyncio.get_running_loop())
+        command = zone_data_command(0, 5)
+        panel.drop.add(command)
+        request = asyncio.ensure_future(panel.engine.request(command, zone_matcher(5)))
+        await asyncio.sleep(0.01)
+        panel.engine.handle_message(zone_answer(1, "FRONT DOOR"))
+        result = await request
+        assert result["zone_name"] == "GARAGE"
+        assert panel.sent == [command, command]
+        stats = panel.engine.stats()
+        assert stats["retries"] == 1 and stats["ignored"] == 1
+        # Karn: la petición repetida no se mide
+        assert panel.engine.rtt.srtt is None
+
+    asyncio.run(scenario())
+
+
+def test_timeout_follows_round_trip_and_fail_aborts():
+    """El plazo baja con el RTT medido, un panel mudo da TimeoutError"""
+
+    async def scenario():
+        panel = FakePanel(asyncio.get_running_loop())
+        for zone in range(5):
+            await panel.engine.request(zone_data_command(0, zone), zone_matcher(zone))
+        assert panel.engine.rtt.timeout < 0.1
+
+        panel.drop.add(zone_data_command(0, 6))
+        with pytest.raises(TimeoutError):
+            # Sin reintentos, la respuesta perdida no llega nunca
+            await panel.engine.request(
+                zone_data_command(0, 6), zone_matcher(6), retries=0
+            )
+        assert panel.engine.timeouts == 1
+
+        # Al cerrarse el dispositivo la petición pendiente falla enseguida
+        panel.drop.add(zone_data_command(0, 7))
+        request = asyncio.ensure_future(
+            panel.engine.request(zone_data_command(0, 7), zone_matcher(7))
+        )
+        await asyncio.sleep(0.01)
+        panel.engine.fail()
+        with pytest.raises(ConnectionError):
+            await request
+
+    asyncio.run(scenario())
+
+
+def test_scan_sends_each_request_once_and_reports_progress():
+    """Cada petición sale en cuanto llega la respuesta anterior, sin reenvíos"""
+
+    async def scenario():
+        panel = FakePanel(asyncio.get_running_loop(), partitions=2)
+        progress = []
+        found = await scan_zones(
+            panel.engine, progress=lambda done, total: progress.append((done, total))
+        )
+        assert sorted(zone["address"] for zone in found) == ["001", "005", "012"]
+        assert progress == [(done, 96) for done in range(1, 97)]
+        # La cuenta de particiones y 48 zonas por partición
+        assert len(panel.sent) == 1 + 96
+        assert panel.engine.stats()["answered"] == 97
+        assert panel.engine.retries == 0 and panel.engine.ignored == 0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest de la cola de comandos con prioridad, pausa y confirmación
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.custom_alarmdecoder import commands
+from custom_components.custom_alarmdecoder.commands import (
+    PRIORITY_ARM,
+    PRIORITY_AUI,
+    PRIORITY_DISARM,
+    CommandQueue,
+)
+
+AUI = "K01|006f620c4549f531fb4543f5303031fb436c\r\n"
+
+
+class FakeDevice:
+    """Dispositivo que confirma cada envío con !Sending...done."""
+
+    def __init__(self, loop, ack=True, good=True):
+        self.loop = loop
+        self.ack = ack
+        self.good = good
+        self.written = []
+        self.queue = None
+
+    async def send(self, data):
+        self.written.append(data)
+        if self.ack and not data.startswith("K01|"):
+            # La confirmación llega desde el hilo lector, un poco después
+            self.loop.call_later(
+                0.005, self.queue.handle_ack, self, self.good, "!Sending.done"
+            )
+
+
+def run(scenario, **device_options):
+    async def main():
+        loop = asyncio.get_running_loop()
+        device = FakeDevice(loop, **device_options)
+        queue = CommandQueue(loop, device.send, interval=0.01, ack_timeout=0.05)
+        device.queue = queue
+        return await scenario(queue, device)
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def test_bypass_and_arm_are_not_interleaved():
+    """Bypass y armado salen juntos aunque haya AUI en cola; el desarmado primero"""
+
+    async def scenario(queue, device):
+        scan = [queue.submit(AUI, priority=PRIORITY_AUI, ack=False)]
+        await asyncio.sleep(0)
+        scan += [queue.submit(AUI, priority=PRIORITY_AUI, ack=False) for _ in range(2)]
+        arm = queue.submit("123461520*", "12342", priority=PRIORITY_ARM)
+        disarm = queue.submit("12341", priority=PRIORITY_DISARM)
+        results = await asyncio.gather(*scan, arm, disarm)
+        return results, device.written, queue
+
+    results, written, queue = run(scenario)
+    # El primer AUI ya se había enviado cuando llegó el resto
+    assert written == [AUI, "12341", "123461520*", "12342", AUI, AUI]
+    assert results == [True] * 5
+    assert queue.sent == 6 and queue.depth == 0
+    assert queue.high_water == 4
+    assert queue.latency.count == 5
+
+
+def test_commands_are_paced(monkeypatch):
+    """Antes de cada comando se espera lo que falta del intervalo configurado"""
+    # Reloj simulado: solo avanza con las esperas de la cola
+    clock = [100.0]
+    waits = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        waits.append(round(delay, 6))
+        clock[0] += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(commands, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+    async def scenario(queue, device):
+        queue.interval = 0.03
+        first = queue.submit("1", ack=False)
+        await first
+        clock[0] += 0.01
+        await asyncio.gather(*(queue.submit(f"{key}", ack=False) for key in (2, 3)))
+        return device.written
+
+    assert run(scenario) == ["1", "2", "3"]
+    # El primero sale sin esperar, el segundo ya llevaba 0.01 s esperando
+    assert waits == [0.02, 0.03]
+
+
+def test_failed_and_missing_acks():
+    """Un envío fallido resuelve False y una confirmación que no llega, None"""
+
+    async def failed(queue, device):
+        return await queue.submit("12349"), queue.failed
+
+    async def missing(queue, device):
+        return await queue.submit("12349"), queue.timeouts
+
+    assert run(failed, good=False) == (False, 1)
+    assert run(missing, ack=False) == (None, 1)
+
+
+def test_cancel_drops_queued_commands():
+    """Al caer el enlace los comandos en cola se cancelan en vez de enviarse tarde"""
+
+    async def scenario(queue, device):
+        first = queue.submit("12342")
+        second = queue.submit("12343")
+        await asyncio.sleep(0)
+        queue.cancel()
+        await asyncio.sleep(0.1)
+        return first.cancelled(), second.cancelled(), device.written
+
+    first, second, written = run(scenario, ack=False)
+    assert first and second
+    assert "12343" not in written
+
+
+def test_send_errors_reach_the_caller():
+    """Un error al escribir se propaga al que envió el comando"""
+
+    async def scenario(queue, device):
+        async def broken(data):
+            raise OSError("Error writing to device.")
+
+        queue._send = broken
+        with pytest.raises(OSError):
+            await queue.submit("12341", priority=PRIORITY_DISARM)
+        # La cola sigue funcionando después del error
+        queue._send = device.send
+        return await queue.submit(AUI, ack=False), queue.failed
+
+    assert run(scenario) == (True, 1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
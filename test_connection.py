@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest de las conexiones compartidas entre entradas y recargas
+"""
+
+import asyncio
+import socket
+
+import pytest
+
+from custom_components.custom_alarmdecoder.connection import (
+    Backoff,
+    ConnectionManager,
+)
+
+# Tiempo simulado de abrir el dispositivo y esperar la versión (is_init)
+OPEN_DELAY = 0.05
+RELOADS = 5
+
+
+class FakeEvent:
+    """Evento mínimo con add/remove/fire como los de alarmdecoder."""
+
+    def __init__(self):
+        self.handlers = []
+
+    def add(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def remove(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+    __iadd__ = add
+
+    def fire(self, *args, **kwargs):
+        for handler in list(self.handlers):
+            handler(self, *args, **kwargs)
+
+
+class FakeController:
+    """Controlador falso que cuenta aperturas y cierres."""
+
+    def __init__(self, reachable=True):
+        self.on_message = FakeEvent()
+        self.on_close = FakeEvent()
+        self.on_read = FakeEvent()
+        self.on_sending_received = FakeEvent()
+        self.on_config_received = FakeEvent()
+        # Evento del dispositivo que AlarmDecoder conecta al abrir
+        self.device_read = FakeEvent()
+        self.reachable = reachable
+        self.opens = 0
+        self.closes = 0
+        self.sent = []
+
+    def factory(self):
+        async def open_device():
+            await asyncio.sleep(OPEN_DELAY)
+            # Como AlarmDecoder.open, conecta sus eventos aunque falle
+            self.device_read.add(self._on_read)
+            if not self.reachable:
+                return False
+            self.opens += 1
+            return True
+
+        async def close_device():
+            self.closes += 1
+            # Como AlarmDecoder.close, desconecta sus eventos
+            if self._on_read in self.device_read.handlers:
+                self.device_read.remove(self._on_read)
+            # Como AlarmDecoder.close, cerrar dispara on_close
+            self.on_close.fire()
+
+        async def send_command(data):
+            self.sent.append(data)
+
+        return self, open_device, close_device, send_command
+
+    def _on_read(self, sender, line):
+        self.on_message.fire(message=line)
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_entries_share_one_device():
+    """Dos entradas del mismo host usan una sola conexión"""
+
+    async def scenario():
+        manager = ConnectionManager(asyncio.get_running_loop(), linger=0.01)
+        controller = FakeController()
+        house, garage = [], []
+        first = manager.acquire(("socket", "ad", 10000), "house",
+                                {"on_message": house.append}, controller.factory)
+        second = manager.acquire(("socket", "ad", 10000), "garage",
+                                 {"on_message": garage.append}, FakeController().factory)
+        await asyncio.gather(first.async_start(), second.async_start())
+        assert first is second
+        assert controller.opens == 1
+
+        controller.on_message.fire()
+        assert len(house) == len(garage) == 1
+
+        # Al salir una entrada sus manejadores se desconectan, el dispositivo no
+        manager.release(first, "house")
+        await asyncio.sleep(0.05)
+        controller.on_message.fire()
+        assert len(house) == 1 and len(garage) == 2
+        assert controller.closes == 0
+
+        # La última entrada cierra el dispositivo tras la espera
+        manager.release(second, "garage")
+        await asyncio.sleep(0.05)
+        assert controller.closes == 1
+        assert manager.connections == {}
+
+    run(scenario())
+
+
+def test_lost_connection_reopens_and_retries():
+    """Una pérdida de conexión reabre el dispositivo, reintentando si no responde"""
+
+    async def scenario():
+        manager = ConnectionManager(
+            asyncio.get_running_loop(), backoff=lambda: Backoff(0.01, 0.01, 0.01)
+        )
+        controller = FakeController()
+        connection = manager.acquire("serial", "house", {}, controller.factory)
+        flips = []
+        connection.link.subscribe(lambda: flips.append(connection.link.available))
+        await connection.async_start()
+        connection.device_config.applied = "ADDRESS=18"
+
+        controller.reachable = False
+        controller.on_close.fire()
+        await asyncio.sleep(0.1)
+        assert controller.opens == 1 and not connection.restart
+        # La configuración escrita se vuelve a comparar al reconectar
+        assert connection.device_config.applied is None
+
+        controller.reachable = True
+        await asyncio.sleep(0.1)
+        assert controller.opens == 2 and connection.restart
+        # Un solo aviso por cambio, no uno por reintento
+        assert flips == [True, False, True]
+
+        await manager.async_close_all()
+        # Un cierre pedido no reabre
+        controller.on_close.fire()
+        await asyncio.sleep(0.05)
+        assert controller.opens == 2
+
+    run(scenario())
+
+
+def test_reconnects_do_not_duplicate_handlers():
+    """Tras dos pérdidas de conexión cada mensaje llega una sola vez"""
+
+    async def scenario():
+        manager = ConnectionManager(
+            asyncio.get_running_loop(), backoff=lambda: Backoff(0.01, 0.01, 0.01)
+        )
+        controller = FakeController()
+        messages = []
+        connection = manager.acquire(
+            "serial",
+            "house",
+            {"on_message": lambda sender, message: messages.append(message)},
+            controller.factory,
+        )
+        await connection.async_start()
+
+        controller.on_close.fire()
+        # Un reintento fallido también conecta y desconecta los eventos
+        controller.reachable = False
+        await asyncio.sleep(0.05)
+        controller.reachable = True
+        await asyncio.sleep(0.1)
+        controller.on_close.fire()
+        await asyncio.sleep(0.1)
+        assert controller.opens == 3 and connection.link.available
+
+        controller.device_read.fire("línea")
+        await manager.async_close_all()
+        return messages
+
+    assert run(scenario()) == ["línea"]
+
+
+def test_press_once_per_link_up():
+    """La tecla de la resincronización sale una vez por conexión, no por entrada"""
+
+    async def scenario():
+        manager = ConnectionManager(
+            asyncio.get_running_loop(), backoff=lambda: Backoff(0.01, 0.01, 0.01)
+        )
+        controller = FakeController()
+        connection = manager.acquire("serial", "house", {}, controller.factory)
+        manager.acquire("serial", "garage", {}, controller.factory)
+        await connection.async_start()
+
+        assert connection.press_once("*") is not None
+        assert connection.press_once("*") is None
+        controller.on_close.fire()
+        await asyncio.sleep(0.1)
+        assert connection.press_once("*") is not None
+        await asyncio.sleep(0.05)
+        await manager.async_close_all()
+
+    run(scenario())
+
+
+def test_backoff_is_fast_first_then_exponential():
+    """Primer reintento rápido, luego el doble cada vez con variación y tope"""
+    low = Backoff(first=0.5, base=2, cap=30, rand=lambda: 0.0)
+    high = Backoff(first=0.5, base=2, cap=30, rand=lambda: 1.0)
+    assert [low.next() for _ in range(7)] == [0.5, 1, 2, 4, 8, 15, 15]
+    assert [high.next() for _ in range(7)] == [0.5, 2, 4, 8, 16, 30, 30]
+    low.reset()
+    assert low.next() == 0.5
+
+
+def test_watchdog_reconnects_silent_link():
+    """Un enlace mudo (TCP medio abierto) se cierra y se vuelve a abrir"""
+
+    async def scenario():
+        manager = ConnectionManager(
+            asyncio.get_running_loop(),
+            silence_timeout=0.2,
+            backoff=lambda: Backoff(0.01, 0.01, 0.01),
+        )
+        controller = FakeController()
+        connection = manager.acquire("socket", "house", {}, controller.factory)
+        await connection.async_start()
+
+        # Mientras llegan líneas el enlace sigue vivo
+        for _ in range(6):
+            controller.on_read.fire()
+            await asyncio.sleep(0.05)
+        assert connection.silences == 0 and connection.link.available
+
+        await asyncio.sleep(0.3)
+        # Antes de reconectar se pidió la versión, sin respuesta
+        assert controller.sent == ["V\r"]
+        assert connection.silences == 1
+        assert controller.closes == 1
+
+        await asyncio.sleep(OPEN_DELAY * 2)
+        assert controller.opens == 2 and connection.link.available
+        await manager.async_close_all()
+
+    run(scenario())
+
+
+def test_fanout_shares_the_stream():
+    """Un cliente ser2sock recibe las líneas y sus escrituras van a la cola"""
+
+    async def scenario():
+        manager = ConnectionManager(asyncio.get_running_loop())
+        controller = FakeController()
+        connection = manager.acquire("serial", "house", {}, controller.factory)
+        await connection.async_start()
+        # El puerto 0 desactiva el servidor, buscamos uno libre
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        await connection.async_serve("127.0.0.1", port)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await asyncio.sleep(0.01)
+
+        # Una línea leída en el bucle y otra desde el hilo lector
+        controller.on_read.fire(data=b"!RFX:0123456,80")
+        line = b"!LRR:008,1,CID_1406"
+        await asyncio.to_thread(controller.on_read.fire, data=line)
+        lines = [await reader.readline(), await reader.readline()]
+
+        writer.write(b"12341")
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        writer.close()
+        await manager.async_close_all()
+        return lines, controller.sent, connection.fanout
+
+    lines, sent, fanout = run(scenario())
+    assert lines == [b"!RFX:0123456,80\r\n", b"!LRR:008,1,CID_1406\r\n"]
+    assert sent == ["12341"]
+    # Cerrar la conexión detiene el servidor
+    assert fanout is None
+
+
+def free_port():
+    """Puerto libre en 127.0.0.1, el puerto 0 desactiva el servidor"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_shared_settings_are_merged():
+    """Las entradas de un dispositivo comparten el mayor intervalo y un servidor"""
+
+    async def scenario():
+        manager = ConnectionManager(asyncio.get_running_loop(), linger=0.01)
+        controller = FakeController()
+        key = ("serial", "/dev/ttyUSB0")
+        connection = manager.acquire(key, "house", {}, controller.factory)
+        manager.acquire(key, "garage", {}, FakeController().factory)
+        house_port, garage_port = free_port(), free_port()
+
+        await connection.async_configure("house", 1.0, "127.0.0.1", house_port)
+        await connection.async_configure("garage", 0.2, "127.0.0.1", garage_port)
+        # La carga de la segunda entrada no cambia el intervalo ni el servidor
+        assert connection.commands.interval == 1.0
+        assert connection.fanout.port == house_port
+
+        # Al recargar la primera, el servidor en marcha sigue
+        manager.release(connection, "house")
+        await asyncio.sleep(0.01)
+        assert connection.commands.interval == 0.2
+        assert connection.fanout.port == garage_port
+        manager.acquire(key, "house", {}, FakeController().factory)
+        await connection.async_configure("house", 1.0, "127.0.0.1", house_port)
+        assert connection.commands.interval == 1.0
+        assert connection.fanout.port == garage_port
+
+        # Sin ninguna entrada que lo pida, el servidor se detiene
+        await connection.async_configure("house", 0.5, "127.0.0.1", 0)
+        await connection.async_configure("garage", 0.5, "127.0.0.1", 0)
+        assert connection.fanout is None
+        await manager.async_close_all()
+
+    run(scenario())
+
+
+def test_background_start_does_not_wait_for_device():
+    """start() vuelve enseguida, el dispositivo se abre después"""
+
+    async def scenario():
+        manager = ConnectionManager(
+            asyncio.get_running_loop(), backoff=lambda: Backoff(0.01, 0.01, 0.01)
+        )
+        controller = FakeController(reachable=False)
+        connection = manager.acquire("serial", "house", {}, controller.factory)
+        connection.start()
+        # Vuelve sin haber abierto nada, la apertura sigue en segundo plano
+        assert controller.opens == 0 and not connection.link.available
+
+        controller.reachable = True
+        await asyncio.sleep(OPEN_DELAY * 4)
+        assert controller.opens == 1 and connection.link.available
+
+        # Cerrar mientras se abre cierra lo que se llegue a abrir
+        other = FakeController()
+        closing = manager.acquire("socket", "garage", {}, other.factory)
+        closing.start()
+        await asyncio.sleep(0)
+        await closing.async_close()
+        await asyncio.sleep(OPEN_DELAY * 2)
+        assert other.closes == 2 and not closing.link.available
+        await manager.async_close_all()
+
+    run(scenario())
+
+
+def test_parked_device_is_claimed_or_closed():
+    """El dispositivo abierto por el flujo de configuración pasa a la entrada"""
+
+    async def scenario():
+        manager = ConnectionManager(asyncio.get_running_loop())
+        closed = []
+
+        async def close(name):
+            closed.append(name)
+
+        manager.park("house", "device", lambda: close("house"))
+        assert manager.claim("house") == "device"
+        assert manager.claim("house") is None
+
+        # Sin reclamar se cierra al vencer
+        manager.park("garage", "device", lambda: close("garage"), timeout=0.01)
+        await asyncio.sleep(0.05)
+        assert manager.claim("garage") is None
+
+        manager.park("shed", "device", lambda: close("shed"))
+        await manager.async_close_all()
+        return closed
+
+    assert run(scenario()) == ["garage", "shed"]
+
+
+def test_reload_keeps_connection():
+    """Una recarga de opciones no vuelve a abrir ni inicializar el dispositivo"""
+
+    async def scenario():
+        manager = ConnectionManager(asyncio.get_running_loop())
+        controller = FakeController()
+        connection = manager.acquire("socket", "house", {}, controller.factory)
+        await connection.async_start()
+        for _ in range(RELOADS):
+            manager.release(connection, "house")
+            connection = manager.acquire("socket", "house", {}, controller.factory)
+            await connection.async_start()
+        assert (controller.opens, controller.closes) == (1, 0)
+        await manager.async_close_all()
+        return controller
+
+    assert run(scenario()).closes == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest de la configuración de filtrado del dispositivo AlarmDecoder
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.custom_alarmdecoder.commands import PRIORITY_AUI
+from custom_components.custom_alarmdecoder.decoder import decode_panel_message
+from custom_components.custom_alarmdecoder.device_config import (
+    DeviceConfig,
+    DeviceConfigSync,
+    keypad_mask,
+)
+
+
+def controller(**overrides):
+    """Atributos de AlarmDecoder tras _handle_config, con sus valores por defecto."""
+    attributes = {
+        "address": 18,
+        "configbits": 0xFF00,
+        "address_mask": 0xFFFFFFFF,
+        "emulate_zone": [True, True, False, False, False],
+        "emulate_relay": [False, False, False, True],
+        "emulate_lrr": True,
+        "deduplicate": False,
+        "mode": 0,
+        "emulate_com": False,
+    }
+    attributes.update(overrides)
+    return SimpleNamespace(**attributes)
+
+
+# !CONFIG tal como lo envía el dispositivo, con los valores de fábrica
+CONFIG_LINE = (
+    "!CONFIG>ADDRESS=18&CONFIGBITS=ff00&LRR=N&COM=N&EXP=NNNNN&REL=NNNN"
+    "&MASK=ffffffff&DEDUPLICATE=N&MODE=A"
+)
+
+
+def parse_config_line(line):
+    """Lee un !CONFIG como AlarmDecoder._handle_config."""
+    _, config_string = line.split(">")
+    fields = dict(setting.split("=") for setting in config_string.split("&"))
+    return controller(
+        address=int(fields["ADDRESS"]),
+        configbits=int(fields["CONFIGBITS"], 16),
+        address_mask=int(fields["MASK"], 16),
+        emulate_zone=[fields["EXP"][z] == "Y" for z in range(5)],
+        emulate_relay=[fields["REL"][r] == "Y" for r in range(4)],
+        emulate_lrr=fields["LRR"] == "Y",
+        deduplicate=fields["DEDUPLICATE"] == "Y",
+        mode={"A": 0, "D": 1}[fields["MODE"]],
+        emulate_com=fields["COM"] == "Y",
+    )
+
+
+def parse_mask(config_string):
+    """Lee MASK como lo hace alarmdecoder, un número en hexadecimal."""
+    fields = dict(item.split("=") for item in config_string.split("&"))
+    return int(fields["MASK"], 16)
+
+
+class TestDeviceConfig:
+    """Tests for DeviceConfig"""
+
+    def test_default_config_string(self):
+        config = DeviceConfig.from_controller(controller())
+        assert config.config_string == (
+            "ADDRESS=18&CONFIGBITS=ff00&MASK=ffffffff&EXP=YYNNN&REL=NNNY"
+            "&LRR=Y&DEDUPLICATE=N&MODE=A&COM=N"
+        )
+        assert config.mask == 0xFFFFFFFF
+
+    def test_mask_uses_message_byte_order(self):
+        # El bit de cada dirección coincide con PanelEnvelope.address_mask
+        config = DeviceConfig.from_controller(controller()).optimized([16], [])
+        assert config.mask == keypad_mask([16, 18])
+        assert config.config_string.split("&")[2] == "MASK=00000500"
+        # Releído por alarmdecoder, vuelve a dar la misma máscara
+        again = DeviceConfig.from_controller(
+            controller(address_mask=parse_mask(config.config_string))
+        )
+        assert again.mask == config.mask
+
+    def test_config_line_round_trip(self):
+        """Un !CONFIG real, escrito con C y releído, da la misma configuración"""
+        config = DeviceConfig.from_controller(parse_config_line(CONFIG_LINE))
+        assert config.address == 18 and config.mask == 0xFFFFFFFF
+        assert not config.lrr and config.expanders == (False,) * 5
+        again = DeviceConfig.from_controller(
+            parse_config_line("!CONFIG>" + config.config_string)
+        )
+        assert again == config
+
+        optimized = config.optimized([16, 17], [])
+        again = DeviceConfig.from_controller(
+            parse_config_line("!CONFIG>" + optimized.config_string)
+        )
+        assert again == optimized
+
+    def test_mask_matches_keypad_messages(self):
+        """MASK va en el formato de la máscara de los mensajes de teclado"""
+        config = DeviceConfig.from_controller(parse_config_line(CONFIG_LINE))
+        optimized = config.optimized([16], [])
+        fields = dict(item.split("=") for item in optimized.config_string.split("&"))
+        # Mensaje para los teclados 16 y 18, la dirección del propio dispositivo
+        raw = (
+            f"[10000001000000003A--],008,[f7{fields['MASK']}1008001c08020000000000],"
+            '"****DISARMED****  Ready to Arm  "'
+        )
+        message = SimpleNamespace(raw=raw, text="", beeps=0)
+        envelope = decode_panel_message(message)
+        assert envelope.address_mask == keypad_mask([16, 18]) == optimized.mask
+
+    def test_optimized_only_turns_emulation_off(self):
+        config = DeviceConfig.from_controller(controller())
+        optimized = config.optimized([16, 17], [8, 13])
+        assert optimized.deduplicate
+        # Expansor 8 usado por una zona, 7 no. El relé 13 no estaba emulado
+        assert optimized.expanders == (False, True, False, False, False)
+        assert optimized.relays == (False, False, False, False)
+        assert optimized.lrr and optimized.mode == "A"
+        # Sin teclados configurados la máscara no cambia
+        assert config.optimized([], []).mask == 0xFFFFFFFF
+
+
+def test_sync_writes_once_per_connection():
+    """La configuración se escribe una vez y no en cada reconexión"""
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        submitted = []
+
+        def submit(*parts, priority, ack):
+            submitted.append((parts, priority, ack))
+            future = loop.create_future()
+            future.set_result(True)
+            return future
+
+        sync = DeviceConfigSync(loop, submit)
+        sync.set_wanted("house", [16], [], manage=False)
+        sync.handle_config(controller())
+        await asyncio.sleep(0)
+        # Sin gestionar solo se lee
+        assert sync.current is not None and submitted == []
+
+        sync.set_wanted("house", [16], [], manage=True)
+        assert len(submitted) == 1
+        parts, priority, ack = submitted[0]
+        assert parts == (f"C{sync.applied}\r",)
+        assert priority == PRIORITY_AUI and not ack
+
+        # El dispositivo confirma la configuración escrita
+        written = sync.wanted()
+        sync.handle_config(
+            controller(
+                address_mask=parse_mask(written.config_string),
+                emulate_zone=list(written.expanders),
+                emulate_relay=list(written.relays),
+                deduplicate=True,
+            )
+        )
+        await asyncio.sleep(0)
+        # En la misma conexión la configuración no se reenvía
+        sync.handle_config(controller())
+        await asyncio.sleep(0)
+        assert sync.writes == 1
+
+        # Tras caer el enlace, un dispositivo que la conserva no se escribe
+        sync.reset()
+        assert sync.current is None and sync.applied is None
+        sync.handle_config(
+            controller(
+                address_mask=parse_mask(written.config_string),
+                emulate_zone=list(written.expanders),
+                emulate_relay=list(written.relays),
+                deduplicate=True,
+            )
+        )
+        await asyncio.sleep(0)
+        assert sync.writes == 1
+        # Un dispositivo reiniciado con la configuración de fábrica se reescribe
+        sync.reset()
+        sync.handle_config(controller())
+        await asyncio.sleep(0)
+        assert sync.writes == 2
+        assert submitted[-1][0] == (f"C{written.config_string}\r",)
+
+        # Otra entrada con otro teclado cambia la configuración deseada
+        sync.set_wanted("garage", [20], [], manage=False)
+        assert sync.writes == 3
+        assert sync.wanted().mask == keypad_mask([16, 18, 20])
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
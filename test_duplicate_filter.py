@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest para el filtro de mensajes de teclado duplicados
+"""
+
+import pytest
+
+from custom_components.custom_alarmdecoder.decoder import DuplicateFilter
+
+
+class FakeMessage:
+    """Mensaje de panel mínimo con raw y texto."""
+
+    def __init__(self, raw, text=""):
+        self.raw = raw
+        self.text = text
+
+
+def keypad_message(
+    bitfield="10000001000000003A--",
+    address_bytes="00000100",
+    text="****DISARMED****  Ready to Arm  ",
+):
+    panel_data = f"f7{address_bytes}1008001c08020000000000"
+    return FakeMessage(f'[{bitfield}],008,[{panel_data}],"{text}"', text)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDuplicateFilter:
+    """Tests for duplicate keypad message suppression"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.filter = DuplicateFilter(30, clock=self.clock)
+
+    def test_repeat_within_window_is_dropped(self):
+        assert self.filter.accept(keypad_message())
+        self.clock.now = 4
+        assert not self.filter.accept(keypad_message())
+        assert self.filter.passed == 1
+        assert self.filter.suppressed == 1
+
+    def test_repeat_after_window_is_refreshed(self):
+        self.filter.accept(keypad_message())
+        self.clock.now = 10
+        self.filter.accept(keypad_message())
+        self.clock.now = 31
+        assert self.filter.accept(keypad_message())
+
+    def test_changed_bitfield_passes(self):
+        self.filter.accept(keypad_message())
+        assert self.filter.accept(keypad_message(bitfield="00000001000000003A--"))
+
+    def test_changed_text_passes(self):
+        self.filter.accept(keypad_message())
+        assert self.filter.accept(keypad_message(text="FALLA 03  PUERTA"))
+
+    def test_state_going_back_is_not_dropped(self):
+        """Listo -> no listo -> listo: el último mensaje no es un duplicado"""
+        ready = "10000001000000003A--"
+        not_ready = "00000001000000003A--"
+        assert self.filter.accept(keypad_message(bitfield=ready))
+        assert self.filter.accept(keypad_message(bitfield=not_ready))
+        assert self.filter.accept(keypad_message(bitfield=ready))
+
+    def test_keypads_are_tracked_separately(self):
+        assert self.filter.accept(keypad_message(address_bytes="00000100"))
+        assert self.filter.accept(keypad_message(address_bytes="00000200"))
+        assert not self.filter.accept(keypad_message(address_bytes="00000100"))
+
+    def test_kpm_header_is_supported(self):
+        message = keypad_message()
+        message.raw = "!KPM:" + message.raw
+        assert self.filter.accept(message)
+        assert not self.filter.accept(message)
+
+    def test_non_keypad_messages_always_pass(self):
+        message = FakeMessage("!RFX:0123456,80")
+        assert self.filter.accept(message)
+        assert self.filter.accept(message)
+
+    def test_zero_window_disables_filter(self):
+        disabled = DuplicateFilter(0, clock=self.clock)
+        assert disabled.accept(keypad_message())
+        assert disabled.accept(keypad_message())
+        assert disabled.suppressed == 0
+
+
+def test_idle_panel_traffic_is_suppressed():
+    """Un panel en reposo repitiendo su mensaje apenas llega al bucle"""
+    clock = FakeClock()
+    duplicate_filter = DuplicateFilter(30, clock=clock)
+    # 10 minutos de repeticiones cada 4 segundos
+    accepted = 0
+    for second in range(0, 600, 4):
+        clock.now = second
+        accepted += duplicate_filter.accept(keypad_message())
+
+    assert accepted == 19
+    assert duplicate_filter.suppressed == 131
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest del servidor de reenvío compatible con ser2sock
+"""
+
+import asyncio
+import socket
+
+import pytest
+
+from custom_components.custom_alarmdecoder.fanout import FanoutServer
+
+LINE = (
+    b'[10000001000000003A--],008,[f70000010008001c08020000000000],'
+    b'"****DISARMED****  Ready to Arm  "'
+)
+
+
+def run(scenario, **options):
+    async def main():
+        writes = []
+        server = FanoutServer(asyncio.get_running_loop(), writes.append, **options)
+        await server.async_start("127.0.0.1", 0)
+        try:
+            return await scenario(server, writes)
+        finally:
+            await server.async_stop()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not met")
+
+
+def test_lines_reach_every_client():
+    """Cada cliente recibe todas las líneas terminadas en CRLF"""
+
+    async def scenario(server, writes):
+        clients = [
+            await asyncio.open_connection("127.0.0.1", server.port) for _ in range(3)
+        ]
+        await wait_for(lambda: len(server.clients) == 3)
+        server.broadcast(LINE)
+        server.broadcast(b"!RFX:0123456,80")
+        received = [
+            [await reader.readline(), await reader.readline()]
+            for reader, _writer in clients
+        ]
+        for _reader, writer in clients:
+            writer.close()
+        return received
+
+    for lines in run(scenario):
+        assert lines == [LINE + b"\r\n", b"!RFX:0123456,80\r\n"]
+
+
+def test_client_writes_are_forwarded():
+    """Lo que escribe un cliente llega a la ruta de comandos"""
+
+    async def scenario(server, writes):
+        _reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"12341")
+        await writer.drain()
+        await wait_for(lambda: writes)
+        writer.close()
+        return writes
+
+    assert run(scenario) == [b"12341"]
+
+
+def test_slow_client_is_disconnected():
+    """Un cliente que no lee se desconecta sin frenar a los demás"""
+
+    async def scenario(server, writes):
+        # Búfer de recepción mínimo para que el atraso se note enseguida
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect(("127.0.0.1", server.port))
+        sock.setblocking(False)
+        _slow_reader, slow_writer = await asyncio.open_connection(sock=sock)
+        fast_reader, fast_writer = await asyncio.open_connection(
+            "127.0.0.1", server.port
+        )
+        await wait_for(lambda: len(server.clients) == 2)
+
+        # El cliente rápido lee a la par mientras el lento acumula atraso
+        received = 0
+        rounds = 0
+        while not server.slow_disconnects and rounds < 10000:
+            rounds += 1
+            for _ in range(10):
+                server.broadcast(LINE)
+            for _ in range(10):
+                await fast_reader.readline()
+                received += 1
+        slow_writer.close()
+        fast_writer.close()
+        return received == rounds * 10, server.slow_disconnects, len(server.clients)
+
+    complete, slow_disconnects, clients = run(scenario, max_buffer=16 * 1024)
+    assert complete
+    assert slow_disconnects == 1
+    assert clients == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -229,5 +229,31 @@ def test_zone_configuration_formats(zone_config, expected_zone, expected_command
     assert build_bypass_string([processed_zone], "1234") == expected_command
 
 
+@pytest.mark.parametrize("mode", [0, 1])
+@pytest.mark.parametrize("code_arm_required", [True, False])
+@pytest.mark.parametrize("auto_bypass", [True, False])
+@pytest.mark.parametrize("code", [None, "1234"])
+def test_arm_sequence_matches_adext(mode, code_arm_required, auto_bypass, code):
+    """La secuencia de armado del panel coincide con la de AdExt.arm_away/arm_home"""
+    # Necesita la integración completa: Home Assistant y adext
+    pytest.importorskip("homeassistant")
+    adext = pytest.importorskip("adext.adext")
+    from types import SimpleNamespace
+
+    from custom_components.custom_alarmdecoder.alarm_control_panel import (
+        AlarmDecoderAlarmPanel,
+    )
+
+    panel = AlarmDecoderAlarmPanel.__new__(AlarmDecoderAlarmPanel)
+    panel._client = SimpleNamespace(mode=mode)
+    panel._attr_code_arm_required = code_arm_required
+    panel._auto_bypass = auto_bypass
+    for arm_mode in (adext.ARM_AWAY, adext.ARM_HOME):
+        expected = adext.AdExt._get_arm_sequence(
+            panel._client, arm_mode, code, code_arm_required, auto_bypass
+        )
+        assert panel._build_arm_sequence(arm_mode, code) == expected
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
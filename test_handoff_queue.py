@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest para la cola de traspaso entre el hilo lector y el bucle de eventos
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from custom_components.custom_alarmdecoder.handoff import HandoffQueue
+
+
+class FakeLoop:
+    """Bucle mínimo que guarda los callbacks programados."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def call_soon_threadsafe(self, callback, *args):
+        self.scheduled.append((callback, args))
+
+    def run(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for callback, args in scheduled:
+            callback(*args)
+
+
+class TestHandoffQueue:
+    """Tests for HandoffQueue"""
+
+    def setup_method(self):
+        self.loop = FakeLoop()
+        self.queue = HandoffQueue(self.loop, maxlen=8)
+        self.delivered = []
+
+    def deliver(self, *args):
+        self.delivered.append(args)
+
+    def test_events_keep_order(self):
+        for zone in (3, 1, 2):
+            self.queue.put(self.deliver, zone, True)
+        self.loop.run()
+        assert self.delivered == [(3, True), (1, True), (2, True)]
+
+    def test_one_wakeup_per_batch(self):
+        for zone in range(5):
+            self.queue.put(self.deliver, zone)
+        assert len(self.loop.scheduled) == 1
+
+        self.loop.run()
+        self.queue.put(self.deliver, 9)
+        assert len(self.loop.scheduled) == 1
+
+    def test_keypad_screens_collapse_to_latest(self):
+        """Las pantallas superadas del mismo teclado se descartan"""
+        self.queue.put_latest(1 << 16, self.deliver, "screen 1")
+        self.queue.put(self.deliver, "fault 5")
+        self.queue.put_latest(1 << 16, self.deliver, "screen 2")
+        self.queue.put_latest(1 << 17, self.deliver, "other keypad")
+        self.loop.run()
+
+        # La pantalla más reciente ocupa la posición de la primera
+        assert self.delivered == [("screen 2",), ("fault 5",), ("other keypad",)]
+        assert self.queue.collapsed == 1
+
+    def test_key_is_released_after_drain(self):
+        self.queue.put_latest(1, self.deliver, "a")
+        self.loop.run()
+        self.queue.put_latest(1, self.deliver, "b")
+        self.loop.run()
+        assert self.delivered == [("a",), ("b",)]
+
+    def test_full_queue_drops_oldest(self):
+        for event in range(10):
+            self.queue.put(self.deliver, event)
+        self.loop.run()
+
+        assert [args[0] for args in self.delivered] == list(range(2, 10))
+        assert self.queue.dropped == 2
+        assert self.queue.high_water == 8
+
+    def test_dropped_keyed_event_frees_its_key(self):
+        self.queue.put_latest("keypad", self.deliver, "old")
+        for event in range(8):
+            self.queue.put(self.deliver, event)
+        self.queue.put_latest("keypad", self.deliver, "new")
+        self.loop.run()
+
+        assert ("old",) not in self.delivered
+        assert self.delivered[-1] == ("new",)
+
+    def test_failing_target_does_not_stop_batch(self):
+        def broken(*args):
+            raise ValueError
+
+        self.queue.put(broken)
+        self.queue.put(self.deliver, "next")
+        self.loop.run()
+        assert self.delivered == [("next",)]
+
+
+class TestPriorityLane:
+    """Tests for the alarm/fire/panic priority lane"""
+
+    def setup_method(self):
+        self.loop = FakeLoop()
+        self.queue = HandoffQueue(self.loop)
+        self.delivered = []
+
+    def deliver(self, *args):
+        self.delivered.append(args)
+
+    def test_priority_goes_ahead_of_rf_burst(self):
+        for serial in range(300):
+            self.queue.put(self.deliver, "rfx", serial)
+        self.queue.put_priority(1 << 16, self.deliver, "ALARM")
+        self.loop.run()
+
+        assert self.delivered[0] == ("ALARM",)
+        assert len(self.delivered) == 301
+        assert self.queue.priority_latency.count == 1
+
+    def test_stale_screen_does_not_overwrite_alarm(self):
+        """Una pantalla anterior del mismo teclado no pisa la alarma"""
+        self.queue.put_latest(1 << 16, self.deliver, "ready")
+        self.queue.put_priority(1 << 16, self.deliver, "ALARM")
+        self.queue.put_latest(1 << 17, self.deliver, "other keypad")
+        self.loop.run()
+        assert self.delivered == [("ALARM",), ("other keypad",)]
+
+    def test_newer_screen_after_alarm_is_delivered(self):
+        self.queue.put_priority(1 << 16, self.deliver, "ALARM")
+        self.queue.put_latest(1 << 16, self.deliver, "alarm cleared")
+        self.loop.run()
+        assert self.delivered == [("ALARM",), ("alarm cleared",)]
+
+    def test_priority_put_during_drain_jumps_ahead(self):
+        def put_alarm(*args):
+            self.deliver(*args)
+            self.queue.put_priority(None, self.deliver, "PANIC")
+
+        self.queue.put(put_alarm, "rfx 1")
+        self.queue.put(self.deliver, "rfx 2")
+        self.queue.put(self.deliver, "rfx 3")
+        self.loop.run()
+
+        assert self.delivered[:3] == [("rfx 1",), ("PANIC",), ("rfx 2",)]
+
+
+def test_alarm_overtakes_rf_burst():
+    """La alarma se entrega antes que la ráfaga RF que ya esperaba"""
+    loop = asyncio.new_event_loop()
+    queue = HandoffQueue(loop, maxlen=2000)
+    delivered = []
+
+    async def main():
+        for serial in range(1000):
+            queue.put(delivered.append, serial)
+        queue.put_priority(None, delivered.append, "ALARM")
+        while len(delivered) < 1001:
+            await asyncio.sleep(0)
+
+    try:
+        loop.run_until_complete(asyncio.wait_for(main(), 5))
+    finally:
+        loop.close()
+
+    assert delivered[0] == "ALARM"
+    assert delivered[1:] == list(range(1000))
+    assert queue.priority_latency.count == 1
+
+
+@pytest.mark.benchmark
+def test_benchmark_time_to_alarm_under_rf_burst():
+    """Tiempo hasta la alarma con y sin ráfaga RF, frente a la cola normal"""
+    for burst in (0, 1000):
+        loop = asyncio.new_event_loop()
+        queue = HandoffQueue(loop, maxlen=2000)
+        bulk = HandoffQueue(loop, maxlen=2000)
+
+        def rf_target(*args):
+            sum(range(200))
+
+        async def main():
+            for serial in range(burst):
+                queue.put(rf_target, serial)
+                bulk.put(rf_target, serial)
+            reached = {}
+            start = time.perf_counter()
+            queue.put_priority(
+                None, lambda: reached.setdefault("priority", time.perf_counter())
+            )
+            bulk.put(lambda: reached.setdefault("bulk", time.perf_counter()))
+            while len(reached) < 2:
+                await asyncio.sleep(0)
+            return reached["priority"] - start, reached["bulk"] - start
+
+        try:
+            priority, normal = loop.run_until_complete(main())
+        finally:
+            loop.close()
+        print(
+            f"ráfaga de {burst:>4}: prioridad {priority * 1e6:.0f} µs, "
+            f"cola normal {normal * 1e6:.0f} µs"
+        )
+
+
+def test_stalled_loop_catches_up_on_latest_screens():
+    """Tras un bloqueo del bucle solo se entregan las últimas pantallas"""
+    loop = asyncio.new_event_loop()
+    queue = HandoffQueue(loop)
+    delivered = []
+
+    def producer():
+        for screen in range(500):
+            queue.put_latest(1 << 16, delivered.append, ("keypad 16", screen))
+            queue.put_latest(1 << 17, delivered.append, ("keypad 17", screen))
+            if screen % 50 == 0:
+                queue.put(delivered.append, ("fault", screen))
+
+    async def main():
+        # El bucle está ocupado mientras el hilo lector produce
+        thread = threading.Thread(target=producer)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+    faults = [event for event in delivered if event[0] == "fault"]
+    assert faults == [("fault", screen) for screen in range(0, 500, 50)]
+    assert ("keypad 16", 499) in delivered
+    assert len(delivered) == 12
+    assert queue.collapsed == 998
+    assert queue.high_water == 12
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest para el enrutado de mensajes de teclado por máscara de dirección
+"""
+
+import pytest
+
+from custom_components.custom_alarmdecoder.router import MaskRouter
+
+KEYPADS = [16, 17, 18, 19]
+
+
+class KeypadEntity:
+    """Entidad de teclado mínima (panel o display)."""
+
+    def __init__(self, address):
+        self.address = address
+        self.messages = []
+
+    def message_callback(self, envelope):
+        self.messages.append(envelope)
+
+
+def build_router():
+    router = MaskRouter()
+    entities = []
+    for address in KEYPADS:
+        # Un panel de alarma y un display por teclado
+        for _ in range(2):
+            entity = KeypadEntity(address)
+            router.subscribe(address, entity.message_callback)
+            entities.append(entity)
+    return router, entities
+
+
+def test_registered_mask():
+    router, _ = build_router()
+    assert router.mask == sum(1 << address for address in KEYPADS)
+
+
+def test_message_reaches_only_its_keypad():
+    router, entities = build_router()
+    assert router.dispatch_mask(1 << 17, "msg") == 2
+
+    assert {e.address for e in entities if e.messages} == {17}
+
+
+def test_message_for_several_keypads():
+    router, entities = build_router()
+    router.dispatch_mask((1 << 16) | (1 << 19) | (1 << 5), "msg")
+
+    assert {e.address for e in entities if e.messages} == {16, 19}
+
+
+def test_message_for_unknown_keypad():
+    router, entities = build_router()
+    assert router.dispatch_mask(1 << 30, "msg") == 0
+    assert not any(e.messages for e in entities)
+
+
+def test_unsubscribe_updates_mask():
+    router = MaskRouter()
+    first = router.subscribe(16, KeypadEntity(16).message_callback)
+    second = router.subscribe(16, KeypadEntity(16).message_callback)
+
+    first()
+    assert router.mask == 1 << 16
+    second()
+    assert router.mask == 0
+
+
+def test_callbacks_per_message_cut_by_keypad_count():
+    """Con 4 teclados cada mensaje llega a 4 veces menos entidades"""
+    router, entities = build_router()
+    messages = [1 << address for address in KEYPADS] * 25
+
+    delivered = sum(router.dispatch_mask(mask, "msg") for mask in messages)
+    broadcast = len(messages) * len(entities)
+
+    assert broadcast / delivered == pytest.approx(len(KEYPADS))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest y microbenchmark de la entrega hilo -> bucle de eventos de los callbacks del dispositivo
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from custom_components.custom_alarmdecoder.router import KeyedRouter
+
+MESSAGES = 300
+TARGETS = 4
+
+
+class Entity:
+    """Entidad mínima que anota en qué hilo escribe su estado."""
+
+    def __init__(self, writes):
+        self.writes = writes
+
+    # @callback que escribe el estado directamente
+    def callback(self, message):
+        self.writes.append((message, threading.current_thread()))
+
+
+class Wakeups:
+    """Cuenta los saltos call_soon_threadsafe hacia el bucle."""
+
+    def __init__(self, loop):
+        self.count = 0
+        self._call_soon_threadsafe = loop.call_soon_threadsafe
+        loop.call_soon_threadsafe = self
+
+    def __call__(self, *args):
+        self.count += 1
+        return self._call_soon_threadsafe(*args)
+
+
+def run_model():
+    """Emite MESSAGES mensajes desde un hilo y devuelve (saltos, escrituras)."""
+    loop = asyncio.new_event_loop()
+    wakeups = Wakeups(loop)
+    writes = []
+    router = KeyedRouter()
+    for _ in range(TARGETS):
+        router.subscribe(1, Entity(writes).callback)
+
+    def deliver(message):
+        router.dispatch(1, message)
+
+    def producer():
+        for message in range(MESSAGES):
+            loop.call_soon_threadsafe(deliver, message)
+            time.sleep(0.0002)
+
+    async def main():
+        thread = threading.Thread(target=producer)
+        thread.start()
+        while len(writes) < MESSAGES * TARGETS:
+            await asyncio.sleep(0.001)
+        thread.join()
+        return threading.current_thread()
+
+    try:
+        loop_thread = loop.run_until_complete(asyncio.wait_for(main(), 30))
+    finally:
+        loop.close()
+    return wakeups.count, writes, loop_thread
+
+
+def test_single_hop_per_message():
+    """Cada mensaje del dispositivo despierta al bucle una sola vez"""
+    wakeups, writes, loop_thread = run_model()
+    assert wakeups == MESSAGES
+    assert len(writes) == MESSAGES * TARGETS
+    # Todas las escrituras en el hilo del bucle, en el orden de llegada
+    assert all(thread is loop_thread for _, thread in writes)
+    assert [message for message, _ in writes[::TARGETS]] == list(range(MESSAGES))
+
+
+class TimedEntity:
+    """Entidad del benchmark que anota la latencia de cada escritura."""
+
+    def __init__(self, loop, latencies):
+        self.loop = loop
+        self.latencies = latencies
+
+    def write_state(self, sent_at):
+        self.latencies.append(time.perf_counter() - sent_at)
+
+    # Modelo anterior: el callback corre en el executor y vuelve al bucle
+    # con call_soon_threadsafe para escribir el estado
+    def legacy_callback(self, sent_at):
+        self.loop.call_soon_threadsafe(self.write_state, sent_at)
+
+    def callback(self, sent_at):
+        self.write_state(sent_at)
+
+
+def measure(legacy):
+    """Emite MESSAGES mensajes desde un hilo y devuelve (saltos, latencias)."""
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=4)
+    wakeups = Wakeups(loop)
+    latencies = []
+    router = KeyedRouter()
+    for _ in range(TARGETS):
+        entity = TimedEntity(loop, latencies)
+        router.subscribe(1, entity.legacy_callback if legacy else entity.callback)
+
+    # Dispatcher anterior: dispatcher_send salta al bucle y cada destino
+    # sin @callback se ejecuta en el executor
+    def legacy_dispatch(sent_at):
+        for targets in router._targets.values():
+            for target in targets:
+                loop.run_in_executor(executor, target, sent_at)
+
+    def deliver(sent_at):
+        router.dispatch(1, sent_at)
+
+    def producer():
+        for _ in range(MESSAGES):
+            loop.call_soon_threadsafe(
+                legacy_dispatch if legacy else deliver, time.perf_counter()
+            )
+            time.sleep(0.0002)
+
+    async def main():
+        thread = threading.Thread(target=producer)
+        thread.start()
+        while len(latencies) < MESSAGES * TARGETS:
+            await asyncio.sleep(0.001)
+        thread.join()
+
+    try:
+        loop.run_until_complete(asyncio.wait_for(main(), 30))
+    finally:
+        executor.shutdown()
+        loop.close()
+    return wakeups.count, sorted(latencies)
+
+
+@pytest.mark.benchmark
+def test_benchmark_single_hop_vs_legacy():
+    """Despertares del bucle y latencia por mensaje, antes y después"""
+    for legacy in (True, False):
+        wakeups, latencies = measure(legacy)
+        mean = sum(latencies) / len(latencies)
+        p95 = latencies[int(len(latencies) * 0.95)]
+        print(
+            f"{'original' if legacy else 'salto único'}: "
+            f"{wakeups / MESSAGES:.0f} despertares por mensaje, "
+            f"media {mean * 1e6:.0f} µs, p95 {p95 * 1e6:.0f} µs"
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga con varias entradas de configuración (varios paneles)
+"""
+
+import timeit
+
+import pytest
+
+from custom_components.custom_alarmdecoder.const import (
+    SIGNAL_RFX_MESSAGE,
+    SIGNAL_ZONE_FAULT,
+)
+from custom_components.custom_alarmdecoder.router import KeyedRouter
+
+ZONES_PER_PANEL = 32
+
+
+class HistorySensor:
+    """Historial mínimo que cuenta los eventos recibidos."""
+
+    def __init__(self):
+        self.events = []
+
+    def fault_callback(self, zone):
+        self.events.append(("FAULT", zone))
+
+    def rfx_callback(self, serial, status):
+        self.events.append(("RF", serial))
+
+
+class Panel:
+    """Datos de una entrada: enrutadores propios, zonas e historial."""
+
+    def __init__(self, signal_router=None):
+        self.zone_router = KeyedRouter()
+        self.signal_router = KeyedRouter() if signal_router is None else signal_router
+        self.history = HistorySensor()
+        self.faults = []
+        for zone in range(1, ZONES_PER_PANEL + 1):
+            self.zone_router.subscribe(zone, self.faults.append)
+        self.signal_router.subscribe(SIGNAL_ZONE_FAULT, self.history.fault_callback)
+        self.signal_router.subscribe(SIGNAL_RFX_MESSAGE, self.history.rfx_callback)
+
+    # Igual que deliver_zone en __init__.py
+    def deliver_zone(self, zone):
+        self.zone_router.dispatch(zone, zone)
+        self.signal_router.dispatch(SIGNAL_ZONE_FAULT, zone)
+
+
+def build_panels(count, shared):
+    # Con señales globales todas las entradas comparten el mismo despachador
+    global_router = KeyedRouter() if shared else None
+    return [Panel(global_router) for _ in range(count)]
+
+
+def test_signals_do_not_cross_entries():
+    """Un fallo de la casa no aparece en el historial del garaje"""
+    house, garage = build_panels(2, shared=False)
+    house.deliver_zone(5)
+
+    assert house.history.events == [("FAULT", 5)]
+    assert garage.history.events == []
+
+
+def test_global_signals_cross_talk():
+    """Con señales globales, el garaje recibía la zona 5 de la casa"""
+    house, garage = build_panels(2, shared=True)
+    house.deliver_zone(5)
+
+    assert garage.history.events == [("FAULT", 5)]
+
+
+def test_callbacks_per_message_do_not_grow_with_entries():
+    """Un mensaje de un panel no llega a más historiales al añadir entradas"""
+    for count in (1, 2, 4, 8):
+        callbacks = {}
+        for shared in (False, True):
+            panels = build_panels(count, shared)
+            # Historiales alcanzados por un único mensaje
+            panels[0].deliver_zone(7)
+            callbacks[shared] = sum(len(panel.history.events) for panel in panels)
+
+        assert callbacks[False] == 1
+        assert callbacks[True] == count
+
+
+@pytest.mark.benchmark
+def test_benchmark_per_panel_cost():
+    """Coste por mensaje de un panel según el número de entradas"""
+    for count in (1, 2, 4, 8):
+        timings = {}
+        for shared in (False, True):
+            house = build_panels(count, shared)[0]
+            timings[shared] = min(
+                timeit.repeat(lambda: house.deliver_zone(7), number=2000, repeat=5)
+            ) / 2000
+        print(
+            f"{count} entradas: por entrada {timings[False] * 1e6:.2f} µs, "
+            f"global {timings[True] * 1e6:.2f} µs"
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
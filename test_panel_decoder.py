@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest para el decodificador de mensajes de teclado
+"""
+
+import pytest
+
+from custom_components.custom_alarmdecoder.decoder import (
+    KIND_KEYPAD,
+    KIND_UNKNOWN,
+    STATUS_AC_POWER,
+    STATUS_ARMED_AWAY,
+    STATUS_BATTERY_LOW,
+    STATUS_BITS,
+    STATUS_READY,
+    STATUS_SYSTEM_TEXT,
+    decode_lrr_panic,
+    decode_panel_message,
+)
+
+
+class FakeMessage:
+    """Mensaje de panel mínimo con los atributos de alarmdecoder."""
+
+    def __init__(self, raw, text="", beeps=0, **flags):
+        self.raw = raw
+        self.text = text
+        self.beeps = beeps
+        for attribute in STATUS_BITS:
+            setattr(self, attribute, flags.get(attribute, False))
+
+
+def build_raw(address_bytes="00000100", text="****DISARMED****  Ready to Arm  "):
+    """Construye un mensaje KPM con los bytes de dirección indicados."""
+    panel_data = f"f7{address_bytes}1008001c08020000000000"
+    return f'[10000001000000003A--],008,[{panel_data}],"{text}"'
+
+
+# Copiamos la extracción original de alarm_control_panel.py
+def legacy_keypad_addresses(raw):
+    if raw[0] != "[":
+        return []
+    raw = raw[28:58]
+    raw = bin(int(raw, 16))[2:]
+    raw = str(raw[8:40])
+    byte0 = raw[0:8][::-1]
+    byte1 = raw[8:16][::-1]
+    byte2 = raw[16:24][::-1]
+    byte3 = raw[24:35][::-1]
+    sorted_bin = byte0 + byte1 + byte2 + byte3
+    return [i for i in range(len(sorted_bin)) if sorted_bin[i] == "1"]
+
+
+@pytest.mark.parametrize("address_bytes", [
+    "00000100",  # teclado 16
+    "00000200",  # teclado 17
+    "00000f00",  # teclados 16-19
+    "01800000",  # teclados 0 y 15
+    "ffffffff",  # todos
+    "00000000",  # ninguno
+])
+def test_address_mask_matches_legacy_extraction(address_bytes):
+    """La máscara decodificada selecciona los mismos teclados que antes"""
+    raw = build_raw(address_bytes)
+    envelope = decode_panel_message(FakeMessage(raw))
+
+    decoded = [a for a in range(32) if envelope.address_mask & (1 << a)]
+    assert decoded == legacy_keypad_addresses(raw)
+
+
+def test_status_bits_from_message_flags():
+    """Los flags del mensaje se convierten en bits de estado"""
+    message = FakeMessage(build_raw(), ready=True, ac_power=True)
+    envelope = decode_panel_message(message)
+
+    assert envelope.kind == KIND_KEYPAD
+    assert envelope.status & STATUS_READY
+    assert envelope.status & STATUS_AC_POWER
+    assert not envelope.status & STATUS_ARMED_AWAY
+    assert not envelope.status & STATUS_BATTERY_LOW
+
+
+def test_system_text_bit():
+    """Los textos de estado del panel ("**") activan STATUS_SYSTEM_TEXT"""
+    status_msg = FakeMessage(build_raw(), text="****DISARMED****  Ready to Arm")
+    zone_msg = FakeMessage(build_raw(), text="COMPROBAR 32  VENT BARBACOA 3")
+
+    assert decode_panel_message(status_msg).status & STATUS_SYSTEM_TEXT
+    assert not decode_panel_message(zone_msg).status & STATUS_SYSTEM_TEXT
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("ANULA 09  POSTI DORM PPAL", (9, "POSTI DORM PPAL")),
+    ("COMPROBAR 32  VENT BARBACOA 3  ", (32, "VENT BARBACOA 3")),
+    ("****DISARMED****  Ready to Arm", None),
+    ("", None),
+])
+def test_zone_text_is_parsed_once(text, expected):
+    """El texto de zona se interpreta en el decodificador"""
+    envelope = decode_panel_message(FakeMessage(build_raw(), text=text))
+    assert envelope.zone == expected
+
+
+def test_kpm_header_is_supported():
+    """Los mensajes con cabecera !KPM: se decodifican igual"""
+    raw = build_raw("00000100")
+    envelope = decode_panel_message(FakeMessage("!KPM:" + raw))
+
+    assert envelope.kind == KIND_KEYPAD
+    assert envelope.address_mask == 1 << 16
+
+
+def test_non_keypad_message():
+    """Los mensajes que no son de teclado no llevan máscara ni estado"""
+    envelope = decode_panel_message(FakeMessage("!RFX:0123456,80", ready=True))
+
+    assert envelope.kind == KIND_UNKNOWN
+    assert envelope.address_mask == 0
+    assert envelope.status == 0
+
+
+def test_envelope_is_immutable():
+    """El sobre no se puede modificar una vez creado"""
+    envelope = decode_panel_message(FakeMessage(build_raw()))
+    with pytest.raises(AttributeError):
+        envelope.status = 0
+
+
+class LrrMessage:
+    """Como alarmdecoder.messages.LRRMessage, str() devuelve la línea cruda."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __str__(self):
+        return self.raw
+
+
+@pytest.mark.parametrize(
+    ("line", "panic"),
+    [
+        # Pánico audible (Contact ID 123) disparado y restaurado
+        ("!LRR:012,1,CID_1123,ff", True),
+        ("!LRR:012,1,CID_3123,ff", False),
+        # Código de informe que sustituye los dos últimos dígitos: 1100 -> 123
+        ("!LRR:012,1,CID_1100,23", True),
+        # Desarmado por el usuario cancela el pánico
+        ("!LRR:001,1,CID_1406,ff", False),
+        # Armado y robo no informan de pánico
+        ("!LRR:001,1,CID_1401,ff", None),
+        ("!LRR:008,1,CID_1131,ff", None),
+        # Firmware anterior a 2.2a.8.6
+        ("!LRR:012,1,ALARM_PANIC", True),
+        ("!LRR:012,1,CANCEL", False),
+        ("!LRR:012,1,TROUBLE", None),
+        ("!LRR:bad", None),
+        ("!RFX:0123456,80", None),
+    ],
+)
+def test_lrr_panic(line, panic):
+    assert decode_lrr_panic(LrrMessage(line)) is panic
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest de la selección del perfil de procesamiento (full / standard / lean)
+y benchmark del tiempo de CPU por cada 1000 mensajes reproducidos en cada perfil
+"""
+
+import time
+
+import pytest
+
+from custom_components.custom_alarmdecoder.const import (
+    CONF_AUTO_DETECT_ZONES,
+    CONF_PROCESSING_PROFILE,
+    DEFAULT_ARM_OPTIONS,
+    DEFAULT_PROCESSING_PROFILE,
+    OPTIONS_ARM,
+    PROFILE_FULL,
+    PROFILE_LEAN,
+    PROFILES,
+    SIGNAL_PANEL_MESSAGE,
+    SIGNAL_RFX_MESSAGE,
+    SIGNAL_ZONE_FAULT,
+    SIGNAL_ZONE_RESTORE,
+)
+from custom_components.custom_alarmdecoder.decoder import (
+    KIND_KEYPAD,
+    STATUS_ALARM_EVENT_OCCURRED,
+    STATUS_ARMED,
+    STATUS_BITS,
+    STATUS_CHIME_ON,
+    STATUS_READY,
+    STATUS_ZONE_BYPASSED,
+    DuplicateFilter,
+    decode_panel_message,
+    decode_rf_message,
+)
+from custom_components.custom_alarmdecoder.router import (
+    BitRouter,
+    KeyedRouter,
+    MaskRouter,
+)
+from custom_components.custom_alarmdecoder.runtime_config import RuntimeConfig
+
+MESSAGES = 1000
+ZONES = 16
+RF_ZONES = 8
+SCREENS = [
+    ("****DISARMED****  Ready to Arm  ", "10000001000000003A--", {"ready": True}),
+    ("COMPROBAR 05 PUERTA             ", "00000001000000003A--", {}),
+    ("COMPROBAR 12 VENTANA            ", "00000001000000003A--", {}),
+    (
+        "****DISARMED****  Ready to Arm  ",
+        "10000001001000003A--",
+        {"ready": True, "chime_on": True},
+    ),
+]
+RF_VALUES = (0x04, 0x84, 0x04, 0x06)
+# Los nueve sensores de PANEL_DIAGNOSTICS en binary_sensor.py
+DIAGNOSTICS = [
+    "ac_power",
+    "battery_low",
+    "ready",
+    "check_zone",
+    "chime_on",
+    "programming_mode",
+    "entry_delay_off",
+    "zone_bypassed",
+    "alarm_event_occurred",
+]
+
+
+class FakeMessage:
+    """Mensaje de panel mínimo con los atributos de alarmdecoder."""
+
+    def __init__(self, raw, text, **flags):
+        self.raw = raw
+        self.text = text
+        self.beeps = 0
+        for attribute in STATUS_BITS:
+            setattr(self, attribute, flags.get(attribute, False))
+
+
+class FakeRfMessage:
+    def __init__(self, serial_number, value):
+        self.serial_number = serial_number
+        self.value = value
+
+
+def test_full_profile_is_the_default():
+    """Sin opción guardada, y con las opciones por defecto, el perfil es full"""
+    assert DEFAULT_PROCESSING_PROFILE == PROFILE_FULL
+    assert RuntimeConfig.from_entry({}, {}).profile == PROFILE_FULL
+    config = RuntimeConfig.from_entry({}, {OPTIONS_ARM: DEFAULT_ARM_OPTIONS})
+    assert config.profile == PROFILE_FULL
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_profile_read_from_arm_options(profile):
+    """El perfil elegido en las opciones de armado llega a la instantánea"""
+    options = {
+        OPTIONS_ARM: {**DEFAULT_ARM_OPTIONS, CONF_PROCESSING_PROFILE: profile}
+    }
+    assert RuntimeConfig.from_entry({}, options).profile == profile
+
+
+def test_profile_change_builds_a_new_snapshot():
+    """Cambiar el perfil da una instantánea nueva, la anterior no cambia"""
+    full = RuntimeConfig.from_entry({}, {OPTIONS_ARM: DEFAULT_ARM_OPTIONS})
+    lean = RuntimeConfig.from_entry(
+        {},
+        {OPTIONS_ARM: {**DEFAULT_ARM_OPTIONS, CONF_PROCESSING_PROFILE: PROFILE_LEAN}},
+    )
+    assert full.profile == PROFILE_FULL
+    assert lean.profile == PROFILE_LEAN
+    assert full != lean
+
+
+def test_zone_text_only_parsed_for_auto_detect():
+    """El texto de la zona solo se analiza con la autodetección activada"""
+    text = "COMPROBAR 05 PUERTA             "
+    raw = f'[00000001000000003A--],008,[f70000010008001c08020000000000],"{text}"'
+    message = FakeMessage(raw, text)
+    assert decode_panel_message(message).zone == (5, "PUERTA")
+    assert decode_panel_message(message, parse_zone=False).zone is None
+
+    options = {OPTIONS_ARM: {**DEFAULT_ARM_OPTIONS, CONF_AUTO_DETECT_ZONES: False}}
+    config = RuntimeConfig.from_entry({}, options)
+    assert decode_panel_message(message, config.auto_detect_zones).zone is None
+
+
+def build_trace():
+    """Tráfico de un panel: pantallas de teclado, ráfagas RF y fallos de zona."""
+    trace = []
+    for index in range(MESSAGES):
+        if index % 10 < 6:
+            text, bitfield, flags = SCREENS[(index // 10) % len(SCREENS)]
+            raw = f'[{bitfield}],008,[f70000010008001c08020000000000],"{text}"'
+            trace.append(("panel", FakeMessage(raw, text, **flags)))
+        elif index % 10 < 9:
+            serial = f"0{index % RF_ZONES:06d}"
+            value = RF_VALUES[(index // 10) % len(RF_VALUES)]
+            trace.append(("rfx", FakeRfMessage(serial, value)))
+        else:
+            trace.append(("zone", (index % ZONES + 1, (index // 10) % 2 == 0)))
+    return trace
+
+
+class Pipeline:
+    """Decodificador y enrutadores reales con las suscripciones de cada perfil.
+
+    Los destinos solo cuentan las llamadas: el benchmark mide el trabajo de
+    decodificar y enrutar que cada perfil evita, no el de las entidades.
+    """
+
+    def __init__(self, profile):
+        self.duplicate_filter = DuplicateFilter(30, clock=lambda: 0.0)
+        self.keypad_router = MaskRouter()
+        self.status_router = BitRouter()
+        self.zone_router = KeyedRouter()
+        self.rfx_router = KeyedRouter()
+        self.signal_router = KeyedRouter()
+        self.calls = 0
+
+        # Teclado, retardo, timbre y zonas: presentes en todos los perfiles
+        self.keypad_router.subscribe(16, self.sink)
+        self.status_router.subscribe(STATUS_ARMED | STATUS_READY, self.sink)
+        self.status_router.subscribe(STATUS_CHIME_ON, self.sink)
+        for zone in range(1, ZONES + 1):
+            self.zone_router.subscribe(zone, self.sink)
+            if zone <= RF_ZONES:
+                serial = f"0{zone % RF_ZONES:06d}"
+                self.rfx_router.subscribe(serial, self.sink)
+                if profile == PROFILE_FULL:
+                    # Sensores RF de batería baja y supervisión
+                    self.rfx_router.subscribe(serial, self.sink)
+                    self.rfx_router.subscribe(serial, self.sink)
+        if profile != PROFILE_LEAN:
+            for attribute in DIAGNOSTICS:
+                self.status_router.subscribe(STATUS_BITS[attribute], self.sink)
+        if profile == PROFILE_FULL:
+            # Historial de eventos
+            self.status_router.subscribe(
+                STATUS_ARMED
+                | STATUS_CHIME_ON
+                | STATUS_ZONE_BYPASSED
+                | STATUS_ALARM_EVENT_OCCURRED
+                | STATUS_READY,
+                self.sink,
+            )
+            for signal in (SIGNAL_ZONE_FAULT, SIGNAL_ZONE_RESTORE, SIGNAL_RFX_MESSAGE):
+                self.signal_router.subscribe(signal, self.sink)
+
+    def sink(self, *args):
+        self.calls += 1
+
+    # Igual que los manejadores de __init__.py
+    def handle(self, kind, message):
+        if kind == "panel":
+            if not self.duplicate_filter.accept(message):
+                return
+            envelope = decode_panel_message(message, False)
+            self.keypad_router.dispatch_mask(envelope.address_mask, envelope)
+            if envelope.kind == KIND_KEYPAD:
+                self.status_router.dispatch(
+                    envelope.address_mask, envelope.status, envelope
+                )
+            self.signal_router.dispatch(SIGNAL_PANEL_MESSAGE, envelope)
+        elif kind == "rfx":
+            if (decoded := decode_rf_message(message)) is None:
+                return
+            self.rfx_router.dispatch(decoded[0], decoded[1])
+            self.signal_router.dispatch(SIGNAL_RFX_MESSAGE, *decoded)
+        else:
+            zone, faulted = message
+            self.zone_router.dispatch(zone, faulted)
+            self.signal_router.dispatch(
+                SIGNAL_ZONE_FAULT if faulted else SIGNAL_ZONE_RESTORE, zone
+            )
+
+
+@pytest.mark.benchmark
+def test_benchmark_cpu_per_1000_messages():
+    """Tiempo de CPU por cada 1000 mensajes reproducidos en cada perfil"""
+    trace = build_trace()
+    for profile in PROFILES:
+        best = None
+        for _ in range(20):
+            pipeline = Pipeline(profile)
+            start = time.process_time()
+            for kind, message in trace:
+                pipeline.handle(kind, message)
+            elapsed = (time.process_time() - start) * 1000 * MESSAGES / len(trace)
+            best = elapsed if best is None else min(best, elapsed)
+        print(
+            f"{profile:>8}: {best:.2f} ms de CPU por 1000 mensajes, "
+            f"{pipeline.calls} callbacks"
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest para la decodificación y el enrutado de mensajes RFX
+"""
+
+import pytest
+
+from custom_components.custom_alarmdecoder.decoder import (
+    RF_STATUS_TABLE,
+    decode_rf_message,
+)
+from custom_components.custom_alarmdecoder.router import KeyedRouter
+
+
+class FakeRfMessage:
+    """Mensaje RFX mínimo con los atributos de alarmdecoder."""
+
+    def __init__(self, serial_number, value):
+        self.serial_number = serial_number
+        self.value = value
+
+
+# Copiamos la decodificación original de binary_sensor.py
+def legacy_rf_attributes(rfstate):
+    return {
+        "rf_bit0": bool(rfstate & 0x01),
+        "rf_low_battery": bool(rfstate & 0x02),
+        "rf_supervised": bool(rfstate & 0x04),
+        "rf_bit3": bool(rfstate & 0x08),
+        "rf_loop3": bool(rfstate & 0x10),
+        "rf_loop2": bool(rfstate & 0x20),
+        "rf_loop4": bool(rfstate & 0x40),
+        "rf_loop1": bool(rfstate & 0x80),
+    }
+
+
+# Copiamos el orden de lazos de alarmdecoder.messages.RFMessage
+def legacy_loops(value):
+    is_bit_set = lambda b: value & (1 << (b - 1)) > 0
+    return (is_bit_set(8), is_bit_set(6), is_bit_set(5), is_bit_set(7))
+
+
+def test_table_covers_every_status_byte():
+    """La tabla precalculada coincide con la decodificación original"""
+    assert len(RF_STATUS_TABLE) == 256
+    for value, status in enumerate(RF_STATUS_TABLE):
+        assert dict(status.attributes) == legacy_rf_attributes(value)
+        assert status.loops == legacy_loops(value)
+        assert status.low_battery == bool(value & 0x02)
+        assert status.supervised == bool(value & 0x04)
+
+
+def test_table_entries_are_frozen():
+    """Las entradas compartidas no se pueden modificar"""
+    status = RF_STATUS_TABLE[0x80]
+    with pytest.raises(AttributeError):
+        status.value = 0
+    with pytest.raises(TypeError):
+        status.attributes["rf_loop1"] = False
+
+
+def test_repeated_packets_share_status():
+    """Los paquetes repetidos devuelven el mismo objeto de estado"""
+    first = decode_rf_message(FakeRfMessage("0123456", 0x84))
+    second = decode_rf_message(FakeRfMessage("0123456", 0x84))
+
+    assert first == ("0123456", RF_STATUS_TABLE[0x84])
+    assert first[1] is second[1]
+
+
+@pytest.mark.parametrize("message", [
+    FakeRfMessage(None, 0x80),
+    FakeRfMessage("0123456", None),
+    FakeRfMessage("0123456", -1),
+    FakeRfMessage("0123456", 0x100),
+])
+def test_invalid_messages_are_ignored(message):
+    """Los mensajes sin serial o con valor inválido se descartan"""
+    assert decode_rf_message(message) is None
+
+
+def test_routing_by_serial():
+    """Solo los suscriptores del serial reciben el estado"""
+    router = KeyedRouter()
+    received = {"0123456": [], "0654321": []}
+    for serial, statuses in received.items():
+        router.subscribe(serial, statuses.append)
+
+    serial, status = decode_rf_message(FakeRfMessage("0123456", 0x80))
+    assert router.dispatch(serial, status)
+    assert not router.dispatch("9999999", status)
+
+    assert received["0123456"] == [RF_STATUS_TABLE[0x80]]
+    assert received["0654321"] == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest para la instantánea inmutable de opciones
+"""
+
+import dataclasses
+
+import pytest
+
+from custom_components.custom_alarmdecoder.const import (
+    CONF_AUTO_DETECT_ZONES,
+    CONF_DEDUP_WINDOW,
+    CONF_KEYPADS,
+    CONF_ZONE_NAME,
+    CONF_ZONE_RFID,
+    DEFAULT_ARM_OPTIONS,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    OPTIONS_ARM,
+    OPTIONS_KEYPADS,
+    OPTIONS_ZONES,
+    PROFILE_FULL,
+)
+from custom_components.custom_alarmdecoder.runtime_config import RuntimeConfig
+
+OPTIONS = {
+    OPTIONS_ARM: {**DEFAULT_ARM_OPTIONS, CONF_AUTO_DETECT_ZONES: True},
+    OPTIONS_KEYPADS: [16, 17],
+    OPTIONS_ZONES: {
+        "5": {CONF_ZONE_NAME: "Puerta"},
+        "12": {CONF_ZONE_NAME: "Ventana", CONF_ZONE_RFID: "0123456"},
+        "13": {CONF_ZONE_NAME: "Garaje", CONF_ZONE_RFID: ""},
+    },
+}
+
+
+class TestRuntimeConfig:
+    """Tests for RuntimeConfig"""
+
+    def setup_method(self):
+        self.config = RuntimeConfig.from_entry({}, OPTIONS)
+
+    def test_zone_sets(self):
+        assert self.config.zones == {5, 12, 13}
+        assert 12 in self.config.zones
+
+    def test_rfid_map(self):
+        assert dict(self.config.rfid_zones) == {"0123456": 12}
+
+    def test_flags(self):
+        assert self.config.auto_detect_zones
+        assert not self.config.scan_panel
+        assert self.config.min_write_interval == DEFAULT_MIN_WRITE_INTERVAL
+        assert self.config.profile == PROFILE_FULL
+
+    def test_keypads_fall_back_to_entry_data(self):
+        config = RuntimeConfig.from_entry({CONF_KEYPADS: [18]}, {})
+        assert config.keypads == {18}
+        assert self.config.keypads == {16, 17}
+
+    def test_empty_options_use_defaults(self):
+        config = RuntimeConfig.from_entry({}, {})
+        assert config.zones == frozenset()
+        assert not config.auto_detect_zones
+        assert config.dedup_window == DEFAULT_ARM_OPTIONS[CONF_DEDUP_WINDOW]
+
+    def test_snapshot_is_immutable(self):
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            self.config.auto_detect_zones = False
+        with pytest.raises(TypeError):
+            self.config.rfid_zones["7654321"] = 1
+        assert not hasattr(self.config, "__dict__")
+
+    def test_snapshot_remembers_its_options(self):
+        assert self.config.options is OPTIONS
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest de la detección de puertos serie, con pares pty como dispositivos
+"""
+
+import asyncio
+import os
+import termios
+
+import pytest
+
+from custom_components.custom_alarmdecoder.probe import (
+    COMMON_BAUDRATES,
+    candidate_ports,
+    parse_version,
+    probe_port,
+    probe_ports,
+)
+
+VERSION = b"!VER:ffffffff,V2.2a.8.9b-306,TX;RX;SM;VZ;RF;ZX;RE;AU;3X;CG;DD;MF;LR;KE;MK;CB;DS;ER;CR\r\n"
+TIMEOUT = 0.1
+
+
+class FakeAlarmDecoder:
+    """Extremo maestro de un pty que responde a V\\r solo a su velocidad."""
+
+    def __init__(self, loop, baudrate, log, answers=True):
+        self.log = log
+        self.master, self.slave = os.openpty()
+        self.path = os.ttyname(self.slave)
+        self.speed = getattr(termios, f"B{baudrate}")
+        self.answers = answers
+        self.queries = 0
+        os.set_blocking(self.master, False)
+        loop.add_reader(self.master, self._readable)
+
+    def _readable(self):
+        try:
+            data = os.read(self.master, 1024)
+        except OSError:
+            return
+        if b"V\r" not in data:
+            return
+        self.queries += 1
+        self.log.append(self)
+        if not self.answers:
+            return
+        # El esclavo comparte la configuración termios con el maestro
+        if termios.tcgetattr(self.master)[4] == self.speed:
+            os.write(self.master, b"[0000000110000000----],008,[f70000]\r\n" + VERSION)
+        else:
+            os.write(self.master, b"\xfe\x00\xf0\r\n")
+
+    def close(self, loop):
+        loop.remove_reader(self.master)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def test_parse_version():
+    assert parse_version(VERSION.strip()) == ("ffffffff", "V2.2a.8.9b-306")
+    assert parse_version(b"!KPM:[0000]") is None
+
+
+def test_candidate_ports_dedupe_links(tmp_path):
+    """Un enlace by-id y su dispositivo son un solo puerto, se prefiere el enlace"""
+    (tmp_path / "ttyUSB0").touch()
+    (tmp_path / "ttyUSB1").touch()
+    by_id = tmp_path / "by-id"
+    by_id.mkdir()
+    (by_id / "usb-AD2USB").symlink_to(tmp_path / "ttyUSB0")
+    ports = candidate_ports((f"{by_id}/*", f"{tmp_path}/ttyUSB*"))
+    assert ports == [f"{by_id}/usb-AD2USB", f"{tmp_path}/ttyUSB1"]
+
+
+def test_probe_finds_baudrate_and_ranks():
+    """Se prueban todos los puertos a la vez y cada uno a sus velocidades"""
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        log = []
+        fast = FakeAlarmDecoder(loop, 115200, log)
+        slow = FakeAlarmDecoder(loop, 19200, log)
+        mute = FakeAlarmDecoder(loop, 115200, log, answers=False)
+        devices = (slow, mute, fast)
+        try:
+            found = await probe_ports([d.path for d in devices], timeout=TIMEOUT)
+            single = await probe_port(slow.path, (9600,), timeout=TIMEOUT)
+        finally:
+            for device in devices:
+                device.close(loop)
+        # En paralelo: todos los puertos reciben su primera consulta antes de
+        # que ninguno pase a la segunda velocidad
+        assert set(log[:3]) == set(devices)
+        return found, single, mute.queries
+
+    found, single, mute_queries = asyncio.run(scenario())
+    assert [(r.path.startswith("/dev/"), r.baudrate) for r in found] == [
+        (True, 115200),
+        (True, 19200),
+    ]
+    assert found[0].version == "V2.2a.8.9b-306"
+    assert found[0].label.endswith("@ 115200 (AlarmDecoder V2.2a.8.9b-306)")
+    # El puerto mudo se probó a todas las velocidades
+    assert mute_queries == len(COMMON_BAUDRATES)
+    assert single is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
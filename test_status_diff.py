@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest del enrutado por bits de estado cambiados
+"""
+
+import pytest
+
+from custom_components.custom_alarmdecoder.decoder import (
+    STATUS_ARMED_AWAY,
+    STATUS_BITS,
+    STATUS_CHIME_ON,
+    STATUS_READY,
+)
+from custom_components.custom_alarmdecoder.router import RESYNC, BitRouter
+
+KEYPAD_16 = 1 << 16
+
+
+class Consumer:
+    """Consumidor que anota las llamadas recibidas."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, payload, changed):
+        self.calls.append((payload, changed))
+
+
+class TestBitRouter:
+    """Tests for BitRouter"""
+
+    def setup_method(self):
+        self.router = BitRouter()
+        self.ready = Consumer()
+        self.chime = Consumer()
+        self.router.subscribe(STATUS_READY, self.ready)
+        self.router.subscribe(STATUS_CHIME_ON, self.chime)
+
+    def test_first_word_reaches_everyone(self):
+        assert self.router.dispatch(KEYPAD_16, STATUS_READY, "m1") == 2
+
+    def test_unchanged_word_reaches_nobody(self):
+        self.router.dispatch(KEYPAD_16, STATUS_READY, "m1")
+        assert self.router.dispatch(KEYPAD_16, STATUS_READY, "m2") == 0
+        assert len(self.ready.calls) == 1
+
+    def test_only_changed_bits_are_delivered(self):
+        self.router.dispatch(KEYPAD_16, STATUS_READY, "m1")
+        self.router.dispatch(KEYPAD_16, STATUS_READY | STATUS_CHIME_ON, "m2")
+
+        assert self.chime.calls[-1] == ("m2", STATUS_CHIME_ON)
+        assert len(self.ready.calls) == 1
+
+    def test_unwatched_bits_are_ignored(self):
+        self.router.dispatch(KEYPAD_16, 0, "m1")
+        assert self.router.dispatch(KEYPAD_16, STATUS_ARMED_AWAY, "m2") == 0
+
+    def test_keypads_have_their_own_word(self):
+        self.router.dispatch(KEYPAD_16, STATUS_READY, "m1")
+        assert self.router.dispatch(1 << 17, STATUS_READY, "m2") == 2
+
+    def test_new_subscriber_gets_current_status(self):
+        self.router.dispatch(KEYPAD_16, STATUS_READY, "m1")
+        late = Consumer()
+        self.router.subscribe(STATUS_READY, late)
+        self.router.dispatch(KEYPAD_16, STATUS_READY, "m2")
+        assert late.calls == [("m2", -1)]
+
+    def test_refresh_redelivers_only_to_its_target(self):
+        """El interruptor de chime se resincroniza sin falsear el historial"""
+        self.router.dispatch(KEYPAD_16, STATUS_READY, "m1")
+        self.router.refresh(self.chime)
+        assert self.router.dispatch(KEYPAD_16, STATUS_READY, "m2") == 1
+        assert self.chime.calls[-1] == ("m2", RESYNC)
+        assert len(self.ready.calls) == 1
+        # Solo una vez
+        assert self.router.dispatch(KEYPAD_16, STATUS_READY, "m3") == 0
+
+    def test_new_subscriber_does_not_resync_the_others(self):
+        self.router.dispatch(KEYPAD_16, STATUS_READY, "m1")
+        self.router.subscribe(STATUS_CHIME_ON, Consumer())
+        self.router.dispatch(KEYPAD_16, STATUS_READY | STATUS_CHIME_ON, "m2")
+        # El cambio real de chime llega como cambio, no como resincronización
+        assert self.chime.calls[-1] == ("m2", STATUS_CHIME_ON)
+        assert len(self.ready.calls) == 1
+
+    def test_unsubscribe(self):
+        router = BitRouter()
+        consumer = Consumer()
+        remove = router.subscribe(STATUS_READY, consumer)
+        remove()
+        assert router.dispatch(KEYPAD_16, STATUS_READY, "m1") == 0
+        assert consumer.calls == []
+
+
+def test_unchanged_status_calls_no_consumer():
+    """Un mensaje sin cambios no llama a ninguno de los doce consumidores"""
+    router = BitRouter()
+    consumers = [Consumer() for _ in range(12)]
+    for consumer, bit in zip(consumers, list(STATUS_BITS.values())[:12]):
+        router.subscribe(bit, consumer)
+    router.dispatch(KEYPAD_16, STATUS_READY, "m1")
+
+    for _ in range(100):
+        assert router.dispatch(KEYPAD_16, STATUS_READY, "m2") == 0
+    assert all(len(consumer.calls) == 1 for consumer in consumers)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
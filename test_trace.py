@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest de la traza muestreada de las rutas calientes
+"""
+
+from datetime import datetime
+
+import pytest
+
+from custom_components.custom_alarmdecoder.const import (
+    TRACE_AUI,
+    TRACE_PANEL,
+    TRACE_RFX,
+    TRACE_SIGNALS,
+)
+from custom_components.custom_alarmdecoder.trace import Tracer
+
+RAW = "!AUI:0c" + "fefefd" * 30
+
+
+class TestTracer:
+    """Tests for Tracer"""
+
+    def test_zero_rate_is_disabled(self):
+        assert not Tracer().enabled
+        assert Tracer(sample_rate=5).enabled
+
+    def test_full_rate_records_everything(self):
+        tracer = Tracer(sample_rate=100, clock=lambda: 0.0)
+        for serial in range(5):
+            tracer.record(TRACE_RFX, serial, 0x84)
+        assert tracer.recorded == 5
+        assert tracer.dump()[0] == {
+            "time": datetime.fromtimestamp(0).isoformat(),
+            "signal": TRACE_RFX,
+            "fields": [0, 0x84],
+        }
+
+    def test_sampling_keeps_one_in_ten_per_signal(self):
+        tracer = Tracer(sample_rate=10)
+        for screen in range(30):
+            tracer.record(TRACE_PANEL, screen)
+        tracer.record(TRACE_AUI, RAW)
+
+        fields = [event["fields"] for event in tracer.dump()]
+        # El primer evento de cada señal siempre se guarda
+        assert fields == [[0], [10], [20], [RAW]]
+        assert tracer.sampled_out == 27
+
+    def test_signal_filter(self):
+        tracer = Tracer(sample_rate=100, signals=[TRACE_AUI])
+        tracer.record(TRACE_PANEL, "screen")
+        tracer.record(TRACE_AUI, RAW)
+
+        assert [event["signal"] for event in tracer.dump()] == [TRACE_AUI]
+        assert tracer.signals == {TRACE_AUI}
+        assert Tracer().signals == set(TRACE_SIGNALS)
+
+    def test_buffer_is_bounded(self):
+        tracer = Tracer(sample_rate=100, maxlen=3)
+        for screen in range(10):
+            tracer.record(TRACE_PANEL, screen)
+        assert [event["fields"] for event in tracer.dump()] == [[7], [8], [9]]
+        assert tracer.recorded == 10
+
+    def test_dump_and_clear(self):
+        tracer = Tracer(sample_rate=100)
+        tracer.record(TRACE_PANEL, "screen")
+        assert len(tracer.dump(clear=True)) == 1
+        assert tracer.dump() == []
+
+
+class CountingRaw(str):
+    """Mensaje crudo que cuenta cuántas veces se recorta para la traza."""
+
+    slices = 0
+
+    def __getitem__(self, key):
+        CountingRaw.slices += 1
+        return super().__getitem__(key)
+
+
+def test_disabled_trace_touches_nothing():
+    """Con la traza desactivada la ruta caliente no recorta ni guarda nada"""
+    tracer = Tracer()
+    raw = CountingRaw(RAW)
+    for _ in range(1000):
+        if tracer.enabled:
+            tracer.record(TRACE_AUI, raw[:100])
+    assert CountingRaw.slices == 0
+    assert tracer.recorded == 0 and tracer.dump() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
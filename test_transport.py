@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest y benchmark del transporte asyncio frente al hilo lector
+"""
+
+import asyncio
+import select
+import socket
+import statistics
+import threading
+import time
+
+import pytest
+
+from custom_components.custom_alarmdecoder.framing import LineFramer, LineProtocol
+
+LINE = (
+    b'[10000001000000003A--],008,[f70000010008001c08020000000000],'
+    b'"****DISARMED****  Ready to Arm  "\r\n'
+)
+
+
+class TestLineFramer:
+    """Tests for LineFramer"""
+
+    def setup_method(self):
+        self.lines = []
+        self.framer = LineFramer(self.lines.append, size=32)
+
+    def test_lines_split_across_chunks(self):
+        self.framer.feed(b"!RFX:0123")
+        self.framer.feed(b"456,80\r\n!EXP:07,")
+        self.framer.feed(b"01,01\r\n")
+        assert self.lines == [b"!RFX:0123456,80", b"!EXP:07,01,01"]
+
+    def test_several_lines_in_one_chunk(self):
+        self.framer.feed(b"!LRR:1\r\n!LRR:2\n!LRR:3\r\n")
+        assert self.lines == [b"!LRR:1", b"!LRR:2", b"!LRR:3"]
+
+    def test_empty_lines_and_noise_are_skipped(self):
+        self.framer.feed(b"\r\n\n\xff!VER:ffffffff\xff\r\n\xff\n")
+        assert self.lines == [b"!VER:ffffffff"]
+
+    def test_overflowing_line_is_dropped(self):
+        self.framer.feed(b"x" * 80 + b"\r\n!LRR:1\r\n")
+        assert self.lines == [b"!LRR:1"]
+        assert self.framer.overflows == 2
+
+    def test_buffered_reads_in_place(self):
+        """Lectura directa en el búfer, como hacen los sockets asyncio"""
+        for chunk in (b"!LRR", b":1\r\n!L", b"RR:2\r\n"):
+            buffer = self.framer.get_buffer()
+            buffer[: len(chunk)] = chunk
+            self.framer.buffer_updated(len(chunk))
+        assert self.lines == [b"!LRR:1", b"!LRR:2"]
+        assert self.framer.lines == 2
+
+
+def test_socket_lines_reach_the_loop_in_order():
+    """Las líneas de un socket llegan enteras, en orden y en el hilo del bucle"""
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        writer, reader = socket.socketpair()
+        received = []
+        done = loop.create_future()
+
+        def on_line(line):
+            received.append((line, threading.current_thread()))
+            if len(received) == 2000 and not done.done():
+                done.set_result(None)
+
+        await loop.create_connection(
+            lambda: LineProtocol(on_line, lambda exc: None), sock=reader
+        )
+        try:
+            # Una ráfaga mayor que un recv, partida en trozos arbitrarios,
+            # escrita desde otro hilo como haría el dispositivo
+            data = LINE * 2000
+
+            def write():
+                for start in range(0, len(data), 997):
+                    writer.sendall(data[start:start + 997])
+
+            thread = threading.Thread(target=write, daemon=True)
+            thread.start()
+            await asyncio.wait_for(done, 5)
+            thread.join()
+        finally:
+            writer.close()
+            await asyncio.sleep(0.01)
+        return received
+
+    received = asyncio.run(scenario())
+    assert [line for line, _ in received] == [LINE.rstrip(b"\r\n")] * 2000
+    assert {thread for _, thread in received} == {threading.main_thread()}
+
+
+# Lector anterior, solo para el benchmark: el bucle de SocketDevice.read_line,
+# select y recv de un byte, y luego el salto del hilo lector al bucle
+class LegacyReader(threading.Thread):
+    def __init__(self, sock, loop, on_line):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.loop = loop
+        self.on_line = on_line
+
+    def run(self):
+        buffer = b""
+        while True:
+            read_ready, _, _ = select.select([self.sock], [], [], 0.5)
+            if len(read_ready) == 0:
+                continue
+            buf = self.sock.recv(1)
+            if buf == b"":
+                return
+            if buf != b"\xff":
+                buffer += buf
+                if buf == b"\n":
+                    buffer = buffer.rstrip(b"\r\n")
+                    if len(buffer) > 0:
+                        line, buffer = buffer, b""
+                        self.loop.call_soon_threadsafe(self.on_line, line)
+
+
+async def measure(transport, pings=200, bulk=2000):
+    """Latencia por mensaje y CPU por 1000 mensajes de un transporte."""
+    loop = asyncio.get_running_loop()
+    writer, reader = socket.socketpair()
+    state = {"waiter": None, "count": 0, "target": 0}
+
+    def on_line(line):
+        state["count"] += 1
+        waiter = state["waiter"]
+        if waiter is not None and state["count"] >= state["target"]:
+            state["waiter"] = None
+            waiter.set_result(None)
+
+    async def send(data, lines):
+        state["target"] = state["count"] + lines
+        state["waiter"] = waiter = loop.create_future()
+        if lines == 1:
+            writer.sendall(data)
+        else:
+            # La ráfaga desde otro hilo: con asyncio el lector es el bucle
+            await loop.run_in_executor(None, writer.sendall, data)
+        await waiter
+
+    if transport == "threaded":
+        LegacyReader(reader, loop, on_line).start()
+    else:
+        await loop.create_connection(
+            lambda: LineProtocol(on_line, lambda exc: None), sock=reader
+        )
+
+    try:
+        latencies = []
+        for _ in range(pings):
+            start = time.perf_counter()
+            await send(LINE, 1)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.process_time()
+        await send(LINE * bulk, bulk)
+        cpu = (time.process_time() - start) * 1000 * 1000 / bulk
+    finally:
+        writer.close()
+        await asyncio.sleep(0.01)
+        if transport == "threaded":
+            reader.close()
+    return statistics.median(latencies), cpu
+
+
+@pytest.mark.benchmark
+def test_benchmark_asyncio_against_reader_thread():
+    """Latencia por mensaje y CPU del transporte asyncio frente al hilo lector"""
+    for transport in ("threaded", "asyncio"):
+        loop = asyncio.new_event_loop()
+        try:
+            latency, cpu = loop.run_until_complete(measure(transport))
+        finally:
+            loop.close()
+        print(
+            f"{transport:>8}: latencia mediana {latency * 1e6:.0f} µs, "
+            f"{cpu:.1f} ms de CPU por 1000 mensajes"
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest para la agrupación de escrituras de estado
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.custom_alarmdecoder.coalesce import WriteCoalescer
+from custom_components.custom_alarmdecoder.decoder import KIND_KEYPAD, PanelEnvelope
+from custom_components.custom_alarmdecoder.router import MaskRouter
+
+
+class FakeHandle:
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeLoop:
+    """Bucle con reloj manual que ejecuta los call_later al avanzar."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.handles = []
+
+    def time(self):
+        return self.now
+
+    def call_later(self, delay, callback):
+        handle = FakeHandle(self.now + delay, callback)
+        self.handles.append(handle)
+        return handle
+
+    def advance(self, seconds):
+        target = self.now + seconds
+        while due := sorted(
+            (h for h in self.handles if h.when <= target and not h.cancelled),
+            key=lambda h: h.when,
+        ):
+            handle = due[0]
+            self.handles.remove(handle)
+            self.now = handle.when
+            handle.callback()
+        self.now = target
+
+
+class TestWriteCoalescer:
+    """Tests for WriteCoalescer"""
+
+    def setup_method(self):
+        self.loop = FakeLoop()
+        self.writes = []
+        self.coalescer = WriteCoalescer(
+            self.loop, lambda: self.writes.append(self.loop.now), 1.0
+        )
+
+    def test_first_write_is_immediate(self):
+        self.coalescer.request()
+        assert self.writes == [0.0]
+
+    def test_burst_gets_one_trailing_write(self):
+        for _ in range(10):
+            self.coalescer.request()
+            self.loop.advance(0.05)
+        self.loop.advance(1)
+
+        assert self.writes == [0.0, 1.0]
+        assert self.coalescer.coalesced == 8
+
+    def test_critical_write_is_never_delayed(self):
+        self.coalescer.request()
+        self.loop.advance(0.1)
+        self.coalescer.request()
+        self.loop.advance(0.1)
+        self.coalescer.request(critical=True)
+
+        assert self.writes == [0.0, pytest.approx(0.2)]
+        # La escritura pendiente queda absorbida por la crítica
+        self.loop.advance(2)
+        assert len(self.writes) == 2
+        assert self.coalescer.coalesced == 1
+
+    def test_spaced_writes_are_not_delayed(self):
+        for _ in range(3):
+            self.coalescer.request()
+            self.loop.advance(1.5)
+        assert self.writes == [0.0, 1.5, 3.0]
+        assert self.coalescer.coalesced == 0
+
+    def test_cancel_drops_trailing_write(self):
+        self.coalescer.request()
+        self.coalescer.request()
+        self.coalescer.cancel()
+        self.loop.advance(2)
+        assert self.writes == [0.0]
+
+    def test_zero_interval_writes_every_time(self):
+        coalescer = WriteCoalescer(self.loop, lambda: self.writes.append(1), 0)
+        for _ in range(5):
+            coalescer.request()
+        assert len(self.writes) == 5
+
+
+def test_exit_delay_beeps_are_coalesced():
+    """Una cuenta atrás de 30 s con mensajes cada 0,25 s escribe ~30 veces, no 120"""
+    loop = FakeLoop()
+    writes = []
+    coalescer = WriteCoalescer(loop, lambda: writes.append(loop.now), 1.0)
+    for _ in range(120):
+        coalescer.request()
+        loop.advance(0.25)
+    loop.advance(1)
+
+    assert len(writes) <= 31
+    assert writes[-1] >= 29.75
+    assert coalescer.coalesced + len(writes) == 120
+
+
+def test_keypad_display_sensor_writes_through_coalescer():
+    """La pantalla del teclado real escribe por el agrupador sin atributos extra
+    y registra sus escrituras agrupadas para los diagnósticos"""
+    # Necesita la integración completa: Home Assistant y adext
+    pytest.importorskip("homeassistant")
+    pytest.importorskip("adext")
+    from custom_components.custom_alarmdecoder.sensor import AlarmDecoderSensor
+
+    loop = FakeLoop()
+    router = MaskRouter()
+    client = SimpleNamespace(serial_number="ffffffff", version_number="V2.2a")
+    sensor = AlarmDecoderSensor(client, router, 16, min_write_interval=1.0)
+    sensor.hass = SimpleNamespace(loop=loop)
+    sensor.entity_id = "sensor.keypad_16"
+    runtime_data = SimpleNamespace(write_coalescers={})
+    sensor.platform = SimpleNamespace(
+        config_entry=SimpleNamespace(runtime_data=runtime_data)
+    )
+    writes = []
+    sensor.async_write_ha_state = lambda: writes.append(sensor.native_value)
+    router.subscribe(16, sensor._message_callback)
+
+    def show(text):
+        envelope = PanelEnvelope(KIND_KEYPAD, 1 << 16, 0, 0, text, None, None)
+        router.dispatch_mask(1 << 16, envelope)
+
+    show("DISARMED")
+    for second in range(5):
+        show(f"Exit delay {second}")
+    loop.advance(1)
+
+    assert writes == ["DISARMED", "Exit delay 4"]
+    # La cuenta de escrituras agrupadas sale en los diagnósticos de la entrada
+    assert runtime_data.write_coalescers["sensor.keypad_16"].coalesced == 4
+    assert sensor.extra_state_attributes is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest de la resincronización de zonas tras conectar
+"""
+
+import asyncio
+
+import pytest
+
+from custom_components.custom_alarmdecoder.decoder import (
+    KIND_KEYPAD,
+    STATUS_ARMED_AWAY,
+    STATUS_READY,
+    PanelEnvelope,
+)
+from custom_components.custom_alarmdecoder.resync import ZoneResync
+
+ZONES = {1, 5, 9, 12}
+
+
+class FakeMessage:
+    """Mensaje de teclado con el código numérico de alarmdecoder."""
+
+    def __init__(self, code):
+        self.code = code
+
+    def parse_numeric_code(self):
+        return int(self.code)
+
+
+def keypad(text, status=0, code="008"):
+    return PanelEnvelope(KIND_KEYPAD, 1 << 18, status, 0, text, None, FakeMessage(code))
+
+
+class Harness:
+    """Resync con las pulsaciones y publicaciones registradas."""
+
+    def __init__(self, loop, timeout=30.0):
+        self.pressed = []
+        self.published = []
+
+        def press(key):
+            self.pressed.append(key)
+            future = loop.create_future()
+            future.set_result(True)
+            return future
+
+        self.resync = ZoneResync(
+            loop, lambda: ZONES, press, self.published.append, timeout
+        )
+        self.resync.start()
+
+
+def test_ready_panel_restores_every_zone_at_once():
+    """Un panel listo no tiene zonas en fallo, la tabla sale del primer mensaje"""
+
+    async def scenario():
+        harness = Harness(asyncio.get_running_loop())
+        harness.resync.feed(keypad("****DISARMED****  Ready to Arm", STATUS_READY))
+        assert harness.published == [{1: False, 5: False, 9: False, 12: False}]
+        assert harness.pressed == [] and not harness.resync.active
+
+    asyncio.run(scenario())
+
+
+def test_faults_collected_until_display_wraps():
+    """Se pulsa * una vez y se recogen los fallos hasta que la pantalla da la vuelta"""
+
+    async def scenario():
+        harness = Harness(asyncio.get_running_loop())
+        harness.resync.feed(keypad("DISARMED Hit * for faults"))
+        harness.resync.feed(keypad("DISARMED Hit * for faults"))
+        assert harness.pressed == ["*"]
+
+        for code in ("005", "012", "005"):
+            harness.resync.feed(keypad(f"FAULT {code} ZONE", code=code))
+        # Una sola publicación con toda la tabla
+        assert harness.published == [{1: False, 5: True, 9: False, 12: True}]
+
+        # Un nuevo inicio (reconexión) vuelve a resincronizar
+        harness.resync.start()
+        harness.resync.feed(keypad("Ready", STATUS_READY))
+        assert harness.resync.runs == 2
+
+    asyncio.run(scenario())
+
+
+def test_armed_panel_is_not_pressed_and_times_out():
+    """Armado no se pulsa nada, al vencer la tabla sale de los fallos vistos"""
+
+    async def scenario():
+        harness = Harness(asyncio.get_running_loop(), timeout=0.05)
+        harness.resync.feed(keypad("ARMED ***AWAY***", STATUS_ARMED_AWAY))
+        harness.resync.feed(keypad("ALARM 009 ZONE", STATUS_ARMED_AWAY, "009"))
+        await asyncio.sleep(0.1)
+        assert harness.pressed == []
+        assert harness.published == [{1: False, 5: False, 9: True, 12: False}]
+        assert not harness.resync.active
+
+    asyncio.run(scenario())
+
+
+def test_single_fault_published_on_timeout():
+    """Con un solo fallo la pantalla no da la vuelta: el filtro de duplicados
+    descarta sus repeticiones y la tabla completa sale al vencer el plazo"""
+
+    async def scenario():
+        harness = Harness(asyncio.get_running_loop(), timeout=0.05)
+        harness.resync.feed(keypad("DISARMED Hit * for faults"))
+        harness.resync.feed(keypad("FAULT 005 ZONE", code="005"))
+        await asyncio.sleep(0.1)
+        assert harness.pressed == ["*"]
+        # Las zonas restauradas mientras el enlace estaba caído también
+        assert harness.published == [{1: False, 5: True, 9: False, 12: False}]
+        assert not harness.resync.active
+
+    asyncio.run(scenario())
+
+
+def test_only_the_fault_prompt_is_pressed():
+    """Solo se pulsa * con el aviso "Hit * for faults", una vez por conexión"""
+
+    async def scenario():
+        harness = Harness(asyncio.get_running_loop(), timeout=0.05)
+        harness.resync.feed(keypad("****DISARMED****                "))
+        harness.resync.feed(keypad("DISARMED CHECK  ZONE 5 BYPASSED "))
+        assert harness.pressed == []
+
+        # Otra entrada del mismo dispositivo ya pulsó tras esta conexión
+        resync = ZoneResync(
+            asyncio.get_running_loop(), lambda: ZONES, lambda key: None, list, 0.05
+        )
+        resync.start()
+        resync.feed(keypad("DISARMED Hit * for faults"))
+        assert resync.active
+
+    asyncio.run(scenario())
+
+
+def test_timeout_without_keypad_messages_publishes_nothing():
+    """Sin ningún mensaje de teclado no se inventa una tabla"""
+
+    async def scenario():
+        harness = Harness(asyncio.get_running_loop(), timeout=0.05)
+        await asyncio.sleep(0.1)
+        assert harness.published == [] and not harness.resync.active
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
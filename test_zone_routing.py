@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pruebas pytest y benchmark del enrutado por zona y por canal de expansor
+"""
+
+import timeit
+
+import pytest
+
+from custom_components.custom_alarmdecoder.router import ChangeRouter, KeyedRouter
+
+
+class ZoneEntity:
+    """Entidad de zona mínima que registra los cambios recibidos."""
+
+    def __init__(self, zone_number):
+        self.zone_number = zone_number
+        self.is_on = False
+        self.calls = 0
+
+    def zone_callback(self, faulted):
+        self.calls += 1
+        self.is_on = faulted
+
+    # Callback anterior, solo para el benchmark: difusión a todas las zonas
+    def legacy_fault_callback(self, zone):
+        if zone is None or int(zone) == self.zone_number:
+            self.is_on = True
+
+
+def build_router(zone_count):
+    router = KeyedRouter()
+    entities = [ZoneEntity(zone) for zone in range(1, zone_count + 1)]
+    for entity in entities:
+        router.subscribe(entity.zone_number, entity.zone_callback)
+    return router, entities
+
+
+class TestKeyedRouter:
+    """Tests for zone routing"""
+
+    def test_fault_reaches_only_its_zone(self):
+        router, entities = build_router(8)
+        assert router.dispatch(3, True)
+
+        assert [e.zone_number for e in entities if e.calls] == [3]
+        assert entities[2].is_on
+
+    def test_restore_clears_zone(self):
+        router, entities = build_router(8)
+        router.dispatch(5, True)
+        router.dispatch(5, False)
+
+        assert not entities[4].is_on
+        assert entities[4].calls == 2
+
+    def test_unknown_zone_is_ignored(self):
+        router, entities = build_router(8)
+        assert not router.dispatch(99, True)
+        assert not any(e.calls for e in entities)
+
+    def test_dispatch_all(self):
+        router, entities = build_router(8)
+        router.dispatch_all(True)
+        assert all(e.is_on for e in entities)
+
+    def test_unsubscribe(self):
+        router = KeyedRouter()
+        first, second = ZoneEntity(1), ZoneEntity(1)
+        remove_first = router.subscribe(1, first.zone_callback)
+        router.subscribe(1, second.zone_callback)
+
+        remove_first()
+        router.dispatch(1, True)
+
+        assert first.calls == 0
+        assert second.calls == 1
+        assert 1 in router
+
+    def test_last_unsubscribe_removes_key(self):
+        router = KeyedRouter()
+        remove = router.subscribe(1, ZoneEntity(1).zone_callback)
+        remove()
+        remove()
+
+        assert 1 not in router
+        assert len(router) == 0
+
+
+class TestChangeRouter:
+    """Tests for relay/expander routing by (address, channel)"""
+
+    def setup_method(self):
+        self.router = ChangeRouter()
+        self.received = []
+        self.router.subscribe((7, 1), self.received.append)
+
+    def test_only_owner_channel_receives(self):
+        assert self.router.dispatch_changed((7, 1), 1, "7:1=1")
+        assert not self.router.dispatch_changed((7, 2), 1, "7:2=1")
+        assert self.received == ["7:1=1"]
+
+    def test_repeated_value_is_suppressed(self):
+        self.router.dispatch_changed((7, 1), 1, "first")
+        assert not self.router.dispatch_changed((7, 1), 1, "repeat")
+        assert self.router.dispatch_changed((7, 1), 0, "cleared")
+        assert self.received == ["first", "cleared"]
+
+    def test_invalidate_delivers_repeated_value(self):
+        """Si un fallo cambió la zona, el mismo valor del relé vuelve a aplicarse"""
+        self.router.dispatch_changed((7, 1), 0, "closed")
+        # Un fallo KPM abre la zona: la entidad invalida el valor del relé
+        self.router.invalidate((7, 1))
+        assert self.router.dispatch_changed((7, 1), 0, "closed again")
+        assert not self.router.dispatch_changed((7, 1), 0, "repeat")
+        assert self.received == ["closed", "closed again"]
+
+    def test_value_without_subscriber_is_not_remembered(self):
+        assert not self.router.dispatch_changed((9, 1), 1, "early")
+
+        late = []
+        self.router.subscribe((9, 1), late.append)
+        assert self.router.dispatch_changed((9, 1), 1, "late")
+        assert late == ["late"]
+
+
+def test_dispatch_calls_one_callback_whatever_the_zone_count():
+    """Un fallo solo llama al callback de su zona, haya 8 o 250 zonas"""
+    for zone_count in (8, 250):
+        router, entities = build_router(zone_count)
+        router.dispatch(zone_count // 2, True)
+        assert sum(e.calls for e in entities) == 1
+        assert entities[zone_count // 2 - 1].is_on
+
+
+def _best_time(statement, number=2000, repeat=5):
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number
+
+
+@pytest.mark.benchmark
+def test_benchmark_dispatch_cost_is_flat():
+    """Coste de enrutar un fallo con 8 y 250 zonas, frente a la difusión"""
+    for zone_count in (8, 250):
+        router, entities = build_router(zone_count)
+        routed = _best_time(lambda: router.dispatch(zone_count // 2, True))
+        broadcast = _best_time(
+            lambda: [e.legacy_fault_callback(zone_count // 2) for e in entities]
+        )
+        print(
+            f"{zone_count:>3} zonas: enrutado {routed * 1e6:.2f} µs, "
+            f"difusión {broadcast * 1e6:.2f} µs"
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])